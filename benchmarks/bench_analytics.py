@@ -0,0 +1,72 @@
+import argparse
+import json
+import random
+import time
+from datetime import date, timedelta
+from services.analytics import AnalyticsEngine
+
+
+def synthetic_history(users, habits, years, rate=0.6, seed=0):
+    """Completion records for `users` x `habits` over `years` of days, each kept with probability `rate`."""
+    rng = random.Random(seed)
+    habit_list = [{"name": f"habit{k}", "periodicity": "weekly" if k % 4 == 0 else "daily", "points": 5 + k % 3}
+                  for k in range(habits)]
+    start = date(2020, 1, 1)
+    days = [start + timedelta(days=d) for d in range(365 * years)]
+    records = [(f"user{u}", habit["name"], day)
+               for u in range(users) for habit in habit_list for day in days if rng.random() < rate]
+    return records, habit_list, days[0], days[-1]
+
+
+def python_report(records, habits, start, end):
+    """The same per-user totals and longest daily streak, computed with plain loops."""
+    points_of = {habit["name"]: habit["points"] for habit in habits}
+    totals, days = {}, {}
+    for username, habit_name, day in records:
+        if start <= day <= end:
+            entry = totals.setdefault(username, [0, 0])
+            entry[0] += 1
+            entry[1] += points_of[habit_name]
+            days.setdefault((username, habit_name), set()).add(day.toordinal())
+    longest = {}
+    for (username, _), completed in days.items():
+        run = best = 0
+        for day in sorted(completed):
+            run = run + 1 if day - 1 in completed else 1
+            best = max(best, run)
+        longest[username] = max(longest.get(username, 0), best)
+    return totals, longest
+
+
+def timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the vectorized analytics engine against plain Python loops.")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--habits", type=int, default=20)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    records, habits, start, end = synthetic_history(args.users, args.habits, args.years)
+    engine, build_s = timed(AnalyticsEngine.from_records, records, habits)
+    month_start = date(end.year, end.month, 1)
+    _, month_s = timed(engine.report, month_start, end)
+    _, history_s = timed(engine.report, start, end)
+    _, python_s = timed(python_report, records, habits, start, end)
+    result = {"completions": len(records), "build_s": build_s, "month_report_s": month_s,
+              "full_report_s": history_s, "python_full_report_s": python_s}
+    print(f"{len(records)} completions: build {build_s * 1000:.0f} ms, month report {month_s * 1000:.0f} ms, "
+          f"full-history report {history_s * 1000:.0f} ms (plain Python {python_s * 1000:.0f} ms)")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(result, file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
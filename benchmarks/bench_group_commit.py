@@ -0,0 +1,87 @@
+import argparse
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from benchmarks.synthetic import synthetic_household_data
+from services.data_manager import DataManager
+from services.group_commit import GroupCommit
+from services.storage import FileStore
+
+START = datetime(2026, 1, 1, 7)
+
+
+def burst(threads, completions, complete):
+    """Runs `threads` callers that each complete `completions` habits; returns the wall time."""
+    barrier = threading.Barrier(threads)
+
+    def caller(n):
+        barrier.wait()
+        for i in range(completions):
+            complete(n, i)
+    workers = [threading.Thread(target=caller, args=(n,)) for n in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - started
+
+
+def measure(threads, completions, window, users, habits):
+    """Completions per second and writes (journal appends, each one fsync) for both commit modes."""
+    results = {}
+
+    # one session, lock and fsync per completion, as separate CLI calls or daemon-less callers get
+    def per_call(n, i):
+        with DataManager.session() as session:
+            DataManager.complete_habit(users[n % len(users)], habits[i % len(habits)], session=session,
+                                       now=START + timedelta(days=i // len(habits)))
+    wall = burst(threads, completions, per_call)
+    results["per_call"] = {"per_second": threads * completions / wall, "writes": threads * completions}
+
+    session = DataManager.session()
+    with GroupCommit(session, window=window) as group:
+        def grouped(n, i):
+            group.apply(DataManager.complete_habit, users[n % len(users)], habits[i % len(habits)], session=session,
+                        now=START + timedelta(days=1000 + i // len(habits)))
+        wall = burst(threads, completions, grouped)
+    session.close()
+    results["group_commit"] = {"per_second": threads * completions / wall, "writes": group.stats["flushes"]}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Writes and throughput of per-call commits vs. group commit for bursts of completions.")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8, 32], help="Concurrent callers per run.")
+    parser.add_argument("--completions", type=int, default=50, help="Completions per caller.")
+    parser.add_argument("--window-ms", type=float, default=5.0, help="Group commit window.")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    data, _ = synthetic_household_data(households=8, members=4, habits=10, years=1)
+    users = [user for details in data["households"].values() for user in details["members"]]
+    habits = [habit["name"] for habit in data["habits"]]
+    logging.disable(logging.WARNING)
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for threads in args.threads:
+            DataManager.FILE_PATH = os.path.join(directory, f"data{threads}.json")
+            FileStore(DataManager.FILE_PATH).save(json.loads(json.dumps(data)))
+            result = dict(threads=threads, **measure(threads, args.completions, args.window_ms / 1000, users, habits))
+            results.append(result)
+            per_call, grouped = result["per_call"], result["group_commit"]
+            print(f"{threads:>4} callers  per call: {per_call['per_second']:>7.0f}/s {per_call['writes']:>6} writes   "
+                  f"group commit: {grouped['per_second']:>7.0f}/s {grouped['writes']:>6} writes "
+                  f"({per_call['writes'] / grouped['writes']:.0f}x fewer)")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from benchmarks.synthetic import synthetic_household_data
+from services.data_manager import DataManager
+from services.http_api import HttpApi
+from services.storage import FileStore
+
+
+class Connection:
+    """A keep-alive HTTP/1.1 client connection, just enough for the API's JSON responses."""
+
+    def __init__(self, reader, writer, host):
+        self.reader = reader
+        self.writer = writer
+        self.host = host
+
+    @classmethod
+    async def open(cls, host, port):
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer, host)
+
+    async def request(self, method, path, body=None):
+        payload = b"" if body is None else json.dumps(body).encode("utf-8")
+        self.writer.write(f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Length: {len(payload)}\r\n\r\n"
+                          .encode("latin-1") + payload)
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while (line := await self.reader.readline()) != b"\r\n":
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        return status, json.loads(await self.reader.readexactly(length))
+
+    def close(self):
+        self.writer.close()
+
+
+async def load(host, port, users, households, habits, clients, requests, write_share, seed):
+    """Runs `clients` concurrent connections; returns {op: [latency seconds]} and the wall time."""
+    latencies = {"complete": [], "leaderboard": [], "global_leaderboard": []}
+
+    async def client(n):
+        rng = random.Random(seed + n)
+        connection = await Connection.open(host, port)
+        try:
+            for _ in range(requests):
+                roll = rng.random()
+                started = time.perf_counter()
+                if roll < write_share:
+                    op = "complete"
+                    status, _ = await connection.request("POST", "/completions",
+                                                         {"username": rng.choice(users), "habit": rng.choice(habits)})
+                elif roll < (1 + write_share) / 2:
+                    op = "leaderboard"
+                    status, _ = await connection.request("GET", f"/leaderboard/{rng.choice(households)}?top=10")
+                else:
+                    op = "global_leaderboard"
+                    status, _ = await connection.request("GET", "/leaderboard?top=10")
+                if status >= 400:
+                    raise RuntimeError(f"{op} failed with HTTP {status}")
+                latencies[op].append(time.perf_counter() - started)
+        finally:
+            connection.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(n) for n in range(clients)))
+    return latencies, time.perf_counter() - started
+
+
+def percentile(values, share):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * share), len(ordered) - 1)]
+
+
+def measure(clients, requests, write_share, flush_interval, **params):
+    data, _ = synthetic_household_data(**params)
+    users = [user for details in data["households"].values() for user in details["members"]]
+    habits = [habit["name"] for habit in data["habits"]]
+    file_path = DataManager.FILE_PATH
+    previous = logging.root.manager.disable
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as directory:
+        DataManager.FILE_PATH = os.path.join(directory, "data.json")
+        FileStore(DataManager.FILE_PATH).save(data)
+        # the server gets its own thread and event loop so client and server do not share one
+        api = HttpApi(port=0, flush_interval=flush_interval)
+        started = threading.Event()
+        thread = threading.Thread(target=asyncio.run, args=(api.serve(started.set),))
+        thread.start()
+        try:
+            started.wait()
+            latencies, wall = asyncio.run(load(api.host, api.port, users, list(data["households"]), habits,
+                                               clients, requests, write_share, seed=0))
+        finally:
+            api.shutdown()
+            thread.join()
+            DataManager.FILE_PATH = file_path
+            logging.disable(previous)
+    total = sum(len(values) for values in latencies.values())
+    return {
+        "clients": clients,
+        "requests": total,
+        "requests_per_second": total / wall,
+        "flushes": api.stats["flushes"],
+        "view_hits": api.stats["view_hits"],
+        "ops": {op: {"count": len(values), "p50_ms": statistics.median(values) * 1000,
+                     "p99_ms": percentile(values, 0.99) * 1000}
+                for op, values in latencies.items() if values},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the HTTP API with local keep-alive clients.")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 16, 64], help="Concurrent connections per run.")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per client.")
+    parser.add_argument("--write-share", type=float, default=0.5, help="Share of requests that are completions.")
+    parser.add_argument("--flush-interval", type=float, default=1.0)
+    parser.add_argument("--households", type=int, default=20)
+    parser.add_argument("--members", type=int, default=5)
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    results = []
+    for clients in args.clients:
+        result = measure(clients, args.requests, args.write_share, args.flush_interval,
+                         households=args.households, members=args.members, years=1)
+        results.append(result)
+        print(f"{clients:>4} clients  {result['requests_per_second']:>8.0f} req/s  "
+              f"{result['flushes']} flushes, {result['view_hits']} cached reads")
+        for op, stats in result["ops"].items():
+            print(f"{'':>14}{op:<20} p50 {stats['p50_ms']:6.2f} ms  p99 {stats['p99_ms']:6.2f} ms")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
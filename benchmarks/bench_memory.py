@@ -0,0 +1,63 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from benchmarks.synthetic import synthetic_document
+from services.storage import FileStore
+
+
+def count_claims(store):
+    claims = {}
+    for _, period in store.iter_section("completed_habits"):
+        for username in period.values():
+            claims[username] = claims.get(username, 0) + 1
+    return claims
+
+
+QUERIES = {
+    "full load": lambda store: store.load(),
+    "habits": lambda store: store.read_section("habits") + store.read_section("bonus_habits"),
+    "leaderboard": lambda store: store.read_section("leaderboard"),
+    "stream claims": count_claims,
+}
+
+
+def measure(store, query):
+    started = time.perf_counter()
+    query(store)
+    seconds = time.perf_counter() - started
+    # timed separately: tracing allocations slows the query down several times
+    tracemalloc.start()
+    query(store)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak memory of full loads vs. section reads and streaming.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000], help="Completions per document.")
+    parser.add_argument("--format", dest="fmt", choices=FileStore.FORMATS, default="json")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            path = os.path.join(directory, f"data-{size}.json")
+            FileStore(path, args.fmt).save(synthetic_document(size, households=max(size // 10_000, 1)))
+            store = FileStore(path)
+            for name, query in QUERIES.items():
+                seconds, peak = measure(store, query)
+                results.append({"completions": size, "query": name, "seconds": seconds, "peak_bytes": peak})
+                print(f"{size:>9} {name:<14} {seconds * 1000:9.1f} ms  peak {peak / 2**20:8.1f} MiB")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import argparse
+import json
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from classes.user import User
+
+HABITS = 10
+START = date(2000, 1, 1)
+
+
+def build(completions):
+    """A user with `completions` daily completions spread over HABITS habits."""
+    user = User("bench", "household0")
+    for n in range(completions):
+        user.track_completion(f"habit{n % HABITS}", START + timedelta(days=n // HABITS), "daily")
+    return user
+
+
+def legacy_history(user):
+    """The same history as the previous model kept it: a list of date objects per habit."""
+    return {habit: user.completion_dates(habit) for habit in user.habits_completed}
+
+
+def legacy_to_dict(history):
+    return {habit: [day.strftime("%Y-%m-%d") for day in dates] for habit, dates in history.items()}
+
+
+def legacy_from_dict(data):
+    return {habit: [datetime.strptime(day, "%Y-%m-%d").date() for day in dates] for habit, dates in data.items()}
+
+
+def traced(build_value):
+    """Bytes allocated by build_value() that are still alive afterwards."""
+    tracemalloc.start()
+    value = build_value()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value, size
+
+
+def timed(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - started) / repeat
+
+
+def measure(completions, repeat):
+    user = build(completions)
+    _, array_bytes = traced(lambda: {habit: User._ordinals(ordinals.tolist()) for habit, ordinals in user.habits_completed.items()})
+    history, list_bytes = traced(lambda: legacy_history(user))
+
+    # the JSON text round trip as the store would do it
+    data, dump_s = timed(lambda: json.dumps(user.to_dict()), repeat)
+    _, load_s = timed(lambda: User.from_dict(json.loads(data)), repeat)
+    legacy, legacy_dump_s = timed(lambda: json.dumps(legacy_to_dict(history)), repeat)
+    _, legacy_load_s = timed(lambda: legacy_from_dict(json.loads(legacy)), repeat)
+    return {
+        "completions": completions,
+        "array_bytes": array_bytes,
+        "list_bytes": list_bytes,
+        "dump_per_second": completions / dump_s,
+        "load_per_second": completions / load_s,
+        "legacy_dump_per_second": completions / legacy_dump_s,
+        "legacy_load_per_second": completions / legacy_load_s,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory and (de)serialization speed of array('i') histories vs. date lists.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000], help="Completions per user.")
+    parser.add_argument("--repeat", type=int, default=3, help="Round trips averaged per measurement.")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        result = measure(size, args.repeat)
+        results.append(result)
+        per_100k = 100_000 / size
+        print(f"{size:>9} completions  memory per 100k: arrays {result['array_bytes'] * per_100k / 2**10:7.0f} KiB, "
+              f"date lists {result['list_bytes'] * per_100k / 2**10:7.0f} KiB")
+        print(f"{'':>9}              dump {result['dump_per_second'] / 1e6:5.2f} M/s (was {result['legacy_dump_per_second'] / 1e6:5.2f}), "
+              f"load {result['load_per_second'] / 1e6:5.2f} M/s (was {result['legacy_load_per_second'] / 1e6:5.2f})")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+from benchmarks.synthetic import synthetic_household_data
+from services.data_manager import DataManager, Session
+from services.report import Reports
+from services.storage import FileStore, convert
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Wall time of the monthly household reports by worker count.")
+    parser.add_argument("--households", type=int, default=200)
+    parser.add_argument("--members", type=int, default=5)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--month", default="12-2025")
+    parser.add_argument("--repeat", type=int, default=3, help="Best of this many runs.")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    data, _ = synthetic_household_data(households=args.households, members=args.members, habits=10, years=1)
+    logging.disable(logging.WARNING)
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        DataManager.FILE_PATH = os.path.join(directory, "data.json")
+        # seed the history and aggregates once, so the runs only time the reports
+        session = Session(data=data)
+        session.history
+        session.aggregates
+        FileStore(DataManager.FILE_PATH).save(data)
+        convert(DataManager.FILE_PATH, "binary")
+        expected = None
+        for workers in args.workers:
+            timings = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                reports = Reports.generate(args.month, workers=workers)
+                timings.append(time.perf_counter() - started)
+            expected = expected or reports
+            assert reports == expected, f"{workers} workers built different reports"
+            results.append({"workers": workers, "seconds": min(timings)})
+            print(f"{workers:>3} workers  {min(timings) * 1000:>8.1f} ms  "
+                  f"({results[0]['seconds'] / min(timings):.2f}x of 1 worker, {os.cpu_count()} cores)")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from benchmarks.synthetic import synthetic_document
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLI = os.path.join(ROOT, "cli.py")
+COMMANDS = {
+    "--help": ["--help"],
+    "list-habits": ["list-habits"],
+    "complete-habit": ["complete-habit", "household0-user0", "habit0"],
+}
+
+
+def import_times(stderr):
+    """Parses `-X importtime` output into {module: cumulative microseconds} for top-level imports."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith("  "):
+            modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def measure(args, env, repeat):
+    wall, imports, returncode = [], {}, 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = subprocess.run([sys.executable, "-X", "importtime", CLI] + args,
+                                env=env, capture_output=True, text=True)
+        wall.append(time.perf_counter() - started)
+        imports, returncode = import_times(result.stderr), result.returncode
+    return {"wall_ms": statistics.median(wall) * 1000, "import_ms": sum(imports.values()) / 1000, "exit": returncode,
+            "slowest": sorted(imports.items(), key=lambda item: item[1], reverse=True)[:5]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure CLI cold-start time with python -X importtime.")
+    parser.add_argument("--completions", type=int, default=100_000, help="Size of the synthetic data file.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget", type=float, help="Fail if --help takes longer than this many milliseconds.")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "data.json")
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(synthetic_document(args.completions), file)
+        env = dict(os.environ, HOMESTREAK_DATA=path, HOMESTREAK_SOCKET=os.path.join(directory, "none.sock"))
+        for name, command in COMMANDS.items():
+            result = dict(measure(command, env, args.repeat), command=name)
+            results.append(result)
+            slowest = ", ".join(f"{module} {us / 1000:.1f}" for module, us in result["slowest"])
+            failed = f"  [exit {result['exit']}]" if result["exit"] else ""
+            print(f"{name:<15} wall {result['wall_ms']:8.1f} ms  imports {result['import_ms']:7.1f} ms  ({slowest}){failed}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=4)
+    if args.budget is not None and results[0]["wall_ms"] > args.budget:
+        raise SystemExit(f"--help took {results[0]['wall_ms']:.1f} ms, over the {args.budget:.1f} ms budget.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+from benchmarks.synthetic import synthetic_document
+from services.storage import FileStore
+
+
+def measure(data, fmt, directory, repeat):
+    path = os.path.join(directory, f"data.{fmt}")
+    save, load = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        FileStore(path, fmt).save(data)
+        save.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        FileStore(path).load()
+        load.append(time.perf_counter() - started)
+    return {"format": fmt, "save_s": min(save), "load_s": min(load), "bytes": os.path.getsize(path)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare load/save time and file size of the store formats.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000], help="Completions per document.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            data = synthetic_document(size, households=max(size // 10_000, 1))
+            for fmt in FileStore.FORMATS:
+                result = dict(measure(data, fmt, directory, args.repeat), completions=size)
+                results.append(result)
+                print(f"{size:>9} {fmt:<8} save {result['save_s'] * 1000:9.1f} ms  "
+                      f"load {result['load_s'] * 1000:9.1f} ms  {result['bytes'] / 1024:10.1f} KiB")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import argparse
+import json
+import time
+from datetime import date, timedelta
+from classes.user import User
+
+
+def measure(completions, window):
+    """Times track_completion over a daily run and returns the mean cost of the first and last `window` calls."""
+    user = User("bench", "household0")
+    start = date(2000, 1, 1)
+    timings = []
+    for day in range(completions):
+        completed_on = start + timedelta(days=day)
+        started = time.perf_counter()
+        user.track_completion("habit0", completed_on, "daily")
+        timings.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    rebuilt = user.rebuild_streak("habit0", "daily")
+    rebuild_s = time.perf_counter() - started
+    assert rebuilt["current"] == rebuilt["longest"] == completions
+    return {
+        "completions": completions,
+        "first_us": sum(timings[:window]) / window * 1e6,
+        "last_us": sum(timings[-window:]) / window * 1e6,
+        "rebuild_s": rebuild_s,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show that streak updates cost the same regardless of history length.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000], help="Completions per habit.")
+    parser.add_argument("--window", type=int, default=1_000, help="Calls averaged at the start and end of each run.")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        result = measure(size, min(args.window, size))
+        results.append(result)
+        print(f"{size:>9} completions  first {result['first_us']:6.2f} us  last {result['last_us']:6.2f} us  "
+              f"rebuild {result['rebuild_s'] * 1000:8.1f} ms")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from benchmarks.synthetic import synthetic_household_data
+from classes.user import User
+from services.data_manager import DataManager, Session
+from services.leaderboard import Leaderboard
+from services.storage import FileStore
+
+SCENARIOS = {}
+
+
+def scenario(name):
+    """Registers a benchmark: fn(context) returning (operations, seconds) for one repeat."""
+    def register(fn):
+        SCENARIOS[name] = fn
+        return fn
+    return register
+
+
+class Context:
+    """The generated data shared by all scenarios, plus a scratch directory."""
+
+    def __init__(self, directory, ops, **params):
+        self.directory = directory
+        self.ops = ops
+        self.params = params
+        self.end = params.get("end", date(2025, 12, 31))
+        self.data, self.records = synthetic_household_data(**params)
+        self.text = json.dumps(self.data)
+        self.path = os.path.join(directory, "data.json")
+        FileStore(self.path).save(self.data)
+        self.users = [(user, household) for household, details in self.data["households"].items() for user in details["members"]]
+        self.rng = random.Random(0)
+
+    def fresh(self):
+        """A private copy of the data, so scenarios never see each other's changes."""
+        return json.loads(self.text)
+
+    def now(self, offset=0):
+        return datetime(self.end.year, self.end.month, self.end.day, 8) + timedelta(days=1 + offset)
+
+
+def _loop(ops, fn):
+    started = time.perf_counter()
+    for i in range(ops):
+        fn(i)
+    return ops, time.perf_counter() - started
+
+
+@scenario("store.load")
+def bench_load(ctx):
+    started = time.perf_counter()
+    FileStore(ctx.path).load()
+    return 1, time.perf_counter() - started
+
+
+@scenario("store.save")
+def bench_save(ctx):
+    data = ctx.fresh()
+    started = time.perf_counter()
+    FileStore(os.path.join(ctx.directory, "save.json")).save(data)
+    return 1, time.perf_counter() - started
+
+
+@scenario("complete_habit")
+def bench_complete_habit(ctx):
+    session = Session(data=ctx.fresh())
+    habits = [habit["name"] for habit in ctx.data["habits"]]
+    picks = [(ctx.rng.choice(ctx.users)[0], ctx.rng.choice(habits)) for _ in range(ctx.ops)]
+    return _loop(ctx.ops, lambda i: DataManager.complete_habit(*picks[i], session=session, now=ctx.now()))
+
+
+@scenario("claim_bonus_habit")
+def bench_claim_bonus_habit(ctx):
+    session = Session(data=ctx.fresh())
+    bonus = [habit["name"] for habit in ctx.data["bonus_habits"]]
+    # one claim per bonus habit and day, so every claim succeeds
+    return _loop(ctx.ops, lambda i: DataManager.claim_bonus_habit(
+        ctx.users[i % len(ctx.users)][0], bonus[i % len(bonus)], session=session, now=ctx.now(i // len(bonus))))
+
+
+@scenario("leaderboard.update")
+def bench_leaderboard_update(ctx):
+    session = Session(data=ctx.fresh())
+    session.rankings
+    return _loop(ctx.ops, lambda i: Leaderboard.update(User(*ctx.users[i % len(ctx.users)], points=10_000 + i), session=session))
+
+
+@scenario("global_rankings")
+def bench_global_rankings(ctx):
+    leaderboard = Leaderboard(session=Session(data=ctx.fresh()))
+    return _loop(ctx.ops, lambda i: leaderboard.get_global_rankings(10))
+
+
+@scenario("session.complete_habit")
+def bench_session(ctx):
+    """A CLI-style completion without process startup: lock, load, complete, append to the journal."""
+    DataManager.FILE_PATH = os.path.join(ctx.directory, "session.json")
+    FileStore(DataManager.FILE_PATH).save(ctx.fresh())
+    user, _ = ctx.users[0]
+    ops = max(ctx.ops // 100, 5)
+
+    def complete(i):
+        with DataManager.session() as session:
+            DataManager.complete_habit(user, "habit0", session=session, now=ctx.now(i))
+    return _loop(ops, complete)
+
+
+@scenario("user_stats")
+def bench_user_stats(ctx):
+    session = Session(data=ctx.fresh())
+
+    def stats(i):
+        DataManager.cache.clear()
+        DataManager.user_stats(ctx.users[i % len(ctx.users)][0], session=session)
+    return _loop(max(ctx.ops // 100, 5), stats)
+
+
+@scenario("completions_between")
+def bench_completions_between(ctx):
+    session = Session(data=ctx.fresh())
+    return _loop(max(ctx.ops // 10, 5), lambda i: DataManager.completions_between(
+        ctx.end - timedelta(days=30), ctx.end, session=session))
+
+
+@scenario("analytics.report")
+def bench_analytics_report(ctx):
+    from services.analytics import AnalyticsEngine, np
+    if np is None:
+        return 0, 0.0
+    started = time.perf_counter()
+    habits = ctx.data["habits"] + ctx.data["bonus_habits"]
+    AnalyticsEngine.from_records(ctx.records, habits).report(ctx.end - timedelta(days=29), ctx.end, ctx.end)
+    return 1, time.perf_counter() - started
+
+
+def run(names, repeats, ops, **params):
+    """Runs the scenarios; each result keeps the fastest of `repeats` runs as seconds per operation.
+
+    The garbage collector is paused while a scenario runs, as timeit does.
+    """
+    results = {}
+    previous = logging.root.manager.disable
+    logging.disable(logging.WARNING)
+    file_path = DataManager.FILE_PATH
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            ctx = Context(directory, ops, **params)
+            for name in names:
+                timings = []
+                for _ in range(repeats):
+                    # like timeit: collections triggered by earlier scenarios' garbage would swamp the timings
+                    gc.collect()
+                    gc.disable()
+                    try:
+                        count, seconds = SCENARIOS[name](ctx)
+                    finally:
+                        gc.enable()
+                    if count:
+                        timings.append(seconds / count)
+                if timings:
+                    results[name] = {"per_op_s": min(timings), "ops": count, "repeats": repeats}
+    finally:
+        logging.disable(previous)
+        DataManager.FILE_PATH = file_path
+    return results
+
+
+def compare(baseline, current, threshold):
+    """Rows of (scenario, baseline s/op, current s/op, ratio, verdict); slower by more than threshold is a regression."""
+    rows = []
+    for name, result in current.items():
+        before = baseline.get(name)
+        if before is None:
+            rows.append((name, None, result["per_op_s"], None, "new"))
+            continue
+        ratio = result["per_op_s"] / before["per_op_s"]
+        verdict = "REGRESSION" if ratio > 1 + threshold else "faster" if ratio < 1 / (1 + threshold) else "ok"
+        rows.append((name, before["per_op_s"], result["per_op_s"], ratio, verdict))
+    return rows
+
+
+def _format_time(seconds):
+    if seconds is None:
+        return "-"
+    return f"{seconds * 1e6:.1f} us" if seconds < 1e-3 else f"{seconds * 1000:.1f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time every hot path on deterministic synthetic household data.")
+    parser.add_argument("--households", type=int, default=20)
+    parser.add_argument("--members", type=int, default=5, help="Users per household.")
+    parser.add_argument("--habits", type=int, default=10)
+    parser.add_argument("--years", type=int, default=2, help="Years of completion history.")
+    parser.add_argument("--rate", type=float, default=0.5, help="Chance a habit is completed in a period.")
+    parser.add_argument("--ops", type=int, default=2000, help="Operations per repeat of the per-call scenarios.")
+    parser.add_argument("--repeats", type=int, default=5, help="Runs per scenario; the fastest is kept.")
+    parser.add_argument("--only", nargs="+", choices=sorted(SCENARIOS), help="Run only these scenarios.")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument("--baseline", help="Compare against the results in this JSON file; exits 1 on a regression.")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Slowdown (0.25 = 25%%) that counts as a regression.")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"), help="Only compare two result files.")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0], encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+        with open(args.compare[1], encoding="utf-8") as file:
+            current = json.load(file)["results"]
+    else:
+        params = {"households": args.households, "members": args.members, "habits": args.habits,
+                  "years": args.years, "rate": args.rate}
+        current = run(args.only or list(SCENARIOS), args.repeats, args.ops, **params)
+        report = {"meta": {"python": sys.version.split()[0], "platform": platform.platform(),
+                           "at": datetime.now().isoformat(), "params": dict(params, ops=args.ops, repeats=args.repeats)},
+                  "results": current}
+        for name, result in current.items():
+            print(f"{name:<24} {_format_time(result['per_op_s']):>12} per op")
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as file:
+                json.dump(report, file, indent=4)
+        baseline = None
+        if args.baseline:
+            with open(args.baseline, encoding="utf-8") as file:
+                baseline = json.load(file)["results"]
+
+    if baseline is None:
+        return
+    rows = compare(baseline, current, args.threshold)
+    print(f"\n{'scenario':<24} {'baseline':>12} {'current':>12} {'ratio':>7}")
+    for name, before, after, ratio, verdict in rows:
+        print(f"{name:<24} {_format_time(before):>12} {_format_time(after):>12} "
+              f"{'-' if ratio is None else f'{ratio:.2f}x':>7}  {verdict}")
+    if any(verdict == "REGRESSION" for *_, verdict in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import random
+from datetime import date, datetime, timedelta
+from services.periods import PeriodIndex
+from classes.user import User
+
+
+def synthetic_document(completions, households=10, members=5, habits=20, seed=0):
+    """Builds a deterministic data document with `completions` bonus claims."""
+    rng = random.Random(seed)
+    household_names = [f"household{h}" for h in range(households)]
+    usernames = {name: [f"{name}-user{m}" for m in range(members)] for name in household_names}
+    everyone = [user for users in usernames.values() for user in users]
+    habit_names = [f"habit{k}" for k in range(habits)]
+
+    data = {
+        "households": {
+            name: {"members": list(users), "points": {user: rng.randrange(1000) for user in users}}
+            for name, users in usernames.items()
+        },
+        "habits": [
+            {"name": name, "periodicity": "daily", "created_at": "2025-01-01T00:00:00", "points": 5, "is_bonus": False}
+            for name in habit_names
+        ],
+        "bonus_habits": [
+            {"name": f"bonus-{name}", "periodicity": "daily", "created_at": "2025-01-01T00:00:00", "points": 10, "is_bonus": True}
+            for name in habit_names
+        ],
+        "leaderboard": {"rankings": {}, "past_rankings": []},
+        "streaks": {user: {name: rng.randrange(60) for name in habit_names} for user in everyone},
+        "completed_habits": {},
+    }
+    for name, details in data["households"].items():
+        data["leaderboard"]["rankings"][name] = dict(sorted(details["points"].items(), key=lambda item: item[1], reverse=True))
+
+    day = date(2020, 1, 1)
+    claims = data["completed_habits"]
+    while completions > 0:
+        period = claims[day.isoformat()] = {}
+        for name in habit_names[:completions]:
+            period[f"bonus-{name}"] = rng.choice(everyone)
+        completions -= len(period)
+        day += timedelta(days=1)
+    return data
+
+
+def synthetic_household_data(households=20, members=5, habits=10, years=2, rate=0.5, seed=0, end=date(2025, 12, 31)):
+    """A deterministic data document as `years` of use up to `end` would leave it.
+
+    Every member completes each daily habit on a given day, and each weekly
+    habit (every fourth one) on its weekday, with probability `rate`. Each
+    bonus habit is claimed by a random member on a day with the same
+    probability. Streaks (through User, as DataManager does), points with
+    their streak bonuses, rankings and the period index are kept the way
+    DataManager keeps them. Returns (data, records), records being the
+    (username, habit_name, datetime) completions in time order.
+    """
+    rng = random.Random(seed)
+    household_names = [f"household{h}" for h in range(households)]
+    usernames = {name: [f"{name}-user{m}" for m in range(members)] for name in household_names}
+    everyone = [(user, name) for name, users in usernames.items() for user in users]
+    regular = [{"name": f"habit{k}", "periodicity": "weekly" if k % 4 == 3 else "daily",
+                "created_at": "2020-01-01T00:00:00", "points": 5 + 5 * (k % 3), "is_bonus": False} for k in range(habits)]
+    bonus = [{"name": f"bonus{k}", "periodicity": "daily", "created_at": "2020-01-01T00:00:00", "points": 10, "is_bonus": True}
+             for k in range(max(habits // 5, 1))]
+
+    data = {
+        "households": {name: {"members": list(users), "points": {user: 0 for user in users}} for name, users in usernames.items()},
+        "habits": regular,
+        "bonus_habits": bonus,
+        "leaderboard": {"rankings": {}, "past_rankings": []},
+        "streaks": {user: {} for user, _ in everyone},
+        "streak_state": {user: {} for user, _ in everyone},
+        "completed_habits": {},
+    }
+    periods = PeriodIndex(data)
+    members = {}
+    for user, household in everyone:
+        members[user] = User(user, household)
+        members[user].streaks = data["streaks"][user]
+        members[user].streak_state = data["streak_state"][user]
+    records = []
+    day = end - timedelta(days=365 * years - 1)
+    while day <= end:
+        when = datetime(day.year, day.month, day.day, 8)
+        for user, household in everyone:
+            points = data["households"][household]["points"]
+            for k, habit in enumerate(regular):
+                if habit["periodicity"] == "weekly" and day.weekday() != k % 7:
+                    continue
+                if rng.random() >= rate:
+                    continue
+                members[user].advance_streak(habit["name"], day.toordinal(), habit["periodicity"])
+                periods.add(when, habit["name"], user)
+                points[user] += habit["points"] + members[user].get_bonus_points(habit["name"])
+                records.append((user, habit["name"], when))
+        for habit in bonus:
+            if rng.random() < rate:
+                user, household = rng.choice(everyone)
+                data["completed_habits"].setdefault(day.isoformat(), {})[habit["name"]] = user
+                periods.add(when, habit["name"], user)
+                data["households"][household]["points"][user] += habit["points"]
+                records.append((user, habit["name"], when))
+        day += timedelta(days=1)
+
+    for name, details in data["households"].items():
+        data["leaderboard"]["rankings"][name] = dict(details["points"])
+    return data, records
@@ -2,14 +2,14 @@ import json
 import logging
 from datetime import datetime, timedelta
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-
 
 class Habit:
-    def __init__(self, name, periodicity, points, is_bonus=False):
+    __slots__ = ("name", "periodicity", "created_at", "points", "is_bonus")
+
+    def __init__(self, name, periodicity, points, is_bonus=False, created_at=None):
         self.name = name
         self.periodicity = periodicity  
-        self.created_at = datetime.now().isoformat()
+        self.created_at = created_at or datetime.now().isoformat()
         self.points = points
         self.is_bonus = is_bonus
 
@@ -46,6 +46,6 @@ class Habit:
 
     @classmethod
     def from_dict(cls, data):
-        return cls(data["name"], data["periodicity"], data["points"], data["is_bonus"])
+        return cls(data["name"], data["periodicity"], data["points"], data.get("is_bonus", False), data.get("created_at"))
 
 
@@ -1,4 +1,6 @@
 class Household:
+    __slots__ = ("name", "members")
+
     def __init__(self, name):
         self.name = name
         self.members = []
@@ -15,3 +17,12 @@ class Household:
             'name': self.name,
             'members': [member.to_dict() for member in self.members]
         }
+
+    @classmethod
+    def from_dict(cls, data):
+        from classes.user import User
+        household = cls(data["name"])
+        household.members = [User.from_dict(member) for member in data["members"]]
+        for member in household.members:
+            member.household = household
+        return household
@@ -1,72 +1,166 @@
 import json
 import logging
-from datetime import datetime, timedelta
-
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+from array import array
+from bisect import insort
+from datetime import date, datetime, timedelta
+from services.metrics import timed
 
 class User:
+    """A household member with their points, streaks and completion history.
+
+    Completion dates are kept per habit as an array('i') of day ordinals
+    (date.toordinal()), 4 bytes per completion instead of a date object each,
+    and they serialize as plain integers.
+    """
+
+    __slots__ = ("username", "household", "habits_completed", "streaks", "streak_state", "bonus_claimed", "points")
+
     def __init__(self, username, household, points=0):
         self.username = username
         self.household = household
-        self.habits_completed = {}  
+        self.habits_completed = {}  # habit -> array('i') of day ordinals, oldest first
         self.streaks = {}  
+        self.streak_state = {}  # habit -> current run, last period, longest run, bonus of the latest completion
         self.bonus_claimed = {}  
         self.points = points
 
     def has_completed_today(self, habit_name):
-        today = datetime.now().date()
-        return habit_name in self.habits_completed and self.habits_completed[habit_name][-1] == today
+        completions = self.habits_completed.get(habit_name)
+        return bool(completions) and completions[-1] == datetime.now().date().toordinal()
+
+    def completion_dates(self, habit_name):
+        """The habit's completion dates, oldest first."""
+        return [date.fromordinal(ordinal) for ordinal in self.habits_completed.get(habit_name, ())]
 
     def track_completion(self, habit_name, date, periodicity):
         if habit_name not in self.habits_completed:
-            self.habits_completed[habit_name] = []
+            self.habits_completed[habit_name] = array("i")
             self.streaks[habit_name] = 0
 
-        self.habits_completed[habit_name].append(date)
+        completions = self.habits_completed[habit_name]
+        ordinal = date.toordinal()
+        if completions and ordinal < completions[-1]:
+            # back-filled completion: keep the history ordered and recompute
+            insort(completions, ordinal)
+            self.rebuild_streak(habit_name, periodicity)
+            return
+        completions.append(ordinal)
         self.update_streak(habit_name, periodicity)
 
+    @staticmethod
+    def period_of(date, periodicity):
+        """Consecutive integers for consecutive days (daily) or Monday-based weeks (weekly)."""
+        return User._period(date.toordinal(), periodicity)
+
+    @staticmethod
+    def _period(ordinal, periodicity):
+        return ordinal if periodicity == 'daily' else (ordinal - 1) // 7
+
+    @timed("streaks.update")
     def update_streak(self, habit_name, periodicity):
-        completions = self.habits_completed[habit_name]
-        if len(completions) < 2:
-            self.streaks[habit_name] = 1
-            return
+        """Folds the latest completion into the habit's streak state in O(1)."""
+        self.advance_streak(habit_name, self.habits_completed[habit_name][-1], periodicity)
+        return self.streak_state[habit_name]
 
-        streak = 1
-        for i in range(1, len(completions)):
-            delta = (completions[i] - completions[i - 1]).days
-            if (periodicity == 'daily' and delta == 1) or (periodicity == 'weekly' and delta == 7):
-                streak += 1
-            else:
-                streak = 1 
-            if streak % 7 == 0:
-                self.points += 5  
+    def advance_streak(self, habit_name, ordinal, periodicity):
+        """Folds a completion on day `ordinal` into the habit's streak state in O(1).
 
-        self.streaks[habit_name] = streak
+        Returns False and leaves the state alone for a completion before the
+        latest period; such a back-filled one needs rebuild_streak().
+        """
+        state = self.streak_state.setdefault(habit_name, self.empty_streak())
+        period = self._period(ordinal, periodicity)
+        if state["last_period"] is not None and period < state["last_period"]:
+            state["bonus"] = 0
+            return False
+        self._advance_streak(state, period)
+        self.streaks[habit_name] = state["current"]
+        return True
+
+    @timed("streaks.rebuild")
+    def rebuild_streak(self, habit_name, periodicity, ordinals=None):
+        """Recomputes a habit's streak state from its completion day ordinals (default: habits_completed).
+
+        Nothing is awarded for the rebuild, and a streak that expired stays
+        expired unless the history holds a completion after it.
+        """
+        previous = self.streak_state.get(habit_name)
+        state = self.empty_streak()
+        for ordinal in sorted(self.habits_completed.get(habit_name, ()) if ordinals is None else ordinals):
+            self._advance_streak(state, self._period(ordinal, periodicity))
+        state["bonus"] = 0
+        if previous and previous["current"] == 0 and previous["last_period"] == state["last_period"]:
+            state["current"] = 0
+        self.streak_state[habit_name] = state
+        self.streaks[habit_name] = state["current"]
+        return state
+
+    def expire_streak(self, habit_name, period):
+        """Ends the habit's streak if it missed the period before `period`; returns whether it did."""
+        state = self.streak_state.get(habit_name)
+        if not state or not state["current"] or (state["last_period"] is not None and state["last_period"] >= period - 1):
+            return False
+        state["current"] = state["bonus"] = 0
+        self.streaks[habit_name] = 0
+        return True
+
+    @staticmethod
+    def fold_streak(state, ordinals, periodicity):
+        """Advances a streak state by completions on these day ordinals, oldest first; yields the bonus each earned."""
+        for ordinal in ordinals:
+            User._advance_streak(state, User._period(ordinal, periodicity))
+            yield state["bonus"]
+
+    @staticmethod
+    def empty_streak():
+        return {"current": 0, "last_period": None, "longest": 0, "bonus": 0}
+
+    @staticmethod
+    def _advance_streak(state, period):
+        state["bonus"] = 0
+        if state["last_period"] == period:
+            return
+        if state["last_period"] is not None and period == state["last_period"] + 1:
+            state["current"] += 1
+        else:
+            state["current"] = 1
+        state["last_period"] = period
+        state["longest"] = max(state["longest"], state["current"])
+        if state["current"] % 7 == 0:
+            state["bonus"] = 5
 
     def get_bonus_points(self, habit_name):
-        return 5 if self.streaks.get(habit_name, 0) % 7 == 0 else 0
+        """+5 when the latest completion extended the streak to a multiple of 7 periods."""
+        return self.streak_state.get(habit_name, {}).get("bonus", 0)
+
+    def add_points(self, points):
+        self.points += points
 
     def to_dict(self):
         return {
             'username': self.username,
             'household': self.household.name if hasattr(self.household, 'name') else str(self.household),
-            'habits_completed': {
-                habit: [date.strftime("%Y-%m-%d") for date in dates]
-                for habit, dates in self.habits_completed.items()
-            },
+            'habits_completed': {habit: ordinals.tolist() for habit, ordinals in self.habits_completed.items()},
             'streaks': self.streaks,
+            'streak_state': self.streak_state,
             'bonus_claimed': self.bonus_claimed,
             'points': self.points
         }
 
     @classmethod
     def from_dict(cls, data):
-        user = cls(data["username"])
-        user.habits_completed = {
-            habit: [datetime.strptime(date, "%Y-%m-%d").date() for date in dates]
-            for habit, dates in data["habits_completed"].items()
-        }
+        user = cls(data["username"], data.get("household"))
+        user.habits_completed = {habit: cls._ordinals(dates) for habit, dates in data["habits_completed"].items()}
         user.streaks = data["streaks"]
+        user.streak_state = data.get("streak_state", {})
         user.bonus_claimed = data["bonus_claimed"]
         user.points = data["points"]
-        return user
\ No newline at end of file
+        return user
+
+    @staticmethod
+    def _ordinals(dates):
+        """array('i') from day ordinals, or from "%Y-%m-%d" strings written by older versions."""
+        try:
+            return array("i", dates)
+        except TypeError:
+            return array("i", (date.fromisoformat(day).toordinal() for day in dates))
\ No newline at end of file
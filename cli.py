@@ -1,24 +1,90 @@
 import click
 import logging
-from services.data_manager import DataManager
-from services.leaderboard import Leaderboard
-from classes.user import User 
-from classes.habit import Habit
 
+# Services and models are imported inside the commands that use them, and the
+# store is only opened once a command needs it, so --help and commands that
+# never touch the data do not pay for loading it.
 
-logging.basicConfig(level=logging.INFO)
-leaderboard = Leaderboard()
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# commands that need the store to themselves; every other command is forwarded
+# to a running `serve` or `serve-http` process, which holds the store lock while it runs
+EXCLUSIVE = {"clear-data", "migrate-store", "compact", "bulk-complete", "convert-store", "serve", "serve-http"}
+
+
+def _leaderboard():
+    from services.leaderboard import Leaderboard
+    return Leaderboard()
 
 @click.group()
-def cli():
+@click.option("--profile", is_flag=True, help="Print a per-phase timing breakdown and log it to the metrics file.")
+@click.option("--profile-output", type=click.Path(dir_okay=False), help="With --profile, also write cProfile stats (pstats) here.")
+@click.option("--metrics-file", type=click.Path(dir_okay=False),
+              help="JSON Lines file --profile appends to (default: <data file>.metrics.jsonl or HOMESTREAK_METRICS).")
+@click.pass_context
+def cli(ctx, profile, profile_output, metrics_file):
     """Habit Tracker CLI"""
-    pass
+    if profile:
+        _start_profile(ctx, profile_output, metrics_file)
+    if ctx.invoked_subcommand in EXCLUSIVE:
+        _refuse_while_serving(ctx.invoked_subcommand)
+
+
+def _refuse_while_serving(command):
+    """Fails right away instead of timing out on the store lock a running daemon holds."""
+    from services.daemon import Client, DaemonUnavailable
+    from services.http_api import HttpClient
+    client = Client()
+    try:
+        client.call("ping")
+    except DaemonUnavailable:
+        api = HttpClient()
+        if not api.serving():
+            return
+        raise click.ClickException(f"An HTTP API is serving this data on {api.url}; "
+                                   f"stop it before running '{command}', or use the routes it serves.")
+    raise click.ClickException(f"A daemon is serving this data on {client.socket_path}; "
+                               f"stop it before running '{command}', or use the commands it serves.")
+
+
+def _start_profile(ctx, profile_output, metrics_file):
+    """Enables instrumentation (and cProfile) until the command finishes, then reports."""
+    import os
+    import time
+    from services.metrics import default_metrics_path, metrics
+    profiler = None
+    if profile_output:
+        import cProfile
+        profiler = cProfile.Profile()
+    metrics.enable()
+    started = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+
+    def report():
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(profile_output)
+        wall = time.perf_counter() - started
+        metrics.disable()
+        click.echo(f"Profile of {ctx.invoked_subcommand} ({wall * 1000:.1f} ms):", err=True)
+        for line in metrics.report(wall):
+            click.echo(f"  {line}", err=True)
+        path = metrics_file or default_metrics_path(os.environ.get("HOMESTREAK_DATA", "data.json"))
+        metrics.append(path, command=ctx.invoked_subcommand, seconds=wall)
+        if profiler is not None:
+            click.echo(f"cProfile stats written to {profile_output} (python -m pstats {profile_output}).", err=True)
+
+    ctx.call_on_close(report)
 
 @click.command()
 @click.argument("household_name")
 def create_household(household_name):
     """Create a new household."""
-    DataManager.create_household(household_name)
+    handled, _ = _via_daemon("create_household", household_name=household_name)
+    if not handled:
+        from services.data_manager import DataManager
+        DataManager.create_household(household_name)
     click.echo(f"Household '{household_name}' created.")
 
 @click.command()
@@ -26,9 +92,12 @@ def create_household(household_name):
 @click.argument("household_name")
 def add_user(username, household_name):
     """Add a user to a household."""
-    from classes.user import User  
-    user = User(username, household_name)
-    DataManager.save_user(user)
+    handled, _ = _via_daemon("add_user", username=username, household_name=household_name)
+    if not handled:
+        from classes.user import User
+        from services.data_manager import DataManager
+        user = User(username, household_name)
+        DataManager.save_user(user)
     click.echo(f"User '{username}' added to household '{household_name}'.")
 
 @click.command()
@@ -37,8 +106,12 @@ def add_user(username, household_name):
 @click.argument("points", type=int)
 def add_habit(name, periodicity, points):
     """Add a habit with periodicity and points."""
-    habit = Habit(name, periodicity, points)
-    DataManager.save_habit(habit)
+    handled, _ = _via_daemon("add_habit", name=name, periodicity=periodicity, points=points)
+    if not handled:
+        from classes.habit import Habit
+        from services.data_manager import DataManager
+        habit = Habit(name, periodicity, points)
+        DataManager.save_habit(habit)
     click.echo(f"Habit '{name}' added as a {periodicity} habit worth {points} points.")
 
 
@@ -48,55 +121,94 @@ def add_habit(name, periodicity, points):
 @click.argument("points", type=int)
 def add_bonus_habit(name, periodicity, points):
     """Add a bonus habit with extra points."""
-    habit = Habit(name, periodicity, points, is_bonus=True)
-    DataManager.save_bonus_habit(habit)
+    handled, _ = _via_daemon("add_habit", name=name, periodicity=periodicity, points=points, is_bonus=True)
+    if not handled:
+        from classes.habit import Habit
+        from services.data_manager import DataManager
+        habit = Habit(name, periodicity, points, is_bonus=True)
+        DataManager.save_bonus_habit(habit)
     click.echo(f"Bonus Habit '{name}' added as a {periodicity} bonus habit worth {points} points!")
 
 
+def _via_daemon(op, **args):
+    """Forwards a command to a running `serve` or `serve-http` process. Returns (handled, result)."""
+    from services.daemon import Client, DaemonUnavailable
+    from services.http_api import ApiUnavailable, HttpClient
+    try:
+        return True, Client().call(op, **args)
+    except DaemonUnavailable:
+        pass
+    api = HttpClient()
+    if op not in HttpClient.OPS:
+        if api.serving():
+            raise click.ClickException(f"An HTTP API is serving this data on {api.url} and has no route for this "
+                                       f"command; stop it first.")
+        return False, None
+    try:
+        return True, api.call(op, **args)
+    except ApiUnavailable:
+        return False, None
+
 @click.command()
 @click.argument("username")
 @click.argument("habit_name")
 def complete_habit(username, habit_name):
     """Mark a habit as completed and update streaks. Bonus habits are automatically claimed."""
-    
-    habit = DataManager.get_habit(habit_name)  
-    if not habit:
-        click.echo(f"Habit '{habit_name}' not found.")
-        return
+    handled, result = _via_daemon("complete_habit", username=username, habit_name=habit_name)
+    if handled:
+        found, is_bonus, success = result["found"], result["is_bonus"], result["success"]
+    else:
+        from services.data_manager import DataManager
+        with DataManager.session(username, habit_name) as session:
+            habit, success = DataManager.record_completion(username, habit_name, session=session)
+        found, is_bonus = habit is not None, bool(habit and habit["is_bonus"])
 
-    if habit["is_bonus"]:
-        success = DataManager.claim_bonus_habit(username, habit_name)
+    if not found:
+        click.echo(f"Habit '{habit_name}' not found.")
+    elif is_bonus:
         if success:
             click.echo(f"Bonus Habit '{habit_name}' claimed by '{username}'.")
         else:
             click.echo(f"Bonus Habit '{habit_name}' is already taken or unavailable for this period.")
     else:
-        success = DataManager.complete_habit(username, habit_name)
         if success:
             click.echo(f"'{habit_name}' completed by '{username}'. Points updated!")
         else:
             click.echo(f"'{habit_name}' could not be completed.")
-   
+
 @click.command()
 def list_habits():
     """List all habits in the system."""
-    habits = DataManager.load_habits()  
+    handled, habits = _via_daemon("list_habits")
+    if not handled:
+        from services.data_manager import DataManager
+        habits = DataManager.load_habits()  
     if not habits:
         click.echo("No habits found.")
         return
+    handled, counts = _via_daemon("completion_counts")
+    if not handled:
+        from services.data_manager import DataManager
+        counts = DataManager.completion_counts()
     click.echo("Tracked Habits:")
     for habit in habits:
         click.echo(f"- {habit['name']} ({habit['periodicity']}, {habit['points']} points)")
-        if habit['completions']:  
-            click.echo(f"  Completions: {', '.join(habit['completions'])}")
+        if counts.get(habit['name']):
+            click.echo(f"  Completions: {counts[habit['name']]}")
         else:
             click.echo(f"  No completions yet.")
 
 @click.command()
 @click.argument("household_name")
-def view_leaderboard(household_name):
+@click.option("--top", type=int, help="Only show the best N users.")
+def view_leaderboard(household_name, top):
     """View the leaderboard rankings for a household."""
-    rankings = leaderboard.get_sorted_rankings(household_name)
+    handled, result = _via_daemon("view_leaderboard", household_name=household_name, top=top)
+    if handled:
+        rankings = dict(result)
+    else:
+        leaderboard = _leaderboard()
+        rankings = leaderboard.get_sorted_rankings(household_name) if top is None else dict(leaderboard.get_top(household_name, top))
     if not rankings:
         click.echo(f"No rankings available for household '{household_name}'.")
     else:
@@ -104,17 +216,125 @@ def view_leaderboard(household_name):
         for rank, (user, points) in enumerate(rankings.items(), start=1):
             click.echo(f"{rank}. {user}: {points} points")
 
+@click.command()
+@click.option("--top", type=int, default=10, show_default=True, help="Number of users to show.")
+def view_global_leaderboard(top):
+    """View the leaderboard across all households."""
+    handled, rankings = _via_daemon("view_global_leaderboard", top=top)
+    if not handled:
+        from services.leaderboard import Leaderboard
+        rankings = Leaderboard.snapshot(top)
+    if not rankings:
+        click.echo("No rankings available.")
+        return
+    click.echo("Global leaderboard:")
+    for rank, (user, household, points) in enumerate(rankings, start=1):
+        click.echo(f"{rank}. {user} ({household}): {points} points")
+
+@click.command()
+@click.argument("username")
+def view_user_stats(username):
+    """Show a user's points, streaks and bonus claims."""
+    handled, stats = _via_daemon("user_stats", username=username)
+    if not handled:
+        from services.data_manager import DataManager
+        stats = DataManager.user_stats(username)
+    if stats is None:
+        click.echo(f"User '{username}' not found.")
+        return
+    click.echo(f"{username} ({stats['household']}): {stats['points']} points, {stats['bonus_claims']} bonus claims")
+    for habit, streak in sorted(stats["streaks"].items(), key=lambda item: item[1], reverse=True):
+        longest = stats.get("longest_streaks", {}).get(habit, streak)
+        click.echo(f"- {habit}: {streak} streak (longest {longest}), {stats.get('completions', {}).get(habit, 0)} completions")
+
+@click.command()
+@click.argument("username")
+def view_open_habits(username):
+    """List the habits a user can still complete today or this week."""
+    handled, still_open = _via_daemon("open_habits", username=username)
+    if not handled:
+        from services.data_manager import DataManager
+        still_open = DataManager.open_habits(username)
+    if not still_open:
+        click.echo(f"Nothing left to do for '{username}' this period.")
+        return
+    click.echo(f"Still open for '{username}':")
+    for name in still_open:
+        click.echo(f"- {name}")
+
+@click.command()
+@click.argument("username")
+@click.option("--habit", "habit_name", help="Only this habit.")
+@click.option("--start", type=click.DateTime(["%Y-%m-%d"]), help="First day to show.")
+@click.option("--end", type=click.DateTime(["%Y-%m-%d"]), help="Last day to show.")
+def history(username, habit_name, start, end):
+    """Show when a user completed their habits."""
+    handled, completions = _via_daemon("history", username=username, habit_name=habit_name,
+                                       start=start and start.date().isoformat(), end=end and end.date().isoformat())
+    if handled:
+        from datetime import datetime
+        completions = {name: [datetime.fromisoformat(when) for when in times] for name, times in completions.items()}
+    else:
+        from services.data_manager import DataManager
+        completions = DataManager.completion_history(username, habit_name, start and start.date(), end and end.date())
+    if not completions:
+        click.echo(f"No completions found for '{username}'.")
+        return
+    for name, times in sorted(completions.items()):
+        click.echo(f"- {name}: {len(times)} completions")
+        for when in times:
+            click.echo(f"  {when:%Y-%m-%d %H:%M}")
+
+@click.command()
+@click.option("--month", help="Month to report on as MM-YYYY (default: this month).")
+@click.option("--workers", type=int, help="Worker processes (default: one per core).")
+@click.option("--format", "formats", multiple=True, type=click.Choice(["json", "csv", "html"]), help="Output format; repeat for several (default: all).")
+@click.option("--output", default="reports", show_default=True, help="Directory to write the reports to.")
+def report(month, workers, formats, output):
+    """Write the monthly report of every household."""
+    from datetime import datetime
+    from services.report import FORMATS, Reports, month_range
+    month = month or datetime.now().strftime("%m-%Y")
+    try:
+        month_range(month)
+    except ValueError:
+        click.echo(f"Invalid month '{month}'; expected MM-YYYY.")
+        return
+    handled, reports = _via_daemon("report", month=month, workers=workers)
+    if not handled:
+        reports = Reports.generate(month, workers=workers)
+    for path in Reports.write(reports, output, formats or FORMATS, month):
+        click.echo(f"Wrote {path}")
+
 @click.command()
 def reset_monthly_scores():
     """Reset all users' monthly scores and track top performer."""
-    leaderboard.reset_monthly()
-    DataManager.reset_monthly_scores()
+    handled, _ = _via_daemon("reset_monthly_scores")
+    if not handled:
+        from services.data_manager import DataManager
+        from services.leaderboard import Leaderboard
+        with DataManager.session() as session:
+            Leaderboard(session=session).reset_monthly()
+            DataManager.reset_monthly_scores(session=session)
     click.echo("Monthly scores reset. Leaderboard archived.")
 
+@click.command()
+@click.option("--now", type=click.DateTime(), help="Roll over as of this time instead of the current time.")
+def rollover(now):
+    """Expire missed streaks and archive finished months that are due (safe to run from cron)."""
+    handled, stats = _via_daemon("rollover", now=now.isoformat() if now else None)
+    if not handled:
+        from services.rollover import Rollover
+        stats = Rollover.run(now)
+    click.echo(f"Rolled over {stats['habits']} habits and {stats['households']} households; "
+               f"{stats['expired_streaks']} streaks expired.")
+
 @click.command()
 def view_top_performers():
     """View the top performers of past months."""
-    top_performers = leaderboard.get_top_performers()
+    handled, top_performers = _via_daemon("top_performers")
+    if not handled:
+        top_performers = _leaderboard().get_top_performers()
     if not top_performers:
         click.echo("No top performers recorded yet.")
     else:
@@ -125,7 +345,9 @@ def view_top_performers():
 @click.command()
 def view_past_rankings():
     """View past leaderboard rankings."""
-    past_rankings = leaderboard.get_past_rankings()
+    handled, past_rankings = _via_daemon("past_rankings")
+    if not handled:
+        past_rankings = _leaderboard().get_past_rankings()
     if not past_rankings:
         click.echo("No past rankings recorded.")
     else:
@@ -139,22 +361,127 @@ def view_past_rankings():
 @click.command()
 def clear_data():
     """Clear all data in the system (reset data.json)."""
+    from services.data_manager import DataManager
     DataManager.clear_data()
     click.echo("All data has been cleared.")
 
+@click.command()
+@click.argument("source")
+@click.argument("target")
+def migrate_store(source, target):
+    """Import an existing store (e.g. data.json) into another backend (e.g. data.db)."""
+    from services.data_manager import DataManager
+    try:
+        DataManager.migrate_store(source, target)
+    except FileNotFoundError:
+        click.echo(f"Store '{source}' not found.")
+        return
+    click.echo(f"Imported '{source}' into '{target}'. Set HOMESTREAK_DATA={target} to use it.")
+
+@click.command()
+def compact():
+    """Fold the completion journal into a new data snapshot."""
+    from services.data_manager import DataManager
+    folded = DataManager.compact()
+    click.echo(f"Compacted {folded} journal entries into {DataManager.FILE_PATH}.")
+
+@click.command()
+@click.argument("records", type=click.File("r", encoding="utf-8"))
+@click.option("--format", "fmt", type=click.Choice(["csv", "jsonl"]), help="Record format (guessed from the file name by default).")
+def bulk_complete(records, fmt):
+    """Backfill completions from a CSV or JSON Lines file (username, habit, timestamp)."""
+    from services.data_manager import DataManager
+    from services.importer import detect_format, read_records
+    fmt = fmt or detect_format(records.name)
+    stats = DataManager.complete_many(read_records(records, fmt))
+    click.echo(f"Applied {stats['applied']} of {stats['records']} completions "
+               f"in {stats['seconds']:.2f}s ({stats['per_second']:.0f} records/s).")
+
+@click.command()
+@click.argument("fmt", metavar="FORMAT", type=click.Choice(["json", "compact", "binary"]))
+def convert_store(fmt):
+    """Rewrite the data file as indented JSON, compact JSON or a binary snapshot."""
+    from services.data_manager import DataManager
+    previous = DataManager.convert_store(fmt)
+    click.echo(f"Converted {DataManager.FILE_PATH} from {previous} to {fmt}.")
+
+@click.command()
+@click.option("--socket", "socket_path", help="Unix socket to listen on (default: <data file>.sock).")
+@click.option("--flush-interval", type=float, default=2.0, show_default=True, help="Seconds between write-behind flushes.")
+@click.option("--group-commit-ms", type=float, help="Acknowledge writes only once flushed, sharing one flush per window.")
+def serve(socket_path, flush_interval, group_commit_ms):
+    """Keep the data in memory and serve commands over a local socket."""
+    import signal
+    from services.daemon import Daemon
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+
+    # let `kill` stop the daemon as cleanly as Ctrl+C does
+    signal.signal(signal.SIGTERM, stop)
+    daemon = Daemon(socket_path, flush_interval, None if group_commit_ms is None else group_commit_ms / 1000)
+    click.echo(f"Listening on {daemon.socket_path}. Press Ctrl+C to stop.")
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    click.echo("Daemon stopped; pending changes flushed.")
+
+@click.command()
+@click.option("--host", default="127.0.0.1", show_default=True, help="Address to listen on.")
+@click.option("--port", type=int, default=8765, show_default=True)
+@click.option("--flush-interval", type=float, default=1.0, show_default=True, help="Seconds between batched flushes.")
+def serve_http(host, port, flush_interval):
+    """Keep the data in memory and serve it over a local HTTP API."""
+    import asyncio
+    import signal
+    from services.http_api import HttpApi
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, stop)
+    api = HttpApi(host, port, flush_interval)
+    click.echo(f"Listening on http://{host}:{port}. Press Ctrl+C to stop.")
+    try:
+        asyncio.run(api.serve())
+    except KeyboardInterrupt:
+        pass
+    click.echo("Server stopped; pending changes flushed.")
+
 
 cli.add_command(create_household)
 cli.add_command(add_user)
 cli.add_command(add_habit)
 cli.add_command(complete_habit)
 cli.add_command(view_leaderboard)
+cli.add_command(view_global_leaderboard)
+cli.add_command(view_user_stats)
+cli.add_command(view_open_habits)
+cli.add_command(history)
+cli.add_command(report)
 cli.add_command(reset_monthly_scores)
+cli.add_command(rollover)
 cli.add_command(view_top_performers)
 cli.add_command(view_past_rankings)
 cli.add_command(clear_data)
 cli.add_command(list_habits)
 cli.add_command(add_bonus_habit)
+cli.add_command(migrate_store)
+cli.add_command(compact)
+cli.add_command(bulk_complete)
+cli.add_command(convert_store)
+cli.add_command(serve)
+cli.add_command(serve_http)
 
 if __name__ == "__main__":
-    cli()
+    try:
+        cli()
+    except Exception as e:
+        from services.locking import StoreLockTimeout
+        from services.storage import StorageError
+        if not isinstance(e, (StorageError, StoreLockTimeout)):
+            raise
+        click.echo(f"Error: {e}", err=True)
+        raise SystemExit(1)
 
@@ -0,0 +1,110 @@
+import heapq
+from itertools import repeat
+from services.history import day_of, from_timestamp
+from services.metrics import timed
+from classes.user import User
+
+TOP_K = 10
+
+
+def month_of(when):
+    """Month label as the leaderboard archive writes it, e.g. "03-2025"."""
+    return when.strftime("%m-%Y")
+
+
+def top_k(rankings, k=None):
+    """[username, household, points] of the k (default TOP_K) best scores in a {household: {username: points}} section."""
+    return [[username, household, -negated] for negated, username, household in heapq.nsmallest(
+        TOP_K if k is None else k, ((-points, username, household) for household, scores in rankings.items()
+                                    for username, points in scores.items()))]
+
+
+def _order(entry):
+    # the same order as the global Ranking: most points first, then by (username, household)
+    return -entry[2], entry[0], entry[1]
+
+
+class Aggregates:
+    """Totals maintained on every write, in the data's "aggregates" section.
+
+    - households: {household: sum of its members' points}
+    - monthly: {"MM-YYYY": {username: points earned that month}}
+    - habits: {habit: number of completions and claims}
+    - top: the TOP_K best [username, household, points] across all households
+    - top_performers: {"MM-YYYY": [username, points]} of archived months
+
+    Reads of these are dict lookups or a slice, without building the ranking
+    index or scanning households and history. Data written before the
+    section existed is seeded from the households, history and archive.
+    """
+
+    @timed("aggregates.build")
+    def __init__(self, data):
+        seed = "aggregates" not in data
+        self.values = data.setdefault("aggregates", {})
+        for name in ("households", "monthly", "habits", "top_performers"):
+            self.values.setdefault(name, {})
+        self.values.setdefault("top", [])
+        if seed:
+            self._seed(data)
+
+    def _seed(self, data):
+        for household, details in data.get("households", {}).items():
+            self.values["households"][household] = sum(details["points"].values())
+        points = {habit["name"]: habit["points"] for habit in data.get("habits", []) + data.get("bonus_habits", [])}
+        periodicities = {habit["name"]: habit["periodicity"] for habit in data.get("habits", [])}
+        for username, per_habit in data.get("history", {}).items():
+            for habit_name, timestamps in per_habit.items():
+                self.values["habits"][habit_name] = self.values["habits"].get(habit_name, 0) + len(timestamps)
+                # regular habits also earned their streak bonuses along the way
+                bonuses = repeat(0) if habit_name not in periodicities else User.fold_streak(
+                    User.empty_streak(), map(day_of, timestamps), periodicities[habit_name])
+                for timestamp, bonus in zip(timestamps, bonuses):
+                    self._earn(month_of(from_timestamp(timestamp)), username, points.get(habit_name, 0) + bonus)
+        for entry in data.get("leaderboard", {}).get("past_rankings", []):
+            if "top_user" in entry:
+                self.archive(entry["month"], entry["top_user"], entry["points"])
+        self.values["top"] = top_k(data.get("leaderboard", {}).get("rankings", {}))
+
+    def _earn(self, month, username, points):
+        earned = self.values["monthly"].setdefault(month, {})
+        earned[username] = earned.get(username, 0) + points
+
+    def completed(self, household, username, habit_name, points, when):
+        """Counts a completion or claim worth `points` made at `when`."""
+        totals = self.values["households"]
+        totals[household] = totals.get(household, 0) + points
+        self._earn(month_of(when), username, points)
+        self.values["habits"][habit_name] = self.values["habits"].get(habit_name, 0) + 1
+
+    def ranked(self, username, household, points, rankings):
+        """Keeps the global top in step with a user's new ranking points.
+
+        A user whose points went up can only push the last entry out. One who
+        dropped out of the top may leave a gap only the full ranking can fill,
+        so then the top is rebuilt from `rankings` (a RankingIndex).
+        """
+        top = self.values["top"]
+        index = next((i for i, entry in enumerate(top) if entry[0] == username and entry[1] == household), None)
+        if index is not None:
+            if points < top[index][2] and len(rankings.overall) > len(top):
+                self.rerank(rankings)
+                return
+            del top[index]
+        elif len(top) >= TOP_K and _order([username, household, points]) > _order(top[-1]):
+            return
+        top.append([username, household, points])
+        top.sort(key=_order)
+        del top[TOP_K:]
+
+    def rerank(self, rankings):
+        self.values["top"] = [[username, household, points] for (username, household), points in rankings.overall.top(TOP_K)]
+
+    def reset_household(self, household):
+        self.values["households"][household] = 0
+
+    def archive(self, month, username, points):
+        """Records the month's top performer, keeping the best if households archive separately."""
+        best = self.values["top_performers"].get(month)
+        if best is None or points > best[1]:
+            self.values["top_performers"][month] = [username, points]
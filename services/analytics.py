@@ -1,3 +1,14 @@
+from array import array
+from datetime import date, datetime
+from itertools import chain
+from services.storage import iter_section
+
+try:
+    import numpy as np
+except ImportError:  # only AnalyticsEngine needs it
+    np = None
+
+
 class Analytics:
     @staticmethod
     def get_all_users(tracker):
@@ -43,11 +54,8 @@ class Analytics:
         """
         Get a list of habits completed by a specific user.
         """
-        completed_habits = []
-        for habit in tracker.data.get('habits', []):
-            if 'completions' in habit and username in habit['completions']:
-                completed_habits.append(habit['name'])
-        return completed_habits
+        completed = tracker.data.get('history', {}).get(username, {})
+        return [habit['name'] for habit in tracker.data.get('habits', []) if completed.get(habit['name'])]
 
     @staticmethod
     def habit_statistics(tracker, habit_name):
@@ -59,9 +67,248 @@ class Analytics:
             return {
                 'name': habit['name'],
                 'periodicity': habit['periodicity'],
-                'completions': habit.get('completions', []),
+                'completions': {username: len(per_habit[habit_name])
+                                for username, per_habit in tracker.data.get('history', {}).items()
+                                if per_habit.get(habit_name)},
                 'streak': habit.get('streak', 0),
                 'bonus_points': habit.get('bonus_points', 0)
             }
         return None
 
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def _period_start(key):
+    """Day ordinal of a completed_habits period key ("%Y-%m-%d" or "%Y-%W")."""
+    try:
+        return datetime.strptime(key, "%Y-%m-%d").toordinal()
+    except ValueError:
+        return datetime.strptime(f"{key}-1", "%Y-%W-%w").toordinal()
+
+
+class AnalyticsEngine:
+    """Completion history as parallel NumPy arrays: user id, habit id, day ordinal and points.
+
+    Every statistic is computed for all users and habits at once with
+    vectorized operations (bincount, lexsort, run-length encoding) instead of
+    looping over Python dicts. Per-user results are arrays indexed like
+    self.users, per (user, habit) results are (users x habits) matrices.
+    Points are the habits' base points; streak bonuses are not included.
+    """
+
+    def __init__(self, users, habits, user_ids, habit_ids, days):
+        if np is None:
+            raise ImportError("The analytics engine needs numpy (pip install numpy).")
+        self.users = list(users)
+        self.habits = list(habits)
+        self.user_ids = np.asarray(user_ids, dtype=np.int64)
+        self.habit_ids = np.asarray(habit_ids, dtype=np.int64)
+        self.days = np.asarray(days, dtype=np.int64)
+        self.weekly_habit = np.array([h["periodicity"] == "weekly" for h in self.habits], dtype=bool)
+        self.habit_points = np.array([h["points"] for h in self.habits], dtype=np.int64)
+        self.points = self.habit_points[self.habit_ids]
+        # days for daily habits, Monday-based weeks for weekly ones
+        self.periods = np.where(self.weekly_habit[self.habit_ids], (self.days - 1) // 7, self.days)
+
+    @classmethod
+    def from_records(cls, records, habits):
+        """Builds the arrays from (username, habit_name, date or datetime) records; unknown habits are skipped."""
+        habits = list(habits)
+        habit_index = {}
+        for habit_id, habit in enumerate(habits):
+            habit_index.setdefault(habit["name"], habit_id)
+        users, user_index = [], {}
+        user_ids, habit_ids, days = array("q"), array("q"), array("q")
+        for username, habit_name, when in records:
+            habit_id = habit_index.get(habit_name)
+            if habit_id is None:
+                continue
+            user_id = user_index.get(username)
+            if user_id is None:
+                user_id = user_index[username] = len(users)
+                users.append(username)
+            user_ids.append(user_id)
+            habit_ids.append(habit_id)
+            days.append(when.toordinal())
+        return cls(users, habits, np.frombuffer(user_ids, dtype=np.int64),
+                   np.frombuffer(habit_ids, dtype=np.int64), np.frombuffer(days, dtype=np.int64))
+
+    @classmethod
+    def from_users(cls, users, habits):
+        """Builds the arrays from User objects; their array('i') histories are read without copying per completion."""
+        habits = [habit.to_dict() if hasattr(habit, "to_dict") else habit for habit in habits]
+        habit_index = {}
+        for habit_id, habit in enumerate(habits):
+            habit_index.setdefault(habit["name"], habit_id)
+        usernames, user_ids, habit_ids, days = [], [], [], []
+        for user_id, user in enumerate(users):
+            usernames.append(user.username)
+            for habit_name, ordinals in user.habits_completed.items():
+                habit_id = habit_index.get(habit_name)
+                if habit_id is None or not ordinals:
+                    continue
+                days.append(np.frombuffer(ordinals, dtype=np.intc))
+                user_ids.append(np.full(len(ordinals), user_id, dtype=np.int64))
+                habit_ids.append(np.full(len(ordinals), habit_id, dtype=np.int64))
+
+        def concatenate(parts):
+            return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+        return cls(usernames, habits, concatenate(user_ids), concatenate(habit_ids), concatenate(days))
+
+    @classmethod
+    def from_history(cls, data):
+        """Builds the arrays from the stored completion history (the "history" section)."""
+        habits = data.get("habits", []) + data.get("bonus_habits", [])
+        habit_index = {}
+        for habit_id, habit in enumerate(habits):
+            habit_index.setdefault(habit["name"], habit_id)
+        usernames, user_ids, habit_ids, days = [], [], [], []
+        for user_id, (username, per_habit) in enumerate((data.get("history") or {}).items()):
+            usernames.append(username)
+            for habit_name, timestamps in per_habit.items():
+                habit_id = habit_index.get(habit_name)
+                if habit_id is None or not timestamps:
+                    continue
+                days.append(np.array(timestamps, dtype=np.int64) // 86400 + _EPOCH_ORDINAL)
+                user_ids.append(np.full(len(timestamps), user_id, dtype=np.int64))
+                habit_ids.append(np.full(len(timestamps), habit_id, dtype=np.int64))
+
+        def concatenate(parts):
+            return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+        return cls(usernames, habits, concatenate(user_ids), concatenate(habit_ids), concatenate(days))
+
+    @classmethod
+    def from_data(cls, data, records=()):
+        """Bonus claims from a data document (or a LazyDocument, which streams them), plus extra records."""
+        claims = (
+            (username, habit_name, date.fromordinal(_period_start(period)))
+            for period, claimed in iter_section(data, "completed_habits")
+            for habit_name, username in claimed.items()
+        )
+        return cls.from_records(chain(claims, records), data.get("habits", []) + data.get("bonus_habits", []))
+
+    def __len__(self):
+        return len(self.days)
+
+    def between(self, start=None, end=None):
+        """The completions from start to end (dates, inclusive) as a new engine over the same users and habits."""
+        mask = np.ones(len(self), dtype=bool)
+        if start is not None:
+            mask &= self.days >= start.toordinal()
+        if end is not None:
+            mask &= self.days <= end.toordinal()
+        return AnalyticsEngine(self.users, self.habits, self.user_ids[mask], self.habit_ids[mask], self.days[mask])
+
+    def _pairs(self):
+        return self.user_ids * len(self.habits) + self.habit_ids
+
+    def _per_pair(self, values, weights=None):
+        shape = (len(self.users), len(self.habits))
+        return np.bincount(values, weights=weights, minlength=shape[0] * shape[1]).reshape(shape)
+
+    def completion_counts(self):
+        return self._per_pair(self._pairs())
+
+    def _distinct_periods(self):
+        """(pair, period) with duplicate completions in the same period removed, sorted by pair then period."""
+        pairs, periods = self._pairs(), self.periods
+        order = np.lexsort((periods, pairs))
+        pairs, periods = pairs[order], periods[order]
+        keep = np.ones(len(pairs), dtype=bool)
+        keep[1:] = (pairs[1:] != pairs[:-1]) | (periods[1:] != periods[:-1])
+        return pairs[keep], periods[keep]
+
+    def periods_in_range(self, start, end):
+        """Number of days (daily habits) or weeks (weekly habits) from start to end, per habit."""
+        start, end = start.toordinal(), end.toordinal()
+        return np.where(self.weekly_habit, (end - 1) // 7 - (start - 1) // 7 + 1, end - start + 1)
+
+    def completion_rates(self, start, end):
+        """Share of periods from start to end in which each user completed each habit."""
+        view = self.between(start, end)
+        pairs, _ = view._distinct_periods()
+        return view._per_pair(pairs) / self.periods_in_range(start, end)
+
+    def streaks(self, today=None):
+        """(current, longest) streak matrices, in consecutive periods.
+
+        A current streak counts only if its last period is this period or the
+        one before it, so a run that has been broken shows as 0.
+        """
+        shape = (len(self.users), len(self.habits))
+        current = np.zeros(shape[0] * shape[1], dtype=np.int64)
+        longest = np.zeros(shape[0] * shape[1], dtype=np.int64)
+        pairs, periods = self._distinct_periods()
+        if len(pairs) == 0:
+            return current.reshape(shape), longest.reshape(shape)
+
+        new_run = np.ones(len(pairs), dtype=bool)
+        new_run[1:] = (pairs[1:] != pairs[:-1]) | (periods[1:] != periods[:-1] + 1)
+        starts = np.flatnonzero(new_run)
+        ends = np.append(starts[1:], len(pairs)) - 1
+        lengths = ends - starts + 1
+        run_pairs = pairs[starts]
+        np.maximum.at(longest, run_pairs, lengths)
+
+        last = np.ones(len(starts), dtype=bool)
+        last[:-1] = run_pairs[1:] != run_pairs[:-1]
+        today = (today or date.today()).toordinal()
+        habit_ids = run_pairs[last] % len(self.habits)
+        this_period = np.where(self.weekly_habit[habit_ids], (today - 1) // 7, today)
+        alive = periods[ends[last]] >= this_period - 1
+        current[run_pairs[last][alive]] = lengths[last][alive]
+        return current.reshape(shape), longest.reshape(shape)
+
+    def points_over_time(self, freq="month"):
+        """(bucket labels, users x buckets points matrix) per "day", "week" (starting Monday) or "month"."""
+        if freq == "month":
+            buckets = (self.days - date(1970, 1, 1).toordinal()).astype("datetime64[D]").astype("datetime64[M]")
+        elif freq == "week":
+            buckets = (self.days - 1) // 7 * 7 + 1
+        elif freq == "day":
+            buckets = self.days
+        else:
+            raise ValueError(f"Unknown frequency '{freq}'.")
+        labels, inverse = np.unique(buckets, return_inverse=True)
+        totals = np.bincount(self.user_ids * len(labels) + inverse.ravel(), weights=self.points,
+                             minlength=len(self.users) * len(labels)).reshape(len(self.users), len(labels))
+        if freq == "month":
+            labels = [str(label) for label in labels]
+        else:
+            labels = [date.fromordinal(int(label)).isoformat() for label in labels]
+        return labels, totals.astype(np.int64)
+
+    def periodicity_breakdown(self):
+        """{"daily"|"weekly": (completions per user, points per user)}."""
+        weekly = self.weekly_habit[self.habit_ids]
+        breakdown = {}
+        for name, mask in (("daily", ~weekly), ("weekly", weekly)):
+            completions = np.bincount(self.user_ids[mask], minlength=len(self.users))
+            points = np.bincount(self.user_ids[mask], weights=self.points[mask], minlength=len(self.users))
+            breakdown[name] = (completions, points.astype(np.int64))
+        return breakdown
+
+    def report(self, start, end, today=None):
+        """Per-user summary for start..end (e.g. a month): completions, points, completion rate and streaks."""
+        view = self.between(start, end)
+        pairs, _ = view._distinct_periods()
+        completed_periods = view._per_pair(pairs).sum(axis=1)
+        possible = self.periods_in_range(start, end).sum()
+        current, longest = view.streaks(today or end)
+        breakdown = view.periodicity_breakdown()
+        completions = np.bincount(view.user_ids, minlength=len(self.users))
+        points = np.bincount(view.user_ids, weights=view.points, minlength=len(self.users))
+        return {
+            username: {
+                "completions": int(completions[u]),
+                "points": int(points[u]),
+                "completion_rate": float(completed_periods[u] / possible) if possible else 0.0,
+                "current_streak": int(current[u].max(initial=0)),
+                "longest_streak": int(longest[u].max(initial=0)),
+                "daily": int(breakdown["daily"][0][u]),
+                "weekly": int(breakdown["weekly"][0][u]),
+            }
+            for u, username in enumerate(self.users)
+            if completions[u]
+        }
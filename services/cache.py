@@ -0,0 +1,113 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+
+def _sizeof(value, seen=None):
+    """Rough deep size in bytes of a cached result (containers, strings, numbers, NumPy arrays)."""
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes + sys.getsizeof(value)
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_sizeof(k, seen) + _sizeof(v, seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(_sizeof(item, seen) for item in value)
+    return size
+
+
+class AnalyticsCache:
+    """LRU cache for analytics results, bounded by an approximate memory cap.
+
+    Entries belong to one store version; a lookup with a different version
+    (the store was changed by another process) drops everything. Changes made
+    in this process instead call invalidate() with the users and habits they
+    touched, which only drops the entries tagged with them. An entry tagged
+    with users=None or habits=None depends on all users or habits.
+
+    The bookkeeping is guarded by a lock, since the HTTP API commits (and
+    rebases the cache) on an executor thread while the event loop reads it.
+    Results are computed outside the lock.
+    """
+
+    MAX_BYTES = int(os.environ.get("HOMESTREAK_CACHE_MB", "32")) * 1024 * 1024
+
+    def __init__(self, max_bytes=None):
+        self.max_bytes = self.MAX_BYTES if max_bytes is None else max_bytes
+        self.entries = OrderedDict()  # key -> (value, size, users, habits)
+        self.version = None
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = 0
+        self.lock = threading.RLock()
+        # bumped by every invalidation, so a result computed meanwhile is not stored
+        self.generation = 0
+
+    def get(self, key, compute, version, users=None, habits=None):
+        """Returns the cached result for key, computing and storing it on a miss."""
+        with self.lock:
+            if version != self.version:
+                self.clear()
+                self.version = version
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            generation = self.generation
+
+        value = compute()
+        size = _sizeof(value)
+        with self.lock:
+            if size <= self.max_bytes and version == self.version and generation == self.generation:
+                self._store(key, value, size, users, habits)
+        return value
+
+    def _store(self, key, value, size, users, habits):
+        if key in self.entries:
+            self._drop(key)
+        self.entries[key] = (value, size, None if users is None else frozenset(users),
+                             None if habits is None else frozenset(habits))
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            self._drop(next(iter(self.entries)))
+            self.evictions += 1
+
+    def invalidate(self, users=None, habits=None):
+        """Drops the entries that depend on any of these users and habits (None means all of them)."""
+        with self.lock:
+            if users is None and habits is None:
+                self.clear()
+                return
+            self.generation += 1
+            users = None if users is None else set(users)
+            habits = None if habits is None else set(habits)
+            for key, (_, _, entry_users, entry_habits) in list(self.entries.items()):
+                if (users is None or entry_users is None or not entry_users.isdisjoint(users)) and \
+                        (habits is None or entry_habits is None or not entry_habits.isdisjoint(habits)):
+                    self._drop(key)
+
+    def rebase(self, old_version, new_version):
+        """Adopts the store version written by this process, keeping entries that are still valid."""
+        with self.lock:
+            if self.version == old_version:
+                self.version = new_version
+
+    def clear(self):
+        with self.lock:
+            self.generation += 1
+            self.entries.clear()
+            self.bytes = 0
+
+    def _drop(self, key):
+        self.bytes -= self.entries.pop(key)[1]
+
+    def stats(self):
+        with self.lock:
+            return {"entries": len(self.entries), "bytes": self.bytes, "hits": self.hits,
+                    "misses": self.misses, "evictions": self.evictions}
@@ -0,0 +1,242 @@
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+from datetime import date, datetime
+from services.data_manager import DataManager
+from services.group_commit import GroupCommit
+from services.leaderboard import Leaderboard
+from services.rollover import Rollover
+from classes.habit import Habit
+from classes.user import User
+
+
+class DaemonUnavailable(Exception):
+    """Raised by the client when no daemon is listening on the socket."""
+
+
+def default_socket_path():
+    return os.environ.get("HOMESTREAK_SOCKET", f"{DataManager.FILE_PATH}.sock")
+
+
+class Daemon:
+    """Keeps one session open and serves commands over a Unix domain socket.
+
+    Requests and responses are single JSON lines. Mutations are applied to the
+    in-memory data under a mutex and flushed to the store by a background
+    thread every flush_interval seconds (write-behind), and once more on
+    shutdown. The session holds the store lock for the daemon's lifetime, so
+    other processes must go through the socket while it runs: every CLI
+    command that works on a session has an operation here, and the ones that
+    need the store to themselves (see cli.EXCLUSIVE) refuse to start.
+
+    With group_commit (a window in seconds) writes are acknowledged only once
+    they are on disk instead: concurrent writes within the window share one
+    flush (see GroupCommit).
+    """
+
+    WRITES = {"complete_habit", "rollover", "create_household", "add_user", "add_habit", "reset_monthly_scores"}
+
+    def __init__(self, socket_path=None, flush_interval=2.0, group_commit=None):
+        self.socket_path = socket_path or default_socket_path()
+        self.flush_interval = flush_interval
+        self.group_commit = group_commit
+        self.group = None
+        self.session = None
+        self.mutex = threading.Lock()
+        self.stopped = threading.Event()
+        self.closed = threading.Event()
+        self.server = None
+        self.ops = {
+            "ping": self.ping,
+            "create_household": self.create_household,
+            "add_user": self.add_user,
+            "add_habit": self.add_habit,
+            "complete_habit": self.complete_habit,
+            "view_leaderboard": self.view_leaderboard,
+            "view_global_leaderboard": self.view_global_leaderboard,
+            "top_performers": self.top_performers,
+            "past_rankings": self.past_rankings,
+            "list_habits": self.list_habits,
+            "completion_counts": self.completion_counts,
+            "user_stats": self.user_stats,
+            "habit_stats": self.habit_stats,
+            "open_habits": self.open_habits,
+            "history": self.history,
+            "report": self.report,
+            "cache_stats": self.cache_stats,
+            "reset_monthly_scores": self.reset_monthly_scores,
+            "rollover": self.rollover,
+            "flush": self.flush,
+        }
+
+    def ping(self):
+        return "pong"
+
+    def create_household(self, household_name):
+        DataManager.create_household(household_name, session=self.session)
+
+    def add_user(self, username, household_name):
+        DataManager.save_user(User(username, household_name), session=self.session)
+
+    def add_habit(self, name, periodicity, points, is_bonus=False):
+        habit = Habit(name, periodicity, points, is_bonus=is_bonus)
+        if is_bonus:
+            DataManager.save_bonus_habit(habit, session=self.session)
+        else:
+            DataManager.save_habit(habit, session=self.session)
+
+    def complete_habit(self, username, habit_name):
+        habit, success = DataManager.record_completion(username, habit_name, session=self.session)
+        return {"found": habit is not None, "is_bonus": bool(habit and habit["is_bonus"]), "success": success}
+
+    def view_leaderboard(self, household_name, top=None):
+        leaderboard = Leaderboard(session=self.session)
+        if top is None:
+            return list(leaderboard.get_sorted_rankings(household_name).items())
+        return leaderboard.get_top(household_name, top)
+
+    def view_global_leaderboard(self, top=None):
+        return Leaderboard.snapshot(top, session=self.session)
+
+    def top_performers(self):
+        return Leaderboard(session=self.session).get_top_performers()
+
+    def past_rankings(self):
+        return Leaderboard(session=self.session).get_past_rankings()
+
+    def list_habits(self):
+        return DataManager.load_habits(session=self.session)
+
+    def completion_counts(self):
+        return DataManager.completion_counts(session=self.session)
+
+    def user_stats(self, username):
+        return DataManager.user_stats(username, session=self.session)
+
+    def habit_stats(self, habit_name):
+        return DataManager.habit_stats(habit_name, session=self.session)
+
+    def open_habits(self, username):
+        return DataManager.open_habits(username, session=self.session)
+
+    def history(self, username, habit_name=None, start=None, end=None):
+        """Completion times as ISO strings; start and end are ISO dates."""
+        completions = DataManager.completion_history(username, habit_name, start and date.fromisoformat(start),
+                                                     end and date.fromisoformat(end), session=self.session)
+        return {name: [when.isoformat() for when in times] for name, times in completions.items()}
+
+    def report(self, month, workers=None):
+        from services.report import Reports
+        return Reports.generate(month, workers=workers, session=self.session)
+
+    def cache_stats(self):
+        return DataManager.cache.stats()
+
+    def reset_monthly_scores(self):
+        Leaderboard(session=self.session).reset_monthly()
+        DataManager.reset_monthly_scores(session=self.session)
+
+    def rollover(self, now=None):
+        return Rollover.run(datetime.fromisoformat(now) if now else None, session=self.session)
+
+    def flush(self):
+        """Writes pending changes to the store. Callers must hold the mutex."""
+        return self.session.commit()
+
+    def handle(self, request):
+        op = self.ops.get(request.get("op"))
+        if op is None:
+            return {"ok": False, "error": f"Unknown operation '{request.get('op')}'."}
+        try:
+            if self.group is not None and request["op"] in self.WRITES:
+                return {"ok": True, "result": self.group.apply(op, **request.get("args", {}))}
+            with self.mutex:
+                return {"ok": True, "result": op(**request.get("args", {}))}
+        except Exception as e:
+            logging.exception(f"Daemon request {request.get('op')} failed.")
+            return {"ok": False, "error": str(e)}
+
+    def _flush_periodically(self):
+        while not self.stopped.wait(self.flush_interval):
+            try:
+                with self.mutex:
+                    self.flush()
+            except Exception:
+                logging.exception("Write-behind flush failed; retrying on the next tick.")
+
+    def serve_forever(self):
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    try:
+                        response = daemon.handle(json.loads(line))
+                    except json.JSONDecodeError:
+                        response = {"ok": False, "error": "Malformed request."}
+                    self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+                    self.wfile.flush()
+
+        # opened here so the store lock is taken and released by the same thread
+        self.session = DataManager.session()
+        if self.group_commit is not None:
+            self.group = GroupCommit(self.session, window=self.group_commit, mutex=self.mutex)
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        self.server = socketserver.ThreadingUnixStreamServer(self.socket_path, Handler)
+        self.server.daemon_threads = True
+        flusher = threading.Thread(target=self._flush_periodically, daemon=True)
+        flusher.start()
+        logging.info(f"Serving {DataManager.FILE_PATH} on {self.socket_path}.")
+        try:
+            self.server.serve_forever()
+        finally:
+            self.stopped.set()
+            flusher.join()
+            self.close()
+
+    def shutdown(self):
+        """Stops serve_forever() from another thread and waits for the final flush."""
+        if self.server is not None and not self.closed.is_set():
+            self.server.shutdown()
+            self.closed.wait()
+
+    def close(self):
+        if self.group is not None:
+            self.group.close()
+        with self.mutex:
+            self.flush()
+            self.session.close()
+        if self.server is not None:
+            self.server.server_close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        self.closed.set()
+
+
+class Client:
+    """Thin client that forwards commands to a running daemon."""
+
+    def __init__(self, socket_path=None, timeout=10.0):
+        self.socket_path = socket_path or default_socket_path()
+        self.timeout = timeout
+
+    def call(self, op, **args):
+        if not hasattr(socket, "AF_UNIX") or not os.path.exists(self.socket_path):
+            raise DaemonUnavailable(self.socket_path)
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+                connection.settimeout(self.timeout)
+                connection.connect(self.socket_path)
+                connection.sendall(json.dumps({"op": op, "args": args}).encode("utf-8") + b"\n")
+                with connection.makefile("rb") as reader:
+                    line = reader.readline()
+        except (ConnectionRefusedError, FileNotFoundError) as e:
+            raise DaemonUnavailable(self.socket_path) from e
+        response = json.loads(line)
+        if not response["ok"]:
+            raise RuntimeError(response["error"])
+        return response["result"]
@@ -1,29 +1,233 @@
-import json
 import logging
-from datetime import datetime, timedelta
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from services.aggregates import Aggregates
+from services.cache import AnalyticsCache
+from services.history import CompletionHistory
+from services.index import DataIndex
 from services.leaderboard import Leaderboard
+from services.metrics import metrics, timed
+from services.periods import PeriodIndex, granularity_of
+from services.rollover import Rollover
+from services.ranking import RankingIndex
+from services.storage import LazyDocument, iter_section, open_store, migrate, convert
+from classes.habit import Habit
 from classes.user import User
 
-logging.basicConfig(level=logging.INFO)
+
+class Session:
+    """Unit of work: loads the store once and flushes every change in a single write.
+
+    Changes made by replayable operations (completions, claims, resets) are
+    recorded as journal events and appended to the store's journal on commit;
+    any other change makes the commit write a full snapshot instead.
+
+    A session opened on a store holds the store's inter-process lock from load
+    until close(), so concurrent CLI invocations cannot lose each other's
+    updates. Changes are reported to DataManager.cache as they happen.
+    """
+
+    def __init__(self, store=None, data=None):
+        self._lock = None
+        self.version = None
+        if data is None:
+            store = store or DataManager.store()
+            with metrics.timer("lock.wait"):
+                self._lock = store.lock().acquire()
+            try:
+                self.version = store.version()
+                data = DataManager.load_data(store)
+            except BaseException:
+                self.close()
+                raise
+        self.store = store
+        self.data = data
+        self.dirty = set()
+        self.events = []
+        self.snapshot_needed = False
+        self._replayable = 0
+        self._index = None
+        self._rankings = None
+        self._periods = None
+        self._history = None
+        self._aggregates = None
+        # (username, habit name) pairs whose streaks complete_many rebuilds once at the end
+        self.stale_streaks = None
+
+    @property
+    def index(self):
+        """Lookup tables for the session's data, built on first use."""
+        if self._index is None:
+            self._index = DataIndex(self.data)
+        return self._index
+
+    @property
+    def rankings(self):
+        """Ordered household and global rankings, built on first use."""
+        if self._rankings is None:
+            self._rankings = RankingIndex(self.data["leaderboard"]["rankings"])
+        return self._rankings
+
+    @property
+    def periods(self):
+        """Completions bucketed by day, week and month, built on first use."""
+        if self._periods is None:
+            self._periods = PeriodIndex(self.data)
+        return self._periods
+
+    @property
+    def history(self):
+        """Timestamps of every completion per user and habit, built on first use."""
+        if self._history is None:
+            self._history = CompletionHistory(self.data)
+        return self._history
+
+    @property
+    def aggregates(self):
+        """Totals, monthly points, completion counts and the global top, built on first use."""
+        if self._aggregates is None:
+            # seeding reads the history, so make sure old data has one first
+            self.history
+            self._aggregates = Aggregates(self.data)
+        return self._aggregates
+
+    def user(self, username, household=None):
+        """A User whose streaks and streak state are this session's data, so updating it updates the document.
+
+        Data written before the streak state was kept has it seeded from the
+        history first; the stored current streaks are kept as they are.
+        """
+        if "streak_state" not in self.data:
+            self._seed_streak_state()
+        points = self.data["households"][household]["points"].get(username, 0) if household else 0
+        user = User(username, household, points)
+        user.streaks = self.data["streaks"].setdefault(username, {})
+        user.streak_state = self.data["streak_state"].setdefault(username, {})
+        return user
+
+    def _seed_streak_state(self):
+        periodicities = {habit["name"]: habit["periodicity"] for habit in self.data.get("habits", [])}
+        self.data.setdefault("streaks", {})
+        self.data["streak_state"] = {}
+        for username, streaks in self.data["streaks"].items():
+            user = self.user(username)
+            for habit_name, current in list(streaks.items()):
+                if habit_name in periodicities:
+                    state = user.rebuild_streak(habit_name, periodicities[habit_name], self.history.days(username, habit_name))
+                    state["current"] = streaks[habit_name] = current
+                    state["longest"] = max(state["longest"], current)
+
+    def mark_dirty(self, *sections):
+        """Records which top-level sections of the data were modified."""
+        self.dirty.update(sections)
+        if not self._replayable:
+            self.snapshot_needed = True
+            DataManager.cache.invalidate()
+
+    @contextmanager
+    def replayable(self):
+        """Changes made inside this block are covered by the event passed to record()."""
+        self._replayable += 1
+        try:
+            yield self
+        finally:
+            self._replayable -= 1
+
+    def record(self, event):
+        """Queues a journal event describing a replayable operation."""
+        self.events.append(event)
+        if "username" in event and "habit" in event:
+            DataManager.cache.invalidate(users=[event["username"]], habits=[event["habit"]])
+        else:
+            DataManager.cache.invalidate()
+
+    @timed("session.commit")
+    def commit(self):
+        """Writes the data back if anything changed. Returns True if a write happened."""
+        if not self.dirty:
+            return False
+        if self.events and not self.snapshot_needed and hasattr(self.store, "append"):
+            self.store.append(self.data, self.events)
+        else:
+            DataManager.save_data(self.data, self.dirty, store=self.store)
+        if self.version is not None:
+            version, self.version = self.version, self.store.version()
+            DataManager.cache.rebase(version, self.version)
+        self.dirty.clear()
+        self.events = []
+        self.snapshot_needed = False
+        return True
+
+    def close(self):
+        """Releases the store lock without writing."""
+        if self._lock is not None:
+            self._lock.release()
+            self._lock = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.commit()
+        finally:
+            self.close()
+        return False
+
 
 class DataManager:
-    FILE_PATH = "data.json"
+    FILE_PATH = os.environ.get("HOMESTREAK_DATA", "data.json")
+    cache = AnalyticsCache()
 
     @staticmethod
-    def load_data():
-        """Loads data from JSON file or initializes default structure."""
-        try:
-            with open(DataManager.FILE_PATH, "r", encoding="utf-8") as file:
-                data = json.load(file)
-        except (FileNotFoundError, json.JSONDecodeError):
-            data = {
-                "households": {}, 
-                "habits": [], 
-                "bonus_habits": [],  
-                "leaderboard": {"rankings": {}, "past_rankings": []},
-                "streaks": {}  
-            }
-        
+    def store():
+        """Opens the storage backend for FILE_PATH (JSON, or SQLite for .db files)."""
+        return open_store(DataManager.FILE_PATH)
+
+    @staticmethod
+    def session(username=None, habit_name=None):
+        """Opens a session that batches operations into one load and one save.
+
+        On a sharded store, a session for one user completing one habit only
+        loads and locks that user's shard.
+        """
+        store = DataManager.store()
+        if username is not None and hasattr(store, "route"):
+            store = store.route(username, habit_name) or store
+        return Session(store)
+
+    @staticmethod
+    @contextmanager
+    def _session(session=None):
+        """Yields the caller's session, or a fresh one that is committed on exit."""
+        if session is not None:
+            yield session
+            return
+        with Session() as own:
+            yield own
+
+    @staticmethod
+    def cached(key, compute, session=None, users=None, habits=None):
+        """Returns compute(data) from the analytics cache, keyed on the store version.
+
+        users and habits name what the result depends on (None means all), so a
+        completion only evicts the results it can affect.
+        """
+        if session is None:
+            store = DataManager.store()
+            return DataManager.cache.get(key, lambda: compute(LazyDocument(store)), store.version(), users, habits)
+        if session.version is None:
+            return compute(session.data)
+        return DataManager.cache.get(key, lambda: compute(session.data), session.version, users, habits)
+
+    @staticmethod
+    def load_data(store=None):
+        """Loads data from the store or initializes default structure."""
+        data = (store or DataManager.store()).load()
+
         if "bonus_habits" not in data:
             data["bonus_habits"] = []
         if "streaks" not in data:
@@ -31,215 +235,453 @@ class DataManager:
         return data
 
     @staticmethod
-    def save_data(data):
-        """Saves data to JSON file."""
-        with open(DataManager.FILE_PATH, "w", encoding="utf-8") as file:
-            json.dump(data, file, indent=4)
+    def save_data(data, sections=None, store=None):
+        """Saves data to the store; sections limits the write to what changed."""
+        (store or DataManager.store()).save(data, sections)
 
     @staticmethod
-    def create_household(household_name):
+    def create_household(household_name, session=None):
         """Creates a new household if it doesn't already exist."""
-        data = DataManager.load_data()
-        if household_name in data["households"]:
-            logging.warning(f"Household '{household_name}' already exists.")
-            return
-        data["households"][household_name] = {"members": [], "points": {}}
-        DataManager.save_data(data)
+        with DataManager._session(session) as s:
+            data = s.data
+            if household_name in data["households"]:
+                logging.warning(f"Household '{household_name}' already exists.")
+                return
+            data["households"][household_name] = {"members": [], "points": {}}
+            s.index.add_household(household_name)
+            s.mark_dirty("households")
+            if Rollover.schedule(data, "household", household_name):
+                s.mark_dirty("schedule")
 
     @staticmethod
-    def save_user(user):
+    def save_user(user, session=None):
         """Adds a user to an existing household."""
-        data = DataManager.load_data()
-        if user.household not in data["households"]:
-            logging.error(f"Household '{user.household}' does not exist. Please create it first.")
-            return
-        if user.username in data["households"][user.household]["members"]:
-            logging.warning(f"User '{user.username}' is already in household '{user.household}'.")
-            return
-        data["households"][user.household]["members"].append(user.username)
-        data["households"][user.household]["points"][user.username] = 0  
-
-        if user.username not in data["streaks"]:
-            data["streaks"][user.username] = {}  
+        with DataManager._session(session) as s:
+            data = s.data
+            if user.household not in data["households"]:
+                logging.error(f"Household '{user.household}' does not exist. Please create it first.")
+                return
+            if s.index.is_member(user.username, user.household):
+                logging.warning(f"User '{user.username}' is already in household '{user.household}'.")
+                return
+            data["households"][user.household]["members"].append(user.username)
+            data["households"][user.household]["points"][user.username] = 0
+            s.index.add_member(user.username, user.household)
+            s.mark_dirty("households")
+
+            if user.username not in data["streaks"]:
+                data["streaks"][user.username] = {}
+                s.mark_dirty("streaks")
 
-        DataManager.save_data(data)
-       
 
     @staticmethod
-    def save_habit(habit):
+    def save_habit(habit, session=None):
         """Saves a new habit (regular or bonus) to the database."""
-        data = DataManager.load_data()
-        habit_dict = habit.to_dict()
-
-        if any(h["name"] == habit.name for h in data["habits"]):
-            logging.warning(f"Habit '{habit.name}' already exists.")
-            return
+        with DataManager._session(session) as s:
+            data = s.data
+            habit_dict = habit.to_dict()
 
-        if habit.is_bonus:
-            data["bonus_habits"].append(habit_dict)
-        else:
-            data["habits"].append(habit_dict)
+            if habit.name in s.index.habits:
+                logging.warning(f"Habit '{habit.name}' already exists.")
+                return
 
-        DataManager.save_data(data)
+            if habit.is_bonus:
+                data["bonus_habits"].append(habit_dict)
+                s.mark_dirty("bonus_habits")
+            else:
+                data["habits"].append(habit_dict)
+                s.mark_dirty("habits")
+                if Rollover.schedule(data, "habit", habit.name):
+                    s.mark_dirty("schedule")
+            s.index.add_habit(habit_dict)
 
     @staticmethod
-    def save_bonus_habit(habit):
+    def save_bonus_habit(habit, session=None):
         """Saves a bonus habit to the database."""
-        data = DataManager.load_data()
-        habit_dict = habit.to_dict()  
-        if any(h["name"] == habit.name for h in data["bonus_habits"]):
-            logging.warning(f"Bonus habit '{habit.name}' already exists.")
-            return
-        data["bonus_habits"].append(habit_dict)  
-        DataManager.save_data(data)
+        with DataManager._session(session) as s:
+            data = s.data
+            habit_dict = habit.to_dict()
+            if habit.name in s.index.bonus_habits:
+                logging.warning(f"Bonus habit '{habit.name}' already exists.")
+                return
+            data["bonus_habits"].append(habit_dict)
+            s.index.add_habit(habit_dict)
+            s.mark_dirty("bonus_habits")
 
     @staticmethod
-    def complete_habit(username, habit_name):
+    def complete_habit(username, habit_name, session=None, now=None, update_leaderboard=True):
         """Marks a habit as completed, tracks streaks, updates points, and leaderboard."""
-        data = DataManager.load_data()
+        with DataManager._session(session) as s, s.replayable():
+            data = s.data
+
+            habit = s.index.habits.get(habit_name)
+            if not habit:
+                logging.error(f"Habit '{habit_name}' not found.")
+                return False
+
+            household_name = DataManager.find_household(username, session=s)
+            if not household_name:
+                logging.error(f"User '{username}' not found in any household.")
+                return False
+
+            now = now or datetime.now()
+            user = s.user(username, household_name)
+            # seeded before the history and points change, so the aggregates cannot count this completion twice
+            s.aggregates
+            with metrics.timer("streaks.update"):
+                current = user.advance_streak(habit_name, now.toordinal(), habit["periodicity"])
+            s.periods.add(now, habit_name, username)
+            s.history.add(username, habit_name, now)
+            if not current:
+                # back-filled before the latest period: the streak is recomputed from the history
+                if s.stale_streaks is not None:
+                    s.stale_streaks.add((username, habit_name))
+                else:
+                    DataManager._rebuild_streak(s, user, habit)
+
+            points = Habit.from_dict(habit).calculate_points(user)
+            user.add_points(points)
+            data["households"][household_name]["points"][username] = user.points
+            s.aggregates.completed(household_name, username, habit_name, points, now)
+            s.mark_dirty("streaks", "streak_state", "households", "periods", "history", "aggregates")
+
+            if update_leaderboard:
+                Leaderboard.update(user, session=s)
+            s.record({"type": "complete_habit", "username": username, "habit": habit_name, "at": now.isoformat()})
+
+            logging.info(f"Habit '{habit_name}' completed by {username}. Streak: {user.streaks[habit_name]}. Points earned: {points}.")
+            return True
 
-        habit = next((h for h in data["habits"] if h["name"] == habit_name), None)
-        if not habit:
-            logging.error(f"Habit '{habit_name}' not found.")
-            return False
+    @staticmethod
+    def _rebuild_streak(session, user, habit):
+        return user.rebuild_streak(habit["name"], habit["periodicity"], session.history.days(user.username, habit["name"]))
 
-        household_name = None
-        for household, details in data["households"].items():
-            if username in details["members"]:
-                household_name = household
-                break
-        if not household_name:
-            logging.error(f"User '{username}' not found in any household.")
-            return False
+    @staticmethod
+    def rebuild_streaks(usernames=None, session=None):
+        """Recomputes the streak state of the users' (default: everyone's) regular habits from the completion history.
+
+        Returns the number of current streaks that changed.
+        """
+        with DataManager._session(session) as s:
+            changed = 0
+            for username in list(s.data.get("streaks", {})) if usernames is None else usernames:
+                user = s.user(username)
+                for habit in s.data.get("habits", []):
+                    if habit["name"] not in user.streak_state and not s.history.count(username, habit["name"]):
+                        continue
+                    before = user.streaks.get(habit["name"])
+                    changed += DataManager._rebuild_streak(s, user, habit)["current"] != before
+            s.mark_dirty("streaks", "streak_state")
+            return changed
 
-        if "streaks" not in data:
-            data["streaks"] = {}
-        if username not in data["streaks"]:
-            data["streaks"][username] = {}
-
-        last_completed = habit.get("last_completed_at")
-        now = datetime.now()
-        reset_threshold = timedelta(days=1 if habit["periodicity"] == "daily" else 7)
-
-        if last_completed:
-            last_completed_date = datetime.fromisoformat(last_completed)
-            if now - last_completed_date > reset_threshold:
-                data["streaks"][username][habit_name] = 1
-            else:
-                data["streaks"][username][habit_name] += 1
-        else:
-            data["streaks"][username][habit_name] = 1  
 
-        streak_bonus = (data["streaks"][username][habit_name] // 7) * 10
-        points = habit["points"] + streak_bonus
+    @staticmethod
+    def claim_bonus_habit(username, habit_name, session=None, now=None, update_leaderboard=True):
+        """Claim a bonus habit (only once per period)."""
+        with DataManager._session(session) as s, s.replayable():
+            data = s.data
 
-        user_data = data["households"][household_name]["points"]
-        user_data[username] += habit["points"]
-        DataManager.save_data(data)
+            household_name = DataManager.find_household(username, session=s)
 
-        user = User(username, household_name, data["households"][household_name]["points"][username])
-        Leaderboard().update(user)
+            if not household_name:
+                logging.warning(f"User '{username}' not found.")
+                return False
 
-        logging.info(f"Habit '{habit_name}' completed by {username}. Streak: {data['streaks'][username][habit_name]}. Points earned: {points}.")
-        return True
+            habit = s.index.bonus_habits.get(habit_name)
+            if not habit or not habit.get("is_bonus", False):
+                logging.warning(f"Habit '{habit_name}' is not a bonus habit.")
+                return False
 
+            now = now or datetime.now()
+            current_period = now.strftime("%Y-%m-%d") if habit["periodicity"] == "daily" else now.strftime("%Y-%W")
 
-    @staticmethod
-    def claim_bonus_habit(username, habit_name):
-        """Claim a bonus habit (only once per period)."""
-        data = DataManager.load_data()
+            # the index is checked (and so seeded) before completed_habits changes; its Monday-based
+            # weeks also hold across a year boundary, where "%Y-%W" starts a new week 00
+            claimed = s.periods.who(habit_name, granularity_of(habit["periodicity"]), now)
+            if claimed or habit_name in data.get("completed_habits", {}).get(current_period, {}):
+                logging.warning(f"Bonus habit '{habit_name}' has already been claimed this period.")
+                return False
 
-        household_name = None
-        for household, details in data["households"].items():
-            if username in details["members"]:
-                household_name = household
-                break
+            s.aggregates.completed(household_name, username, habit_name, habit["points"], now)
+            user_data = data["households"][household_name]["points"]
+            user_data[username] += habit["points"]
 
-        if not household_name:
-            logging.warning(f"User '{username}' not found.")
-            return False
-
-        habit = next((h for h in data["bonus_habits"] if h["name"] == habit_name), None)
-        if not habit or not habit.get("is_bonus", False):
-            logging.warning(f"Habit '{habit_name}' is not a bonus habit.")
-            return False
+            data.setdefault("completed_habits", {}).setdefault(current_period, {})[habit_name] = username
+            s.periods.add(now, habit_name, username)
+            s.history.add(username, habit_name, now)
+            s.mark_dirty("completed_habits", "households", "periods", "history", "aggregates")
 
-        current_period = datetime.now().strftime("%Y-%m-%d") if habit["periodicity"] == "daily" else datetime.now().strftime("%Y-%W")
+            user = User(username, household_name, user_data[username])
+            if update_leaderboard:
+                Leaderboard.update(user, session=s)
+            s.record({"type": "claim_bonus_habit", "username": username, "habit": habit_name, "at": now.isoformat()})
 
-        if "completed_habits" not in data:
-            data["completed_habits"] = {}
-        if current_period not in data["completed_habits"]:
-            data["completed_habits"][current_period] = {}
+            logging.info(f"Bonus Habit '{habit_name}' claimed by {username}. Points: {habit['points']}.")
+            return True
 
-        print(f"DEBUG: Current Period = {current_period}")
-        print(f"DEBUG: Completed Habits = {data['completed_habits']}")
 
-        if habit_name in data["completed_habits"][current_period]:
-            logging.warning(f"Bonus habit '{habit_name}' has already been claimed this period.")
-            return False
-
-        user_data = data["households"][household_name]["points"]
-        user_data[username] += habit["points"]
-    
-        data["completed_habits"][current_period][habit_name] = username  
-        DataManager.save_data(data)
+    @staticmethod
+    def record_completion(username, habit_name, session=None, now=None, update_leaderboard=True):
+        """Completes a regular habit or claims a bonus habit, whichever habit_name is.
+
+        Returns (habit, success); habit is None if no habit has that name.
+        """
+        with DataManager._session(session) as s:
+            habit = s.index.find_habit(habit_name)
+            if habit is None:
+                logging.error(f"Habit '{habit_name}' not found.")
+                return None, False
+            complete = DataManager.claim_bonus_habit if habit["is_bonus"] else DataManager.complete_habit
+            return habit, complete(username, habit_name, session=s, now=now, update_leaderboard=update_leaderboard)
 
-        user = User(username, household_name, user_data[username])
-        Leaderboard().update(user)
+    @staticmethod
+    def complete_many(records, session=None):
+        """Applies a batch of (username, habit_name, timestamp) completions in timestamp order.
+
+        Regular habits are completed and bonus habits claimed exactly as one by
+        one, but rankings are updated once at the end and the store is written
+        once. Streaks that back-filled records land behind are recomputed from
+        the history once, also at the end. Returns counts and throughput for
+        the batch.
+        """
+        started = time.perf_counter()
+        records = sorted(records, key=lambda record: record[2])
+        applied = 0
+        touched = set()
+        with DataManager._session(session) as s:
+            previous = logging.root.manager.disable
+            # per-record messages would drown the summary; rejections are counted instead
+            logging.disable(logging.WARNING)
+            s.stale_streaks = set()
+            try:
+                for username, habit_name, timestamp in records:
+                    _, success = DataManager.record_completion(username, habit_name, session=s, now=timestamp, update_leaderboard=False)
+                    if success:
+                        applied += 1
+                        touched.add(username)
+                # each back-filled streak is recomputed once instead of once per record
+                for username, habit_name in s.stale_streaks:
+                    DataManager._rebuild_streak(s, s.user(username), s.index.habits[habit_name])
+            finally:
+                s.stale_streaks = None
+                logging.disable(previous)
+
+            users = []
+            for username in touched:
+                household_name = s.index.find_household(username)
+                users.append(User(username, household_name, s.data["households"][household_name]["points"][username]))
+            Leaderboard.update_many(users, session=s)
+            # one snapshot write instead of a journal entry per record
+            s.snapshot_needed = True
+
+        seconds = time.perf_counter() - started
+        return {
+            "records": len(records),
+            "applied": applied,
+            "rejected": len(records) - applied,
+            "seconds": seconds,
+            "per_second": len(records) / seconds if seconds else 0.0,
+        }
 
-        logging.info(f"Bonus Habit '{habit_name}' claimed by {username}. Points: {habit['points']}.")
-        return True
+    @staticmethod
+    def rollover(now=None):
+        """Runs the period rollover for every habit and household that is due."""
+        return Rollover.run(now)
 
-                 
     @staticmethod
-    def reset_monthly_scores():
+    def reset_monthly_scores(session=None):
         """Resets user scores at the beginning of each month."""
-        data = DataManager.load_data()
-        for household in data["households"].values():
-            for user in household["points"]:
-                household["points"][user] = 0
-        DataManager.save_data(data)
+        with DataManager._session(session) as s, s.replayable():
+            for name, household in s.data["households"].items():
+                for user in household["points"]:
+                    household["points"][user] = 0
+                s.aggregates.reset_household(name)
+            s.mark_dirty("households", "aggregates")
+            s.record({"type": "reset_monthly_scores"})
 
     @staticmethod
-    def load_habits():
+    def load_habits(session=None):
         """Loads all habits (regular and bonus)."""
-        data = DataManager.load_data()
-        return data.get("habits", []) + data.get("bonus_habits", [])
+        if session is None:
+            store = DataManager.store()
+            return store.read_section("habits", []) + store.read_section("bonus_habits", [])
+        return session.data.get("habits", []) + session.data.get("bonus_habits", [])
     
     @staticmethod
-    def get_habit(habit_name):
+    def get_habit(habit_name, session=None):
         """Fetch a single habit from stored data."""
-        data = DataManager.load_data()
-    
-        habit = next((h for h in data["habits"] if h["name"] == habit_name), None)
-        if habit:
-            return habit
-    
-        habit = next((h for h in data["bonus_habits"] if h["name"] == habit_name), None)
-        return habit
+        if session is None:
+            return DataManager.store().find_habit(habit_name)
+        return session.index.find_habit(habit_name)
+
+    @staticmethod
+    def find_household(username, session=None):
+        """Returns the name of the household a user belongs to, or None."""
+        if session is None:
+            return DataManager.store().find_household(username)
+        return session.index.find_household(username)
+
+    @staticmethod
+    def is_member(username, household_name, session=None):
+        """Checks whether a user belongs to the given household."""
+        with DataManager._session(session) as s:
+            return s.index.is_member(username, household_name)
+
+    @staticmethod
+    def user_stats(username, session=None):
+        """Points, streaks and bonus claims of one user (cached), or None if the user is unknown."""
+        def compute(data):
+            household = next((name for name, details in data.get("households", {}).items()
+                              if username in details["members"]), None)
+            if household is None:
+                return None
+            streaks = dict(data.get("streaks", {}).get(username, {}))
+            claims = sum(claimed == username for _, period in iter_section(data, "completed_habits")
+                         for claimed in period.values())
+            completions = {habit_name: len(timestamps)
+                           for habit_name, timestamps in (data.get("history") or {}).get(username, {}).items()}
+            return {
+                "username": username,
+                "household": household,
+                "points": data["households"][household]["points"].get(username, 0),
+                "streaks": streaks,
+                "best_streak": max(streaks.values(), default=0),
+                "longest_streaks": {habit_name: state["longest"]
+                                    for habit_name, state in (data.get("streak_state") or {}).get(username, {}).items()},
+                "bonus_claims": claims,
+                "completions": completions,
+            }
+        return DataManager.cached(("user_stats", username), compute, session, users=[username])
+
+    @staticmethod
+    def habit_stats(habit_name, session=None):
+        """Streaks and claims of one habit across all users (cached), or None if the habit is unknown."""
+        def compute(data):
+            habit = next((h for h in data.get("habits", []) + data.get("bonus_habits", []) if h["name"] == habit_name), None)
+            if habit is None:
+                return None
+            streaks = {username: per_habit[habit_name] for username, per_habit in data.get("streaks", {}).items()
+                       if habit_name in per_habit}
+            claims = {}
+            for _, period in iter_section(data, "completed_habits"):
+                if habit_name in period:
+                    claims[period[habit_name]] = claims.get(period[habit_name], 0) + 1
+            completions = {username: len(per_habit[habit_name])
+                           for username, per_habit in (data.get("history") or {}).items() if per_habit.get(habit_name)}
+            return {
+                "name": habit_name,
+                "periodicity": habit["periodicity"],
+                "points": habit["points"],
+                "is_bonus": habit.get("is_bonus", False),
+                "streaks": streaks,
+                "best_streak": max(streaks.items(), key=lambda item: item[1], default=None),
+                "claims": claims,
+                "completions": completions,
+            }
+        return DataManager.cached(("habit_stats", habit_name), compute, session, habits=[habit_name])
+
+    @staticmethod
+    def who_completed(habit_name, session=None, now=None):
+        """{username: count} of who completed a habit in its current day or week."""
+        with DataManager._session(session) as s:
+            habit = s.index.find_habit(habit_name)
+            if not habit:
+                return {}
+            return s.periods.who(habit_name, granularity_of(habit["periodicity"]), now or datetime.now())
 
     @staticmethod
-    def reset_habits():
-        """Reset habits based on their periodicity (daily/weekly)."""
-        data = DataManager.load_data()
-        for habit in data["habits"] + data["bonus_habits"]:
-            if habit["periodicity"] == "daily":
-                habit["last_completed_at"] = None
-            elif habit["periodicity"] == "weekly":
-                habit["last_completed_at"] = None
-        DataManager.save_data(data)
+    def open_habits(username, session=None, now=None):
+        """Names of the habits a user can still complete (or claim) in the current period."""
+        with DataManager._session(session) as s:
+            return s.periods.open_habits(username, s.data.get("habits", []) + s.data.get("bonus_habits", []), now or datetime.now())
+
+    @staticmethod
+    def completions_between(start, end, session=None):
+        """{habit: {username: count}} for completions from start to end (inclusive dates)."""
+        with DataManager._session(session) as s:
+            return s.periods.between(start, end)
+
+    @staticmethod
+    def completion_history(username, habit_name=None, start=None, end=None, session=None):
+        """{habit: [datetime]} of a user's completions from start to end (dates inclusive, None for open)."""
+        if session is None:
+            # a range of one user's rows; the SQLite backend answers it with an indexed query
+            history = DataManager.store().history_between(username, start, end, habit_name)
+            if history is not None:
+                return history
+        with DataManager._session(session) as s:
+            return s.history.between(username, start, end, habit_name)
+
+    @staticmethod
+    def aggregates(session=None):
+        """The materialized "aggregates" section (see services/aggregates.py).
+
+        Without a session only that section is read; data written before it
+        existed is loaded once to seed it.
+        """
+        if session is None:
+            values = DataManager.store().read_section("aggregates")
+            if values is not None:
+                return values
+        with DataManager._session(session) as s:
+            return s.aggregates.values
+
+    @staticmethod
+    def completion_counts(session=None):
+        """{habit: number of completions by anyone}."""
+        return dict(DataManager.aggregates(session)["habits"])
+
+    @staticmethod
+    def household_totals(session=None):
+        """{household: total points of its members}."""
+        return dict(DataManager.aggregates(session)["households"])
+
+    @staticmethod
+    def monthly_points(month, session=None):
+        """{username: points earned} in a month given as "MM-YYYY"."""
+        return dict(DataManager.aggregates(session)["monthly"].get(month, {}))
+
+    @staticmethod
+    def last_completed(username, habit_name, session=None):
+        """When the user last completed (or claimed) the habit, or None."""
+        with DataManager._session(session) as s:
+            return s.history.last(username, habit_name)
+
+    @staticmethod
+    def reset_habits(session=None, now=None):
+        """Drops day and week buckets that fell out of the period index's retention window.
+
+        Periods roll over by date, so nothing else needs resetting.
+        """
+        with DataManager._session(session) as s, s.replayable():
+            now = now or datetime.now()
+            if s.periods.prune(now):
+                s.mark_dirty("periods")
+            s.record({"type": "reset_habits", "at": now.isoformat()})
 
     @staticmethod
     def clear_data():
-        """Clears the contents of the data.json file."""
-        with open(DataManager.FILE_PATH, "w", encoding="utf-8") as file:
-            json.dump({
-                "households": {},
-                "habits": [],
-                "bonus_habits": [],
-                "leaderboard": {"rankings": {}, "past_rankings": []}
-            }, file, indent=4)
-        logging.info("data.json has been cleared.")
+        """Clears the contents of the data store."""
+        DataManager.store().clear()
+        logging.info(f"{DataManager.FILE_PATH} has been cleared.")
+
+    @staticmethod
+    def compact():
+        """Folds the completion journal into a new snapshot. Returns the number of events folded."""
+        store = DataManager.store()
+        if not hasattr(store, "compact"):
+            return 0
+        return store.compact()
+
+    @staticmethod
+    def convert_store(fmt):
+        """Rewrites the data file in another format. Returns the previous format."""
+        return convert(DataManager.FILE_PATH, fmt)
+
+    @staticmethod
+    def migrate_store(source_path, target_path):
+        """Imports an existing store (e.g. data.json) into another backend (e.g. data.db)."""
+        return migrate(source_path, target_path)
 
     from datetime import datetime, timedelta
 
@@ -0,0 +1,102 @@
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, datetime, time, timedelta
+from services.metrics import timed
+from services.periods import claim_period
+
+EPOCH = datetime(1970, 1, 1)
+EPOCH_DAY = EPOCH.toordinal()
+SECOND = timedelta(seconds=1)
+
+
+def to_timestamp(when):
+    """Whole seconds from 1970-01-01 to a naive local datetime (or the start of a date)."""
+    if not isinstance(when, datetime):
+        when = datetime.combine(when, time())
+    return (when.replace(tzinfo=None) - EPOCH) // SECOND
+
+
+def from_timestamp(timestamp):
+    return EPOCH + timedelta(seconds=timestamp)
+
+
+def day_of(timestamp):
+    """Day ordinal (date.toordinal()) of a timestamp."""
+    return EPOCH_DAY + timestamp // 86400
+
+
+def bounds(start, end):
+    """Timestamp range for start..end; dates include the whole end day, None is open."""
+    low = None if start is None else to_timestamp(start)
+    if end is None:
+        high = None
+    elif isinstance(end, datetime):
+        high = to_timestamp(end)
+    else:
+        high = to_timestamp(end + timedelta(days=1)) - 1
+    return low, high
+
+
+class CompletionHistory:
+    """Every completion as {username: {habit: [timestamps]}}, each list sorted.
+
+    Stored in the data's "history" section. Timestamps are whole seconds since
+    1970 in local time, like the naive datetimes the rest of the data uses.
+    Completions arrive in time order, so recording one is a list append (an
+    insort for a backfilled one), and a date range of one user's habit is two
+    binary searches and a slice.
+    """
+
+    @timed("history.build")
+    def __init__(self, data):
+        seed = "history" not in data
+        self.users = data.setdefault("history", {})
+        if seed:
+            self._seed(data.get("completed_habits", {}))
+
+    def _seed(self, completed_habits):
+        """Adds the bonus claims of data written before the history existed, at the start of their period."""
+        for key, claimed in completed_habits.items():
+            granularity, ordinal = claim_period(key)
+            start = date.fromordinal(ordinal if granularity == "day" else ordinal * 7 + 1)
+            for habit_name, username in claimed.items():
+                self.add(username, habit_name, start)
+
+    def add(self, username, habit_name, when):
+        timestamps = self.users.setdefault(username, {}).setdefault(habit_name, [])
+        timestamp = to_timestamp(when)
+        if timestamps and timestamp < timestamps[-1]:
+            insort(timestamps, timestamp)
+        else:
+            timestamps.append(timestamp)
+
+    def timestamps(self, username, habit_name, start=None, end=None):
+        """The sorted timestamps of one user's habit from start to end (inclusive)."""
+        timestamps = self.users.get(username, {}).get(habit_name, [])
+        low, high = bounds(start, end)
+        return timestamps[0 if low is None else bisect_left(timestamps, low):
+                          len(timestamps) if high is None else bisect_right(timestamps, high)]
+
+    def between(self, username, start=None, end=None, habit_name=None):
+        """{habit: [datetime]} of a user's completions from start to end, optionally of one habit."""
+        names = [habit_name] if habit_name is not None else list(self.users.get(username, {}))
+        history = {}
+        for name in names:
+            timestamps = self.timestamps(username, name, start, end)
+            if timestamps:
+                history[name] = [from_timestamp(timestamp) for timestamp in timestamps]
+        return history
+
+    def count(self, username, habit_name, start=None, end=None):
+        timestamps = self.users.get(username, {}).get(habit_name, [])
+        if start is None and end is None:
+            return len(timestamps)
+        return len(self.timestamps(username, habit_name, start, end))
+
+    def days(self, username, habit_name):
+        """Day ordinals of one user's completions of the habit, oldest first."""
+        return [day_of(timestamp) for timestamp in self.users.get(username, {}).get(habit_name, [])]
+
+    def last(self, username, habit_name):
+        """When the user last completed the habit, or None."""
+        timestamps = self.users.get(username, {}).get(habit_name)
+        return from_timestamp(timestamps[-1]) if timestamps else None
@@ -0,0 +1,415 @@
+import asyncio
+import http.client
+import json
+import logging
+import os
+import threading
+import time
+from datetime import date
+from urllib.parse import parse_qs, quote, unquote, urlencode, urlsplit
+from classes.habit import Habit
+from classes.user import User
+from services.data_manager import DataManager
+from services.leaderboard import Leaderboard
+
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ApiUnavailable(Exception):
+    """Raised by the client when no HTTP API is serving the store."""
+
+
+def default_address_path():
+    return f"{DataManager.FILE_PATH}.http"
+
+
+class HttpApi:
+    """Serves DataManager operations and leaderboard/statistics reads over HTTP on a local port.
+
+    Like the Unix socket daemon it keeps one session (and the store lock)
+    open, but everything runs on one asyncio event loop:
+
+    - one writer task takes mutations off a queue and applies them in
+      batches, so they never interleave;
+    - reads are answered from the response bodies already encoded for the
+      current data version; the first read of a path after a write batch
+      computes it, later ones reuse the bytes until the next batch;
+    - changes are written to the store at most every flush_interval seconds
+      (or after flush_every changes), in a worker thread while the writer
+      waits, so reads keep being served during the disk write.
+
+    While it serves, its host:port is written to <store>.http, so CLI commands
+    find it (see HttpClient) instead of waiting for the store lock.
+    """
+
+    MAX_BODY = 64 * 1024
+
+    def __init__(self, host="127.0.0.1", port=8765, flush_interval=1.0, flush_every=1000, address_path=None):
+        self.host = host
+        self.port = port
+        self.flush_interval = flush_interval
+        self.flush_every = flush_every
+        self.address_path = address_path or default_address_path()
+        self.session = None
+        self.server = None
+        self.queue = None
+        self.loop = None
+        self.task = None
+        self.closed = threading.Event()
+        self.version = 0
+        self.views = {}  # (path, query) -> encoded body for self.version
+        self.pending = 0
+        self.last_flush = time.monotonic()
+        self.stats = {"reads": 0, "writes": 0, "view_hits": 0, "flushes": 0}
+
+    # routes -----------------------------------------------------------------
+
+    def read(self, parts, query):
+        """Computes the result of a GET request."""
+        try:
+            top = int(query["top"]) if "top" in query else None
+        except ValueError:
+            raise HttpError(400, "top must be a number.")
+        match parts:
+            case ["ping"]:
+                return "pong"
+            case ["habits"]:
+                return DataManager.load_habits(session=self.session)
+            case ["completion-counts"]:
+                return DataManager.completion_counts(session=self.session)
+            case ["top-performers"]:
+                return Leaderboard(session=self.session).get_top_performers()
+            case ["past-rankings"]:
+                return Leaderboard(session=self.session).get_past_rankings()
+            case ["leaderboard"]:
+                return Leaderboard.snapshot(top, session=self.session)
+            case ["leaderboard", household]:
+                leaderboard = Leaderboard(session=self.session)
+                if top is None:
+                    return list(leaderboard.get_sorted_rankings(household).items())
+                return leaderboard.get_top(household, top)
+            case ["users", username, "stats"]:
+                return self._found(DataManager.user_stats(username, session=self.session), f"User '{username}' not found.")
+            case ["users", username, "open-habits"]:
+                return DataManager.open_habits(username, session=self.session)
+            case ["users", username, "history"]:
+                try:
+                    start, end = (date.fromisoformat(query[name]) if name in query else None for name in ("start", "end"))
+                except ValueError:
+                    raise HttpError(400, "start and end must be YYYY-MM-DD dates.")
+                history = DataManager.completion_history(username, query.get("habit"), start, end, session=self.session)
+                return {habit_name: [when.isoformat() for when in times] for habit_name, times in history.items()}
+            case ["habits", habit_name, "stats"]:
+                return self._found(DataManager.habit_stats(habit_name, session=self.session), f"Habit '{habit_name}' not found.")
+            case ["completions"]:
+                try:
+                    start, end = date.fromisoformat(query["start"]), date.fromisoformat(query["end"])
+                except (KeyError, ValueError):
+                    raise HttpError(400, "start and end must be YYYY-MM-DD dates.")
+                return DataManager.completions_between(start, end, session=self.session)
+            case ["status"]:
+                return dict(self.stats, version=self.version, pending=self.pending, cache=DataManager.cache.stats())
+        raise HttpError(404, "No such resource.")
+
+    def write(self, parts, body):
+        """Applies a POST request to the session; only ever called by the writer task."""
+        match parts:
+            case ["completions"]:
+                habit, success = DataManager.record_completion(self._field(body, "username"), self._field(body, "habit"),
+                                                               session=self.session)
+                if habit is None:
+                    raise HttpError(404, f"Habit '{body['habit']}' not found.")
+                return {"is_bonus": habit["is_bonus"], "success": success}
+            case ["households"]:
+                DataManager.create_household(self._field(body, "name"), session=self.session)
+                return {"name": body["name"]}
+            case ["users"]:
+                DataManager.save_user(User(self._field(body, "username"), self._field(body, "household")), session=self.session)
+                return {"username": body["username"], "household": body["household"]}
+            case ["habits"]:
+                habit = Habit(self._field(body, "name"), self._field(body, "periodicity"), int(self._field(body, "points")),
+                              is_bonus=bool(body.get("is_bonus")))
+                save = DataManager.save_bonus_habit if habit.is_bonus else DataManager.save_habit
+                save(habit, session=self.session)
+                return habit.to_dict()
+        raise HttpError(404, "No such resource.")
+
+    @staticmethod
+    def _found(value, message):
+        if value is None:
+            raise HttpError(404, message)
+        return value
+
+    @staticmethod
+    def _field(body, name):
+        if not isinstance(body, dict) or name not in body:
+            raise HttpError(400, f"Missing field '{name}'.")
+        return body[name]
+
+    # reads and writes ---------------------------------------------------------
+
+    def get(self, parts, query):
+        self.stats["reads"] += 1
+        key = ("/".join(parts), tuple(sorted(query.items())))
+        body = self.views.get(key)
+        if body is None:
+            # computed without awaiting, so the writer cannot change the data halfway
+            body = self.views[key] = json.dumps(self.read(parts, query)).encode("utf-8")
+        else:
+            self.stats["view_hits"] += 1
+        return body
+
+    async def post(self, parts, body):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((parts, body, future))
+        return json.dumps(await future).encode("utf-8")
+
+    async def request_flush(self):
+        """Queues a flush behind the writes already queued and waits for it."""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((None, None, future))
+        await future
+
+    async def _writer(self):
+        while True:
+            batch = [await self.queue.get()]
+            while not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            writes = [(parts, body, future) for parts, body, future in batch if parts is not None]
+            for parts, body, future in writes:
+                try:
+                    future.set_result(self.write(parts, body))
+                    self.pending += 1
+                except Exception as e:
+                    future.set_exception(e)
+            if writes:
+                self.stats["writes"] += len(writes)
+                # reads now see the new data
+                self.version += 1
+                self.views = {}
+            forced = len(writes) < len(batch)
+            if self.pending and (forced or self.pending >= self.flush_every or
+                                 time.monotonic() - self.last_flush >= self.flush_interval):
+                try:
+                    await self.flush()
+                except Exception:
+                    logging.exception("Flush failed; retrying with the next batch.")
+            for parts, _, future in batch:
+                if parts is None:
+                    future.set_result(None)
+
+    async def flush(self):
+        """Writes pending changes in a worker thread; the writer task waits, so the data cannot change meanwhile."""
+        await asyncio.get_running_loop().run_in_executor(None, self.session.commit)
+        self.pending = 0
+        self.last_flush = time.monotonic()
+        self.stats["flushes"] += 1
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            if self.pending:
+                await self.request_flush()
+
+    # HTTP ---------------------------------------------------------------------
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode("latin-1").split()
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length > self.MAX_BODY:
+                    status, body = 413, b'{"error": "Request body too large."}'
+                    await reader.readexactly(length)
+                else:
+                    payload = await reader.readexactly(length) if length else b""
+                    status, body = await self._respond(method, target, payload)
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                writer.write(b"HTTP/1.1 %d %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\n%s\r\n"
+                             % (status, REASONS[status].encode(), len(body),
+                                b"" if keep_alive else b"Connection: close\r\n") + body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, method, target, payload):
+        url = urlsplit(target)
+        parts = [unquote(part) for part in url.path.strip("/").split("/") if part]
+        try:
+            if method == "GET":
+                query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+                return 200, self.get(parts, query)
+            if method == "POST":
+                try:
+                    body = json.loads(payload) if payload else {}
+                except json.JSONDecodeError:
+                    raise HttpError(400, "Body must be JSON.")
+                if parts == ["flush"]:
+                    await self.request_flush()
+                    return 200, b"true"
+                return 201, await self.post(parts, body)
+            raise HttpError(405, "Only GET and POST are supported.")
+        except HttpError as e:
+            return e.status, json.dumps({"error": str(e)}).encode("utf-8")
+        except Exception as e:
+            logging.exception(f"{method} {target} failed.")
+            return 500, json.dumps({"error": str(e)}).encode("utf-8")
+
+    async def serve(self, started=None):
+        """Serves until shutdown() or cancellation, then applies the queued writes, flushes and releases the store.
+
+        started, if given, is called once the port is bound.
+        """
+        # opened here so the store lock is taken and released by the same thread
+        self.session = DataManager.session()
+        self.loop = asyncio.get_running_loop()
+        self.task = asyncio.current_task()
+        self.queue = asyncio.Queue()
+        writer = asyncio.create_task(self._writer())
+        flusher = asyncio.create_task(self._flush_periodically())
+        try:
+            self.server = await asyncio.start_server(self._handle, self.host, self.port)
+            self.port = self.server.sockets[0].getsockname()[1]
+            with open(self.address_path, "w", encoding="utf-8") as file:
+                file.write(f"{self.host}:{self.port}")
+            logging.info(f"Serving {DataManager.FILE_PATH} on http://{self.host}:{self.port}.")
+            if started is not None:
+                started()
+            async with self.server:
+                await self.server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            flusher.cancel()
+            try:
+                await self.request_flush()
+            finally:
+                writer.cancel()
+                self.session.close()
+                if self.server is not None and os.path.exists(self.address_path):
+                    os.remove(self.address_path)
+                self.closed.set()
+
+    def shutdown(self):
+        """Stops serve() from another thread and waits for the final flush."""
+        if self.task is not None and not self.closed.is_set():
+            self.loop.call_soon_threadsafe(self.task.cancel)
+            self.closed.wait()
+
+    def run(self):
+        asyncio.run(self.serve())
+
+
+class HttpClient:
+    """Forwards daemon operations (see services.daemon.Client) to a running HttpApi.
+
+    The server is found through the address file it writes. OPS are the
+    operations the API has a route for; the CLI refuses the others while it
+    serves, since the store lock is taken.
+    """
+
+    OPS = {"ping", "create_household", "add_user", "add_habit", "complete_habit", "list_habits", "completion_counts",
+           "view_leaderboard", "view_global_leaderboard", "top_performers", "past_rankings", "user_stats",
+           "open_habits", "history"}
+
+    def __init__(self, address_path=None, timeout=10.0):
+        self.address_path = address_path or default_address_path()
+        self.timeout = timeout
+
+    @property
+    def url(self):
+        try:
+            with open(self.address_path, "r", encoding="utf-8") as file:
+                return f"http://{file.read().strip()}"
+        except FileNotFoundError as e:
+            raise ApiUnavailable(self.address_path) from e
+
+    def serving(self):
+        try:
+            self.call("ping")
+        except ApiUnavailable:
+            return False
+        return True
+
+    def request(self, method, path, query=None, body=None):
+        """Sends one request and returns the decoded body, raising HttpError for an error status."""
+        address = urlsplit(self.url)
+        query = {name: value for name, value in (query or {}).items() if value is not None}
+        target = "/" + "/".join(quote(str(part), safe="") for part in path) + (f"?{urlencode(query)}" if query else "")
+        connection = http.client.HTTPConnection(address.hostname, address.port, timeout=self.timeout)
+        try:
+            connection.request(method, target, None if body is None else json.dumps(body))
+            response = connection.getresponse()
+            status, value = response.status, json.loads(response.read())
+        except ConnectionRefusedError as e:
+            # left behind by a server that did not shut down cleanly
+            raise ApiUnavailable(self.address_path) from e
+        finally:
+            connection.close()
+        if status >= 400:
+            raise HttpError(status, value["error"])
+        return value
+
+    def call(self, op, **args):
+        match op:
+            case "ping":
+                return self.request("GET", ["ping"])
+            case "create_household":
+                self.request("POST", ["households"], body={"name": args["household_name"]})
+            case "add_user":
+                self.request("POST", ["users"], body={"username": args["username"], "household": args["household_name"]})
+            case "add_habit":
+                self.request("POST", ["habits"], body={"name": args["name"], "periodicity": args["periodicity"],
+                                                       "points": args["points"], "is_bonus": args.get("is_bonus", False)})
+            case "complete_habit":
+                try:
+                    result = self.request("POST", ["completions"], body={"username": args["username"], "habit": args["habit_name"]})
+                except HttpError as e:
+                    if e.status != 404:
+                        raise
+                    return {"found": False, "is_bonus": False, "success": False}
+                return dict(result, found=True)
+            case "list_habits":
+                return self.request("GET", ["habits"])
+            case "completion_counts":
+                return self.request("GET", ["completion-counts"])
+            case "view_leaderboard":
+                return self.request("GET", ["leaderboard", args["household_name"]], {"top": args.get("top")})
+            case "view_global_leaderboard":
+                return self.request("GET", ["leaderboard"], {"top": args.get("top")})
+            case "top_performers":
+                return self.request("GET", ["top-performers"])
+            case "past_rankings":
+                return self.request("GET", ["past-rankings"])
+            case "user_stats":
+                try:
+                    return self.request("GET", ["users", args["username"], "stats"])
+                except HttpError as e:
+                    if e.status != 404:
+                        raise
+                    return None
+            case "open_habits":
+                return self.request("GET", ["users", args["username"], "open-habits"])
+            case "history":
+                return self.request("GET", ["users", args["username"], "history"],
+                                    {"habit": args.get("habit_name"), "start": args.get("start"), "end": args.get("end")})
+            case _:
+                raise ValueError(f"The HTTP API has no route for '{op}'.")
@@ -0,0 +1,43 @@
+import csv
+import json
+import logging
+from datetime import datetime
+
+
+def parse_timestamp(value):
+    """Accepts ISO timestamps ("2025-03-13T07:30:00") as well as plain dates.
+
+    Timestamps with an offset ("...Z", "+02:00") are converted to naive local
+    time, like every other time the store holds.
+    """
+    timestamp = datetime.fromisoformat(value.strip())
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone().replace(tzinfo=None)
+    return timestamp
+
+
+def read_records(stream, fmt):
+    """Yields (username, habit_name, timestamp) tuples from a CSV or JSON Lines stream.
+
+    CSV input needs a username,habit,timestamp header. Rows that cannot be
+    parsed are logged and skipped.
+    """
+    if fmt == "csv":
+        rows = csv.DictReader(stream)
+    elif fmt == "jsonl":
+        rows = (line for line in stream if line.strip())
+    else:
+        raise ValueError(f"Unsupported format '{fmt}'.")
+
+    for line_number, row in enumerate(rows, start=1):
+        try:
+            if fmt == "jsonl":
+                row = json.loads(row)
+            yield row["username"], row["habit"], parse_timestamp(row["timestamp"])
+        except (KeyError, TypeError, ValueError, AttributeError):
+            logging.warning(f"Skipping malformed record {line_number}: {row}")
+
+
+def detect_format(filename):
+    """Guesses the record format from a file name, defaulting to CSV."""
+    return "jsonl" if filename.endswith((".jsonl", ".ndjson", ".json")) else "csv"
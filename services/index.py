@@ -0,0 +1,54 @@
+from services.metrics import metrics, timed
+
+
+class DataIndex:
+    """Lookup tables over a loaded data document.
+
+    Built once per session and kept in step by the DataManager methods that
+    add households, users and habits, so lookups no longer scan every
+    household's member list or every habit.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.rebuild()
+
+    @timed("index.build")
+    def rebuild(self):
+        """Recomputes every table from the data, e.g. after it was edited directly."""
+        self.household_of = {}
+        self.members = {}
+        for household, details in self.data.get("households", {}).items():
+            self.members[household] = set(details["members"])
+            for username in details["members"]:
+                self.household_of.setdefault(username, household)
+
+        self.habits = {}
+        for habit in self.data.get("habits", []):
+            self.habits.setdefault(habit["name"], habit)
+        self.bonus_habits = {}
+        for habit in self.data.get("bonus_habits", []):
+            self.bonus_habits.setdefault(habit["name"], habit)
+
+    def find_household(self, username):
+        metrics.count("lookup.household")
+        return self.household_of.get(username)
+
+    def is_member(self, username, household):
+        return username in self.members.get(household, ())
+
+    def find_habit(self, habit_name):
+        """Returns the regular habit with this name, falling back to bonus habits."""
+        metrics.count("lookup.habit")
+        return self.habits.get(habit_name) or self.bonus_habits.get(habit_name)
+
+    def add_household(self, household):
+        self.members.setdefault(household, set())
+
+    def add_member(self, username, household):
+        self.members.setdefault(household, set()).add(username)
+        self.household_of.setdefault(username, household)
+
+    def add_habit(self, habit):
+        table = self.bonus_habits if habit.get("is_bonus") else self.habits
+        table.setdefault(habit["name"], habit)
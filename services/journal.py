@@ -0,0 +1,175 @@
+import json
+import logging
+import os
+from datetime import datetime
+from services.metrics import metrics, timed
+from services.storage import Store, file_version
+
+
+# sections journal events can change; others are read straight from the snapshot
+REPLAYED_SECTIONS = {"households", "streaks", "streak_state", "leaderboard", "periods", "history", "aggregates", "completed_habits", "journal_seq"}
+
+
+def read_events(path):
+    """Yields the events in a journal file, skipping lines cut short by a crash."""
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    logging.warning(f"Skipping incomplete journal entry in '{path}'.")
+    except FileNotFoundError:
+        return
+
+
+def apply_event(session, event):
+    """Re-runs a journaled operation against the session's data at its original time."""
+    from services.data_manager import DataManager
+    at = datetime.fromisoformat(event["at"]) if event.get("at") else None
+    if event["type"] == "complete_habit":
+        DataManager.complete_habit(event["username"], event["habit"], session=session, now=at)
+    elif event["type"] == "claim_bonus_habit":
+        DataManager.claim_bonus_habit(event["username"], event["habit"], session=session, now=at)
+    elif event["type"] == "reset_habits":
+        DataManager.reset_habits(session=session, now=at)
+    elif event["type"] == "reset_monthly_scores":
+        DataManager.reset_monthly_scores(session=session)
+    else:
+        logging.warning(f"Unknown journal event '{event['type']}' ignored.")
+
+
+@timed("journal.replay")
+def replay(data, events):
+    """Applies journal events to a loaded snapshot in place."""
+    metrics.count("journal.replayed", len(events))
+    from services.data_manager import Session
+    session = Session(data=data)
+    previous = logging.root.manager.disable
+    logging.disable(logging.INFO)
+    try:
+        for event in events:
+            apply_event(session, event)
+    finally:
+        logging.disable(previous)
+    return data
+
+
+class JournaledStore(Store):
+    """Wraps a store with an append-only JSON Lines journal of completion events.
+
+    Completions, bonus claims and resets are appended to the journal instead of
+    rewriting the snapshot. load() returns the snapshot with the journal tail
+    replayed on top; save() writes a new snapshot and empties the journal. The
+    snapshot remembers the last event it contains (journal_seq), so a crash
+    between the two steps never applies an event twice.
+    """
+
+    COMPACT_AFTER = 1000
+
+    def __init__(self, base, path):
+        self.base = base
+        self.path = path
+        self.seq = 0
+        self.pending = 0
+        self.replayed = None  # (version, data) of the last in-memory replay for reads
+
+    def load(self):
+        data = self.base.load()
+        self.seq = data.get("journal_seq", 0)
+        tail = [event for event in read_events(self.path) if event["seq"] > self.seq]
+        if tail:
+            replay(data, tail)
+            self.seq = tail[-1]["seq"]
+        self.pending = len(tail)
+        return data
+
+    @timed("journal.append")
+    def append(self, data, events):
+        """Durably appends events; compacts once the journal grows past COMPACT_AFTER."""
+        with open(self.path, "a", encoding="utf-8") as file:
+            if file.tell() and not self._ends_with_newline():
+                # terminate a line left incomplete by a crash so it cannot swallow this event
+                file.write("\n")
+            for event in events:
+                self.seq += 1
+                file.write(json.dumps(dict(event, seq=self.seq)) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        self.pending += len(events)
+        if self.pending >= self.COMPACT_AFTER:
+            self.save(data)
+
+    def save(self, data, sections=None):
+        # sections touched by journaled events are not known individually, so
+        # folding a non-empty journal rewrites the whole snapshot
+        if self.pending or sections is None or os.path.exists(self.path):
+            sections = None
+        else:
+            sections = set(sections) | {"journal_seq"}
+        data["journal_seq"] = self.seq
+        self.base.save(data, sections)
+        self.truncate()
+
+    def _ends_with_newline(self):
+        with open(self.path, "rb") as file:
+            file.seek(-1, os.SEEK_END)
+            return file.read(1) == b"\n"
+
+    def compact(self):
+        """Folds the journal into a new snapshot. Returns the number of events folded."""
+        with self.lock():
+            data = self.load()
+            folded = self.pending
+            self.save(data)
+        return folded
+
+    def lock(self):
+        return self.base.lock()
+
+    def version(self):
+        return (self.base.version(), file_version(self.path))
+
+    def truncate(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.pending = 0
+
+    def clear(self):
+        with self.lock():
+            self.base.clear()
+            self.truncate()
+        self.seq = 0
+
+    def _replayed(self):
+        """The snapshot with the journal tail replayed in memory, reused until the store changes.
+
+        Reads never fold the journal: that would rewrite the snapshot under the
+        store lock. Folding is left to COMPACT_AFTER and the compact command.
+        """
+        version = self.version()
+        if self.replayed is None or self.replayed[0] != version:
+            self.replayed = (version, self.load())
+        return self.replayed[1]
+
+    def read_section(self, name, default=None):
+        if name in REPLAYED_SECTIONS and os.path.exists(self.path):
+            return self._replayed().get(name, default)
+        return self.base.read_section(name, default)
+
+    def iter_section(self, name):
+        if name in REPLAYED_SECTIONS and os.path.exists(self.path):
+            return super().iter_section(name)
+        return self.base.iter_section(name)
+
+    def history_between(self, username, start=None, end=None, habit_name=None):
+        if os.path.exists(self.path):
+            return super().history_between(username, start, end, habit_name)
+        return self.base.history_between(username, start, end, habit_name)
+
+    def find_habit(self, habit_name):
+        # no journaled event adds or changes habits
+        return self.base.find_habit(habit_name)
+
+    def find_household(self, username):
+        return self.base.find_household(username)
@@ -1,70 +1,61 @@
 from datetime import datetime
 import logging
-import json
-
-DATA_FILE = "data.json"
+from services.aggregates import TOP_K
+from services.metrics import timed
+from services.ranking import RankingIndex
 
 class Leaderboard:
-    def __init__(self):
-        self.data = self.load_data()  
+    def __init__(self, session=None):
+        self.session = session
+        self.data = session.data if session is not None else self.load_data()
         self.rankings = self.data["leaderboard"]["rankings"]
         self.past_rankings = self.data["leaderboard"]["past_rankings"]
         self.top_performers = {}
+        self.index = session.rankings if session is not None else RankingIndex(self.rankings)
 
     def load_data(self):
-        """Load the full data.json file or create a default structure if empty."""
-        try:
-            with open(DATA_FILE, "r") as f:
-                content = f.read().strip()
-                if content:  
-                    return json.loads(content)
-                else:
-                    logging.warning("data.json was empty, initializing default structure.")
-                    return {
-                        "households": {},
-                        "habits": [],
-                        "bonus_habits": [],
-                        "leaderboard": {"rankings": {}, "past_rankings": []},
-                        "streaks": {},
-                    }
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            logging.warning(f"Error loading data.json: {e}")
-            return {
-                "households": {},
-                "habits": [],
-                "bonus_habits": [],
-                "leaderboard": {"rankings": {}, "past_rankings": []},
-                "streaks": {},
-            }
-
+        """Load only the leaderboard section of the store."""
+        from services.data_manager import DataManager
+        leaderboard = DataManager.store().read_section("leaderboard") or {"rankings": {}, "past_rankings": []}
+        return {"leaderboard": leaderboard}
 
     def save_data(self):
-        """Save leaderboard updates back to data.json."""
-        with open(DATA_FILE, "w") as f:
-            json.dump(self.data, f, indent=4)
+        """Save leaderboard updates back to the store, or defer them to the session."""
+        if self.session is not None:
+            self.session.mark_dirty("leaderboard")
+            return
+        from services.data_manager import DataManager
+        with DataManager.session() as s:
+            s.data["leaderboard"] = self.data["leaderboard"]
+            s.mark_dirty("leaderboard")
 
     @staticmethod
-    def update(user):
-        from services.data_manager import DataManager
+    @timed("leaderboard.update")
+    def update(user, session=None):
         """Update the leaderboard rankings after a user's points change."""
-        data = DataManager.load_data()
-
-        household_name = user.household
-        if household_name not in data["leaderboard"]["rankings"]:
-            data["leaderboard"]["rankings"][household_name] = {}
-
-        data["leaderboard"]["rankings"][household_name][user.username] = user.points
-
-        sorted_rankings = dict(sorted(
-            data["leaderboard"]["rankings"][household_name].items(),
-            key=lambda item: item[1],  
-            reverse=True  
-        ))
-        data["leaderboard"]["rankings"][household_name] = sorted_rankings
+        from services.data_manager import DataManager
+        with DataManager._session(session) as s:
+            s.rankings.set(user.household, user.username, user.points)
+            s.aggregates.ranked(user.username, user.household, user.points, s.rankings)
+            s.mark_dirty("leaderboard", "aggregates")
+            rank = s.rankings.household(user.household).rank_of(user.username)
 
-        DataManager.save_data(data)
+        logging.info(f"Leaderboard updated for {user.household}: {user.username} is #{rank} with {user.points} points.")
 
-        logging.info(f"Leaderboard updated for {household_name}: {sorted_rankings}")
+    @staticmethod
+    @timed("leaderboard.update")
+    def update_many(users, session=None):
+        """Update the rankings for many users at once."""
+        from services.data_manager import DataManager
+        with DataManager._session(session) as s:
+            households = set()
+            for user in users:
+                s.rankings.set(user.household, user.username, user.points)
+                s.aggregates.ranked(user.username, user.household, user.points, s.rankings)
+                households.add(user.household)
+            if households:
+                s.mark_dirty("leaderboard", "aggregates")
+        logging.info(f"Leaderboard updated for {len(households)} households.")
 
     def reset_monthly(self):
         """Resets rankings at the end of each month, storing past rankings."""
@@ -75,21 +66,75 @@ class Leaderboard:
             "rankings": self.rankings.copy()
         })
 
-        all_scores = [(user, points) for household in self.rankings.values() for user, points in household.items()]
-        if all_scores:
-            top_user, top_points = max(all_scores, key=lambda x: x[1])
+        top = None
+        if len(self.index.overall):
+            (top_user, _), top_points = self.index.overall.top(1)[0]
             self.data["leaderboard"]["past_rankings"].append({"month": now, "top_user": top_user, "points": top_points})
+            top = (top_user, top_points)
 
-        self.rankings.clear()
+        self.index.clear()
+        from services.data_manager import DataManager
+        with DataManager._session(self.session) as s:
+            if top is not None:
+                s.aggregates.archive(now, *top)
+            s.aggregates.values["top"] = []
+            s.mark_dirty("aggregates")
         self.save_data()
 
     def get_sorted_rankings(self, household_name):
         """Returns sorted rankings for a household."""
-        if household_name not in self.rankings:
+        ranking = self.index.household(household_name)
+        if ranking is None:
             logging.warning(f"No rankings found for household '{household_name}'.")
             return {}
-        return dict(sorted(self.rankings[household_name].items(), key=lambda item: item[1], reverse=True))
+        return dict(ranking.items())
+
+    def get_top(self, household_name, k):
+        """Returns the k best (username, points) pairs of a household."""
+        ranking = self.index.household(household_name)
+        return ranking.top(k) if ranking is not None else []
+
+    def get_rank(self, household_name, username):
+        """Returns a user's 1-based rank within their household, or None."""
+        ranking = self.index.household(household_name)
+        return ranking.rank_of(username) if ranking is not None else None
+
+    def get_range(self, household_name, start, stop):
+        """Returns the (username, points) pairs ranked start..stop in a household."""
+        ranking = self.index.household(household_name)
+        return ranking.range(start, stop) if ranking is not None else []
+
+    def get_global_rankings(self, k=None):
+        """Returns (username, household, points) across all households, best first."""
+        entries = self.index.overall.items() if k is None else self.index.overall.top(k)
+        return [(username, household, points) for (username, household), points in entries]
+
+    @staticmethod
+    def snapshot(k=None, session=None):
+        """Global rankings served from DataManager's analytics cache."""
+        from services.data_manager import DataManager, Session
+        from services.storage import LazyDocument
+
+        def compute(data):
+            aggregates = data.get("aggregates")
+            if k is not None and k <= TOP_K and aggregates is not None:
+                # the materialized top, without building the rankings
+                return [tuple(entry) for entry in aggregates["top"][:k]]
+            if isinstance(data, LazyDocument) and hasattr(data.store, "global_rankings"):
+                # a sharded store merges each shard's top k instead of loading every ranking
+                return data.store.global_rankings(k)
+            return Leaderboard(session=Session(data=data)).get_global_rankings(k)
+        return DataManager.cached(("global_rankings", k), compute, session)
+
+    def get_global_rank(self, username, household_name):
+        """Returns a user's 1-based rank across all households, or None."""
+        return self.index.overall.rank_of((username, household_name))
 
     def get_top_performers(self):
-        """Returns the top user for each month with their score."""
-        return self.data["leaderboard"]["past_rankings"]
+        """Returns {month: (username, points)} of the top user of each archived month."""
+        from services.data_manager import DataManager
+        return {month: tuple(best) for month, best in DataManager.aggregates(self.session)["top_performers"].items()}
+
+    def get_past_rankings(self):
+        """Returns the archived {"month", "rankings"} entries, oldest first."""
+        return [entry for entry in self.past_rankings if "rankings" in entry]
@@ -0,0 +1,121 @@
+import os
+import random
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class StoreLockTimeout(TimeoutError):
+    """Raised when another process holds the store lock for longer than the timeout."""
+
+
+# lock path -> [thread lock, file descriptor, depth]; makes FileLock reentrant
+# within a process, where a second flock() on a new descriptor would deadlock
+_held = {}
+_held_guard = threading.Lock()
+
+
+class FileLock:
+    """Exclusive advisory lock on <path>, retried with exponential backoff.
+
+    Guards the read-modify-write cycle of a session against other processes.
+    Re-acquiring a lock this process already holds only increments a counter.
+    """
+
+    TIMEOUT = 10.0
+    INITIAL_DELAY = 0.005
+    MAX_DELAY = 0.25
+
+    def __init__(self, path, timeout=None):
+        self.path = os.path.abspath(path)
+        self.timeout = self.TIMEOUT if timeout is None else timeout
+
+    def acquire(self):
+        with _held_guard:
+            entry = _held.setdefault(self.path, [threading.RLock(), None, 0])
+        if not entry[0].acquire(timeout=self.timeout):
+            raise StoreLockTimeout(f"Timed out waiting for '{self.path}'.")
+        if entry[2] == 0:
+            try:
+                entry[1] = self._lock_file()
+            except BaseException:
+                entry[0].release()
+                raise
+        entry[2] += 1
+        return self
+
+    def release(self):
+        entry = _held[self.path]
+        entry[2] -= 1
+        if entry[2] == 0:
+            self._unlock_file(entry[1])
+            entry[1] = None
+        entry[0].release()
+
+    def _lock_file(self):
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = time.monotonic() + self.timeout
+        delay = self.INITIAL_DELAY
+        while True:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                return fd
+            except OSError:
+                if time.monotonic() >= deadline:
+                    os.close(fd)
+                    raise StoreLockTimeout(f"Timed out waiting for '{self.path}'.")
+                # jitter keeps competing processes from retrying in lockstep
+                time.sleep(delay * random.uniform(0.5, 1.5))
+                delay = min(delay * 2, self.MAX_DELAY)
+
+    def _unlock_file(self, fd):
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+
+def atomic_write(path, content, mode="w"):
+    """Replaces a file via write-to-temp, fsync and rename, so readers never see half a file."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, **({"encoding": "utf-8"} if "b" not in mode else {})) as file:
+            file.write(content)
+            file.flush()
+            os.fsync(file.fileno())
+        try:
+            os.chmod(temp_path, os.stat(path).st_mode)
+        except FileNotFoundError:
+            os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    if hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
@@ -0,0 +1,122 @@
+import json
+import os
+import time
+from contextlib import nullcontext
+from datetime import datetime
+from functools import wraps
+
+_IDLE = nullcontext()
+
+
+class _Timer:
+    __slots__ = ("metrics", "phase", "started", "children")
+
+    def __init__(self, metrics, phase):
+        self.metrics = metrics
+        self.phase = phase
+
+    def __enter__(self):
+        self.children = 0.0
+        self.metrics._stack.append(self)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.started
+        stack = self.metrics._stack
+        stack.pop()
+        entry = self.metrics.timers.get(self.phase)
+        if entry is None:
+            entry = self.metrics.timers[self.phase] = [0, 0.0, 0.0]
+        entry[0] += 1
+        entry[1] += elapsed
+        entry[2] += elapsed - self.children
+        if stack:
+            stack[-1].children += elapsed
+        return False
+
+
+class Metrics:
+    """Timers and counters around the hot paths (store I/O, lookups, streak and ranking updates).
+
+    Disabled by default, in which case timer() hands back a shared no-op
+    context and count() returns at once, so instrumented code costs a flag
+    check. Timers nest: each phase records its calls, total time and self
+    time (total minus the phases timed inside it), so the self times of all
+    phases add up to the instrumented part of a command.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.timers = {}  # phase -> [calls, seconds, self seconds]
+        self.counters = {}
+        self._stack = []
+
+    def enable(self):
+        self.reset()
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        self.timers.clear()
+        self.counters.clear()
+        self._stack.clear()
+
+    def timer(self, phase):
+        """Context manager timing one phase."""
+        if not self.enabled:
+            return _IDLE
+        return _Timer(self, phase)
+
+    def count(self, name, n=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def snapshot(self):
+        return {
+            "timers": {phase: {"calls": calls, "seconds": seconds, "self_seconds": own}
+                       for phase, (calls, seconds, own) in self.timers.items()},
+            "counters": dict(self.counters),
+        }
+
+    def report(self, wall_seconds=None):
+        """Per-phase breakdown as printable lines, slowest self time first."""
+        lines = [f"{'phase':<22}{'calls':>8}{'total ms':>12}{'self ms':>12}"]
+        for phase, (calls, seconds, own) in sorted(self.timers.items(), key=lambda item: -item[1][2]):
+            lines.append(f"{phase:<22}{calls:>8}{seconds * 1000:>12.2f}{own * 1000:>12.2f}")
+        if wall_seconds is not None:
+            covered = sum(own for _, _, own in self.timers.values())
+            lines.append(f"{'(other)':<22}{'':>8}{'':>12}{max(wall_seconds - covered, 0) * 1000:>12.2f}")
+            lines.append(f"{'total':<22}{'':>8}{wall_seconds * 1000:>12.2f}")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"{name:<22}{value:>8}")
+        return lines
+
+    def append(self, path, **fields):
+        """Appends the current metrics, plus fields such as the command, as one JSON line."""
+        record = dict(fields, at=datetime.now().isoformat(), **self.snapshot())
+        with open(path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(record) + "\n")
+        return record
+
+
+metrics = Metrics()
+
+
+def timed(phase):
+    """Decorator timing every call of a function as `phase` while metrics are enabled."""
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not metrics.enabled:
+                return fn(*args, **kwargs)
+            with _Timer(metrics, phase):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def default_metrics_path(data_path):
+    return os.environ.get("HOMESTREAK_METRICS", f"{data_path}.metrics.jsonl")
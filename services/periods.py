@@ -0,0 +1,146 @@
+from datetime import date, datetime
+from services.metrics import timed
+
+GRANULARITIES = ("day", "week", "month")
+
+
+def period_of(when, granularity):
+    """Integer ordinal of the day, Monday-based (ISO) week or month containing `when`."""
+    if granularity == "day":
+        return when.toordinal()
+    if granularity == "week":
+        return (when.toordinal() - 1) // 7
+    if granularity == "month":
+        return when.year * 12 + when.month - 1
+    raise ValueError(f"Unknown granularity '{granularity}'.")
+
+
+def granularity_of(periodicity):
+    return "week" if periodicity == "weekly" else "day"
+
+
+def claim_period(key):
+    """(granularity, ordinal) of a completed_habits key ("%Y-%m-%d" or "%Y-%W")."""
+    try:
+        return "day", period_of(datetime.strptime(key, "%Y-%m-%d"), "day")
+    except ValueError:
+        return "week", period_of(datetime.strptime(f"{key}-1", "%Y-%W-%w"), "week")
+
+
+class PeriodIndex:
+    """Completions bucketed by day, week and month: {period ordinal: {habit: {username: count}}}.
+
+    Stored in the data's "periods" section, with ordinals as string keys since
+    it is JSON. Every completion is counted in all three buckets, so day and
+    week buckets older than the retention window can simply be dropped: their
+    counts live on in the month buckets. The newest dropped ordinal per
+    granularity is kept under "pruned", and a completion backfilled at or below
+    it only goes into its month bucket. Lookups for one period are dict hits;
+    range queries touch one bucket per day (or month) in the range.
+    """
+
+    RETENTION = {"day": 62, "week": 16}
+
+    @timed("periods.build")
+    def __init__(self, data):
+        self.data = data
+        seed = "periods" not in data
+        self.buckets = data.setdefault("periods", {})
+        for granularity in GRANULARITIES:
+            self.buckets.setdefault(granularity, {})
+        self.pruned = self.buckets.setdefault("pruned", {})
+        if seed:
+            self._seed(data.get("completed_habits", {}))
+
+    def _seed(self, completed_habits):
+        """Indexes the bonus claims of data written before the index existed."""
+        claims = []
+        for key, claimed in completed_habits.items():
+            granularity, ordinal = claim_period(key)
+            start = date.fromordinal(ordinal if granularity == "day" else ordinal * 7 + 1)
+            claims.extend((start, habit_name, username) for habit_name, username in claimed.items())
+        for start, habit_name, username in sorted(claims):
+            self.add(start, habit_name, username)
+
+    def add(self, when, habit_name, username):
+        """Counts a completion in its day, week and month bucket."""
+        for granularity in GRANULARITIES:
+            period = period_of(when, granularity)
+            if period <= self.pruned.get(granularity, period - 1):
+                continue
+            key = str(period)
+            bucket = self.buckets[granularity].get(key)
+            if bucket is None:
+                bucket = self.buckets[granularity][key] = {}
+                self.prune(when, granularity)
+            per_habit = bucket.setdefault(habit_name, {})
+            per_habit[username] = per_habit.get(username, 0) + 1
+
+    def prune(self, when, granularity=None):
+        """Drops day and week buckets older than their retention window. Returns how many were dropped."""
+        dropped = 0
+        for name in ((granularity,) if granularity else self.RETENTION):
+            if name not in self.RETENTION:
+                continue
+            oldest = period_of(when, name) - self.RETENTION[name]
+            self.pruned[name] = max(self.pruned.get(name, oldest), oldest)
+            buckets = self.buckets[name]
+            for key in [key for key in buckets if int(key) <= oldest]:
+                del buckets[key]
+                dropped += 1
+        return dropped
+
+    def bucket(self, granularity, period):
+        return self.buckets[granularity].get(str(period), {})
+
+    def who(self, habit_name, granularity, when):
+        """{username: count} of everyone who completed the habit in the period containing `when`."""
+        return dict(self.bucket(granularity, period_of(when, granularity)).get(habit_name, {}))
+
+    def count(self, habit_name, username, granularity, period):
+        return self.bucket(granularity, period).get(habit_name, {}).get(username, 0)
+
+    def open_habits(self, username, habits, when):
+        """Names of the habits still open for the user in the current period.
+
+        A regular habit is open until the user completes it this day or week;
+        a bonus habit is open until anyone claims it, since bonus claims are
+        first come, first served across all households.
+        """
+        still_open = []
+        for habit in habits:
+            granularity = granularity_of(habit["periodicity"])
+            done = self.bucket(granularity, period_of(when, granularity)).get(habit["name"], {})
+            if not done if habit.get("is_bonus") else username not in done:
+                still_open.append(habit["name"])
+        return still_open
+
+    def between(self, start, end):
+        """{habit: {username: count}} for completions from start to end (dates, inclusive).
+
+        Days still in the index are summed one bucket per day; days before that
+        fall back to month buckets, so an old range is rounded out to whole months.
+        """
+        totals = {}
+        day, last = start.toordinal(), end.toordinal()
+        if "day" in self.pruned:
+            retained = self.pruned["day"] + 1
+        else:
+            retained = min(map(int, self.buckets["day"]), default=last + 1)
+        if day < retained:
+            old_end = date.fromordinal(min(last, retained - 1))
+            for month in range(period_of(start, "month"), period_of(old_end, "month") + 1):
+                self._accumulate(totals, self.bucket("month", month))
+            # that last month bucket also counts the retained days of its month
+            following = period_of(old_end, "month") + 1
+            day = max(day, date(following // 12, following % 12 + 1, 1).toordinal())
+        for ordinal in range(day, last + 1):
+            self._accumulate(totals, self.bucket("day", ordinal))
+        return totals
+
+    @staticmethod
+    def _accumulate(totals, bucket):
+        for habit_name, counts in bucket.items():
+            per_habit = totals.setdefault(habit_name, {})
+            for username, count in counts.items():
+                per_habit[username] = per_habit.get(username, 0) + count
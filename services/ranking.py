@@ -0,0 +1,102 @@
+from bisect import bisect_left, bisect_right, insort
+from services.metrics import timed
+
+
+class Ranking:
+    """Scores kept in rank order in a bisect-maintained list of (-points, key).
+
+    Finding an entry is O(log n) and top-k, rank-of and range queries read
+    straight from the ordered list without sorting. Equal scores are ordered
+    by key and share the same rank.
+    """
+
+    def __init__(self, scores=()):
+        self.points = dict(scores)
+        self._order = sorted((-points, key) for key, points in self.points.items())
+
+    def __len__(self):
+        return len(self._order)
+
+    def __contains__(self, key):
+        return key in self.points
+
+    def set(self, key, points):
+        """Adds a key or moves it to its new position."""
+        old = self.points.get(key)
+        if old is not None:
+            if old == points:
+                return
+            del self._order[bisect_left(self._order, (-old, key))]
+        self.points[key] = points
+        insort(self._order, (-points, key))
+
+    def remove(self, key):
+        old = self.points.pop(key, None)
+        if old is not None:
+            del self._order[bisect_left(self._order, (-old, key))]
+
+    def clear(self):
+        self.points.clear()
+        self._order.clear()
+
+    def rank_of(self, key):
+        """1-based rank of a key (ties share the best rank), or None if unranked."""
+        if key not in self.points:
+            return None
+        return bisect_left(self._order, (-self.points[key],)) + 1
+
+    def top(self, k):
+        """The k best (key, points) pairs."""
+        return [(key, -negated) for negated, key in self._order[:k]]
+
+    def range(self, start, stop):
+        """(key, points) pairs for ranks start..stop (1-based, inclusive)."""
+        return [(key, -negated) for negated, key in self._order[max(start - 1, 0):stop]]
+
+    def between(self, low, high):
+        """(key, points) pairs with low <= points <= high, best first."""
+        first = bisect_left(self._order, -high, key=lambda entry: entry[0])
+        last = bisect_right(self._order, -low, key=lambda entry: entry[0])
+        return [(key, -negated) for negated, key in self._order[first:last]]
+
+    def items(self):
+        return [(key, -negated) for negated, key in self._order]
+
+
+class RankingIndex:
+    """Ordered rankings per household plus a global one over every household.
+
+    Wraps the leaderboard's "rankings" section and keeps it in step, so points
+    are still stored as plain {username: points} dicts per household.
+    """
+
+    @timed("rankings.build")
+    def __init__(self, rankings):
+        self.rankings = rankings
+        self.households = {household: Ranking(scores.items()) for household, scores in rankings.items()}
+        self.overall = Ranking(
+            ((username, household), points)
+            for household, scores in rankings.items()
+            for username, points in scores.items()
+        )
+
+    def set(self, household, username, points):
+        self.rankings.setdefault(household, {})[username] = points
+        self.households.setdefault(household, Ranking()).set(username, points)
+        self.overall.set((username, household), points)
+
+    def household(self, household):
+        return self.households.get(household)
+
+    def remove_household(self, household):
+        """Drops a household's scores, e.g. when its month is archived."""
+        self.rankings.pop(household, None)
+        ranking = self.households.pop(household, None)
+        if ranking is not None:
+            for username in ranking.points:
+                self.overall.remove((username, household))
+
+    def clear(self):
+        self.rankings.clear()
+        self.households.clear()
+        self.overall.clear()
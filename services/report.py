@@ -0,0 +1,155 @@
+import csv
+import html
+import json
+import mmap
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from services import snapshot
+from services.history import CompletionHistory
+
+# the sections a household report reads
+SECTIONS = ("households", "habits", "bonus_habits", "streaks", "history", "aggregates")
+FORMATS = ("json", "csv", "html")
+WORKERS = int(os.environ.get("HOMESTREAK_REPORT_WORKERS", str(os.cpu_count() or 1)))
+
+# set in each worker process by _open_snapshot
+_shared = None
+
+
+def month_range(month):
+    """First and last day of a "MM-YYYY" month."""
+    start = datetime.strptime(month, "%m-%Y").date()
+    end = date(start.year + start.month // 12, start.month % 12 + 1, 1) - timedelta(days=1)
+    return start, end
+
+
+def household_report(data, household, month):
+    """Rankings, streaks and per-habit statistics of one household for a "MM-YYYY" month."""
+    start, end = month_range(month)
+    details = data["households"][household]
+    members = details["members"]
+    earned = data.get("aggregates", {}).get("monthly", {}).get(month, {})
+    rankings = sorted(((username, earned.get(username, 0)) for username in members), key=lambda item: (-item[1], item[0]))
+    history = CompletionHistory({"history": data.get("history", {})})
+    habits = {}
+    for habit in data.get("habits", []) + data.get("bonus_habits", []):
+        by_user = {username: history.count(username, habit["name"], start, end) for username in members}
+        by_user = {username: count for username, count in by_user.items() if count}
+        if by_user:
+            completions = sum(by_user.values())
+            habits[habit["name"]] = {"completions": completions, "points": completions * habit["points"], "by_user": by_user}
+    streaks = {username: dict(data.get("streaks", {}).get(username, {})) for username in members}
+    return {
+        "household": household,
+        "month": month,
+        "rankings": rankings,
+        "points": {username: details["points"].get(username, 0) for username in members},
+        "streaks": streaks,
+        "best_streaks": {username: max(per_habit.values(), default=0) for username, per_habit in streaks.items()},
+        "habits": habits,
+        "top_performer": rankings[0] if rankings and rankings[0][1] else None,
+    }
+
+
+def _open_snapshot(path):
+    """Worker initializer: decodes the memory-mapped snapshot once per process."""
+    global _shared
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+        _shared = snapshot.decode(view)
+
+
+def _reports(households, month):
+    return [household_report(_shared, household, month) for household in households]
+
+
+class Reports:
+    """Monthly summaries per household, built concurrently.
+
+    The parent writes the sections the reports need to a binary snapshot
+    once; each worker process memory-maps it and decodes them, so the data
+    is not pickled into every worker and the file pages are shared through
+    the page cache. Households are handed out in chunks and the reports come
+    back in household order.
+    """
+
+    @staticmethod
+    def generate(month=None, households=None, workers=None, session=None):
+        """Reports for the given households (default: all) and "MM-YYYY" month (default: this month)."""
+        from services.data_manager import DataManager
+        month = month or datetime.now().strftime("%m-%Y")
+        month_range(month)
+        workers = WORKERS if workers is None else workers
+        with DataManager._session(session) as s:
+            # seed the history and aggregates of older data before sharing it
+            s.history
+            s.aggregates
+            data = {name: s.data[name] for name in SECTIONS if name in s.data}
+        names = list(data["households"]) if households is None else [name for name in households if name in data["households"]]
+        if workers <= 1 or len(names) < 2:
+            return [household_report(data, household, month) for household in names]
+
+        workers = min(workers, len(names))
+        # a few chunks per worker evens out households of different sizes
+        size = max(1, len(names) // (workers * 4))
+        chunks = [names[i:i + size] for i in range(0, len(names), size)]
+        fd, path = tempfile.mkstemp(suffix=".snapshot")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(snapshot.encode(data))
+            with ProcessPoolExecutor(max_workers=workers, initializer=_open_snapshot, initargs=(path,)) as pool:
+                return [report for chunk in pool.map(_reports, chunks, [month] * len(chunks)) for report in chunk]
+        finally:
+            os.remove(path)
+
+    @staticmethod
+    def write(reports, directory, formats=FORMATS, month=None):
+        """Writes report-<month>.json/.csv/.html to directory; returns the paths."""
+        month = month or (reports[0]["month"] if reports else datetime.now().strftime("%m-%Y"))
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for fmt in formats:
+            path = os.path.join(directory, f"report-{month}.{fmt}")
+            with open(path, "w", encoding="utf-8", newline="" if fmt == "csv" else None) as file:
+                getattr(Reports, f"_write_{fmt}")(reports, file)
+            paths.append(path)
+        return paths
+
+    @staticmethod
+    def _write_json(reports, file):
+        json.dump(reports, file, indent=4)
+
+    @staticmethod
+    def _write_csv(reports, file):
+        writer = csv.writer(file)
+        writer.writerow(["household", "rank", "username", "month_points", "points", "best_streak", "completions"])
+        for report in reports:
+            completions = {}
+            for habit in report["habits"].values():
+                for username, count in habit["by_user"].items():
+                    completions[username] = completions.get(username, 0) + count
+            for rank, (username, earned) in enumerate(report["rankings"], 1):
+                writer.writerow([report["household"], rank, username, earned, report["points"][username],
+                                 report["best_streaks"][username], completions.get(username, 0)])
+
+    @staticmethod
+    def _write_html(reports, file):
+        e = html.escape
+        month = e(reports[0]["month"]) if reports else ""
+        file.write(f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>HomeStreak report {month}</title></head><body>\n")
+        for report in reports:
+            file.write(f"<h2>{e(report['household'])}</h2>\n")
+            if report["top_performer"]:
+                username, earned = report["top_performer"]
+                file.write(f"<p>Top performer: {e(username)} with {earned} points</p>\n")
+            file.write("<table>\n<tr><th>Rank</th><th>User</th><th>Points this month</th><th>Best streak</th></tr>\n")
+            for rank, (username, earned) in enumerate(report["rankings"], 1):
+                file.write(f"<tr><td>{rank}</td><td>{e(username)}</td><td>{earned}</td><td>{report['best_streaks'][username]}</td></tr>\n")
+            file.write("</table>\n")
+            if report["habits"]:
+                file.write("<table>\n<tr><th>Habit</th><th>Completions</th><th>Points</th></tr>\n")
+                for name, stats in report["habits"].items():
+                    file.write(f"<tr><td>{e(name)}</td><td>{stats['completions']}</td><td>{stats['points']}</td></tr>\n")
+                file.write("</table>\n")
+        file.write("</body></html>\n")
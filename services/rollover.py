@@ -0,0 +1,126 @@
+import heapq
+import logging
+from datetime import datetime, timedelta
+from services.periods import granularity_of, period_of
+
+
+def next_boundary(when, cadence):
+    """Start of the day, Monday-based week or month following `when`."""
+    day = datetime(when.year, when.month, when.day)
+    if cadence == "daily":
+        return day + timedelta(days=1)
+    if cadence == "weekly":
+        return day + timedelta(days=7 - day.weekday())
+    if cadence == "monthly":
+        return datetime(when.year + when.month // 12, when.month % 12 + 1, 1)
+    raise ValueError(f"Unknown cadence '{cadence}'.")
+
+
+class Rollover:
+    """Period rollover driven by a persistent min-heap of deadlines.
+
+    The data's "schedule" section is a heapq-ordered list of
+    [deadline, kind, name] entries: one per regular habit (its next day or
+    week boundary) and one per household (its next month boundary). A run
+    pops only the entries whose deadline has passed, so its work grows with
+    the number of due items, and reschedules each one after `now`, which
+    makes repeated runs (e.g. from cron every minute) no-ops until the next
+    boundary. Due habits expire the streaks of users who missed the period
+    that ended; due households archive their monthly rankings and zero their
+    points. Everything is written in one session.
+    """
+
+    @staticmethod
+    def schedule(data, kind, name, now=None):
+        """Queues a habit or household for its next rollover, if the data has a schedule yet."""
+        if "schedule" not in data:
+            return False
+        if kind == "habit":
+            habit = next((h for h in data.get("habits", []) if h["name"] == name), None)
+            cadence = habit["periodicity"]
+        else:
+            cadence = "monthly"
+        heapq.heappush(data["schedule"], [next_boundary(now or datetime.now(), cadence).isoformat(), kind, name])
+        return True
+
+    @staticmethod
+    def _seed(data, now):
+        """Builds the schedule for data written before it existed."""
+        data["schedule"] = []
+        for habit in data.get("habits", []):
+            Rollover.schedule(data, "habit", habit["name"], now)
+        for household in data.get("households", {}):
+            Rollover.schedule(data, "household", household, now)
+
+    @staticmethod
+    def due(store, now):
+        """True if the store has entries past their deadline (or no schedule yet). Reads only the schedule."""
+        schedule = store.read_section("schedule")
+        return schedule is None or bool(schedule) and schedule[0][0] <= now.isoformat()
+
+    @staticmethod
+    def run(now=None, session=None):
+        """Processes every due entry. Returns counts of what was rolled over."""
+        from services.data_manager import DataManager
+        now = now or datetime.now()
+        stats = {"habits": 0, "households": 0, "expired_streaks": 0}
+        if session is None and not Rollover.due(DataManager.store(), now):
+            return stats
+
+        with DataManager._session(session) as s:
+            data = s.data
+            if "schedule" not in data:
+                Rollover._seed(data, now)
+                s.mark_dirty("schedule")
+            heap = data["schedule"]
+            while heap and heap[0][0] <= now.isoformat():
+                deadline, kind, name = heapq.heappop(heap)
+                if kind == "habit":
+                    habit = s.index.habits.get(name)
+                    if habit is None:
+                        continue
+                    stats["expired_streaks"] += Rollover._expire_streaks(s, habit, now)
+                    stats["habits"] += 1
+                elif kind == "household":
+                    if name not in data["households"]:
+                        continue
+                    Rollover._archive_month(s, name, datetime.fromisoformat(deadline))
+                    stats["households"] += 1
+                Rollover.schedule(data, kind, name, now)
+                s.mark_dirty("schedule")
+
+        logging.info(f"Rolled over {stats['habits']} habits and {stats['households']} households; "
+                     f"{stats['expired_streaks']} streaks expired.")
+        return stats
+
+    @staticmethod
+    def _expire_streaks(session, habit, now):
+        """Zeroes the streaks of users who completed the habit neither this period nor the last."""
+        current = period_of(now, granularity_of(habit["periodicity"]))
+        expired = 0
+        for username, streaks in session.data.get("streaks", {}).items():
+            if streaks.get(habit["name"]) and session.user(username).expire_streak(habit["name"], current):
+                expired += 1
+        if expired:
+            session.mark_dirty("streaks", "streak_state")
+        return expired
+
+    @staticmethod
+    def _archive_month(session, household, deadline):
+        """Archives a household's rankings for the month ending at `deadline` and zeroes its points."""
+        month = (deadline - timedelta(days=1)).strftime("%m-%Y")
+        leaderboard = session.data["leaderboard"]
+        ranking = session.rankings.household(household)
+        leaderboard["past_rankings"].append({"month": month, "rankings": {household: dict(leaderboard["rankings"].get(household, {}))}})
+        if ranking is not None and len(ranking):
+            top_user, top_points = ranking.top(1)[0]
+            leaderboard["past_rankings"].append({"month": month, "top_user": top_user, "points": top_points})
+            session.aggregates.archive(month, top_user, top_points)
+        session.rankings.remove_household(household)
+        session.aggregates.rerank(session.rankings)
+        session.aggregates.reset_household(household)
+
+        points = session.data["households"][household]["points"]
+        for username in points:
+            points[username] = 0
+        session.mark_dirty("households", "leaderboard", "aggregates")
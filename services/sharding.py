@@ -0,0 +1,376 @@
+import heapq
+import json
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
+from services.aggregates import TOP_K, top_k
+from services.locking import atomic_write
+from services.ranking import RankingIndex
+from services.storage import Store, StorageError, file_version, open_store
+
+SHARDS = int(os.environ.get("HOMESTREAK_SHARDS", "4"))
+SHARD_BACKEND = os.environ.get("HOMESTREAK_SHARD_BACKEND", ".json")
+WORKERS = int(os.environ.get("HOMESTREAK_SHARD_WORKERS", str(os.cpu_count() or 1)))
+# below this many bytes across all shards, starting worker processes costs more than it saves
+PARALLEL_BYTES = 1 << 20
+
+# sections every shard holds a full copy of, so a shard can complete habits on its own
+REPLICATED = ("habits", "bonus_habits")
+
+
+def shard_of(household, shards):
+    """Shard number of a household. crc32, unlike hash(), is the same in every process."""
+    return zlib.crc32(household.encode("utf-8")) % shards
+
+
+def user_shards(data, shards):
+    """{username: shard} for every household member in the document."""
+    return {username: shard_of(household, shards)
+            for household, details in data.get("households", {}).items() for username in details["members"]}
+
+
+def split(data, shards):
+    """Partitions a data document into one document per shard.
+
+    Households and their rankings go to the household's shard; streaks and
+    their state, completion history, bonus claims, period counts and archived
+    top users follow the user's household, as do the aggregates' household
+    totals and monthly points; habit counts and top performers go to shard 0
+    and each shard keeps the top of its own households. Habits are copied to
+    every shard. The schedule's household entries follow the household and
+    its habit entries, like any other section, go to shard 0.
+    """
+    users = user_shards(data, shards)
+    docs = [{} for _ in range(shards)]
+    for name, value in data.items():
+        if name == "journal_seq":
+            continue
+        if name in REPLICATED:
+            for doc in docs:
+                doc[name] = value
+        elif name == "households":
+            for doc in docs:
+                doc[name] = {}
+            for household, details in value.items():
+                docs[shard_of(household, shards)][name][household] = details
+        elif name in ("streaks", "streak_state", "history"):
+            for doc in docs:
+                doc[name] = {}
+            for username, streaks in value.items():
+                docs[users.get(username, 0)][name][username] = streaks
+        elif name == "completed_habits":
+            for doc in docs:
+                doc[name] = {}
+            for period, claimed in value.items():
+                for habit_name, username in claimed.items():
+                    docs[users.get(username, 0)][name].setdefault(period, {})[habit_name] = username
+        elif name == "periods":
+            for doc in docs:
+                doc[name] = {granularity: {} for granularity in value}
+                # every shard prunes the same windows, so each keeps the cutoffs
+                doc[name]["pruned"] = dict(value.get("pruned", {}))
+            for granularity, buckets in value.items():
+                if granularity == "pruned":
+                    continue
+                for key, bucket in buckets.items():
+                    for habit_name, counts in bucket.items():
+                        for username, count in counts.items():
+                            shard_bucket = docs[users.get(username, 0)][name][granularity].setdefault(key, {})
+                            shard_bucket.setdefault(habit_name, {})[username] = count
+        elif name == "leaderboard":
+            for doc in docs:
+                doc[name] = {"rankings": {}, "past_rankings": []}
+            for household, scores in value.get("rankings", {}).items():
+                docs[shard_of(household, shards)][name]["rankings"][household] = scores
+            for entry in value.get("past_rankings", []):
+                if "rankings" in entry:
+                    parts = {}
+                    for household, scores in entry["rankings"].items():
+                        parts.setdefault(shard_of(household, shards), {})[household] = scores
+                    for shard, rankings in sorted(parts.items()):
+                        docs[shard][name]["past_rankings"].append(dict(entry, rankings=rankings))
+                else:
+                    docs[users.get(entry.get("top_user"), 0)][name]["past_rankings"].append(entry)
+        elif name == "schedule":
+            for doc in docs:
+                doc[name] = []
+            for entry in value:
+                docs[shard_of(entry[2], shards) if entry[1] == "household" else 0][name].append(entry)
+        elif name == "aggregates":
+            for doc in docs:
+                doc[name] = {"households": {}, "monthly": {}, "habits": {}, "top": [], "top_performers": {}}
+            for household, total in value.get("households", {}).items():
+                docs[shard_of(household, shards)][name]["households"][household] = total
+            for month, earned in value.get("monthly", {}).items():
+                for username, points in earned.items():
+                    docs[users.get(username, 0)][name]["monthly"].setdefault(month, {})[username] = points
+            # counts are summed on merge, so shard 0 carries the totals so far
+            docs[0][name]["habits"] = dict(value.get("habits", {}))
+            docs[0][name]["top_performers"] = dict(value.get("top_performers", {}))
+        else:
+            docs[0][name] = value
+    if "aggregates" in data:
+        # each shard keeps the top of its own households
+        for doc in docs:
+            doc["aggregates"]["top"] = top_k(doc.get("leaderboard", {}).get("rankings", {}))
+    return docs
+
+
+def _month_key(entry):
+    month, year = entry.get("month", "00-0000").split("-")
+    return int(year), int(month)
+
+
+def merge_section(name, values):
+    """Combines one section as read from every shard; the inverse of split()."""
+    values = [value for value in values if value is not None]
+    if not values:
+        return None
+    if name in ("households", "streaks", "streak_state", "history"):
+        return {key: item for value in values for key, item in value.items()}
+    if name == "completed_habits":
+        merged = {}
+        for value in values:
+            for period, claimed in value.items():
+                merged.setdefault(period, {}).update(claimed)
+        return merged
+    if name == "periods":
+        merged = {}
+        for value in values:
+            for granularity, buckets in value.items():
+                if granularity == "pruned":
+                    cutoffs = merged.setdefault("pruned", {})
+                    for name, cutoff in buckets.items():
+                        cutoffs[name] = max(cutoffs.get(name, cutoff), cutoff)
+                    continue
+                merged_buckets = merged.setdefault(granularity, {})
+                for key, bucket in buckets.items():
+                    merged_bucket = merged_buckets.setdefault(key, {})
+                    for habit_name, counts in bucket.items():
+                        merged_bucket.setdefault(habit_name, {}).update(counts)
+        return merged
+    if name == "leaderboard":
+        rankings = {key: scores for value in values for key, scores in value.get("rankings", {}).items()}
+        past_rankings, archived = [], {}
+        for entry in sorted(chain.from_iterable(value.get("past_rankings", []) for value in values), key=_month_key):
+            if "rankings" not in entry:
+                past_rankings.append(entry)
+            elif entry["month"] in archived:
+                archived[entry["month"]]["rankings"].update(entry["rankings"])
+            else:
+                archived[entry["month"]] = dict(entry, rankings=dict(entry["rankings"]))
+                past_rankings.append(archived[entry["month"]])
+        return {"rankings": rankings, "past_rankings": past_rankings}
+    if name == "aggregates":
+        merged = {"households": {}, "monthly": {}, "habits": {}, "top": [], "top_performers": {}}
+        for value in values:
+            merged["households"].update(value.get("households", {}))
+            for month, earned in value.get("monthly", {}).items():
+                merged["monthly"].setdefault(month, {}).update(earned)
+            for habit_name, count in value.get("habits", {}).items():
+                merged["habits"][habit_name] = merged["habits"].get(habit_name, 0) + count
+            for month, best in value.get("top_performers", {}).items():
+                if month not in merged["top_performers"] or best[1] > merged["top_performers"][month][1]:
+                    merged["top_performers"][month] = best
+        merged["top"] = sorted((entry for value in values for entry in value.get("top", [])),
+                               key=lambda entry: (-entry[2], entry[0], entry[1]))[:TOP_K]
+        return merged
+    if name == "schedule":
+        # a sorted list is a valid heap
+        return list(heapq.merge(*(sorted(value) for value in values)))
+    return values[0]
+
+
+def merge(docs):
+    """Rebuilds the whole data document from the shards' documents."""
+    names = list(dict.fromkeys(name for doc in docs for name in doc if name != "journal_seq"))
+    return {name: merge_section(name, [doc.get(name) for doc in docs]) for name in names}
+
+
+def _read_section(path, name):
+    return open_store(path).read_section(name)
+
+
+def _global_rankings(path, k):
+    """Top k (username, household, points) of one shard."""
+    leaderboard = open_store(path).read_section("leaderboard") or {}
+    overall = RankingIndex(leaderboard.get("rankings", {})).overall
+    entries = overall.items() if k is None else overall.top(k)
+    return [(username, household, points) for (username, household), points in entries]
+
+
+class _AllShardsLock:
+    """Holds every shard's lock. Taken in shard order, so two of these never deadlock,
+    and a single-shard session never waits while holding another lock."""
+
+    def __init__(self, locks):
+        self.locks = locks
+
+    def acquire(self):
+        acquired = []
+        try:
+            for lock in self.locks:
+                acquired.append(lock.acquire())
+        except BaseException:
+            for lock in reversed(acquired):
+                lock.release()
+            raise
+        return self
+
+    def release(self):
+        for lock in reversed(self.locks):
+            lock.release()
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+
+class ShardedStore(Store):
+    """Spreads households over several stores in a directory (e.g. data.shards/).
+
+    Each shard is an ordinary (journaled) store holding the households whose
+    name hashes to it, together with their users' streaks, claims and period
+    counts and a copy of the habits, so completing a regular habit only needs
+    the user's shard: DataManager.session(username, habit_name) loads and locks
+    that shard alone and independent households write in parallel.
+
+    routing.json maps usernames to shards and lists the bonus habits. Bonus
+    claims are first come first served across all households, so they (like
+    every other change) go through a session over the whole store, which
+    locks all shards in order and merges their documents. Reads that need
+    every shard, such as the global leaderboard, are fanned out to worker
+    processes and merged.
+    """
+
+    ROUTING = "routing.json"
+
+    def __init__(self, path, journal=True):
+        self.path = str(path)
+        self.journal = journal
+        self.routing_path = os.path.join(self.path, self.ROUTING)
+        self.routing = self._read_routing()
+        self.stores = [open_store(self.shard_path(shard), journal) for shard in range(self.routing["shards"])]
+
+    def _read_routing(self):
+        try:
+            with open(self.routing_path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {"shards": SHARDS, "backend": SHARD_BACKEND, "users": {}, "bonus_habits": []}
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            raise StorageError(f"'{self.routing_path}' is corrupt ({e}). Restore it from a backup.") from e
+
+    def shard_path(self, shard):
+        return os.path.join(self.path, f"shard-{shard}{self.routing['backend']}")
+
+    def route(self, username, habit_name=None):
+        """The shard store that can complete habit_name for the user alone, or None if it needs every shard."""
+        shard = self.routing["users"].get(username)
+        if shard is None or habit_name in self.routing["bonus_habits"]:
+            return None
+        return self.stores[shard]
+
+    def load(self):
+        return merge([store.load() for store in self.stores])
+
+    def save(self, data, sections=None):
+        os.makedirs(self.path, exist_ok=True)
+        for store, doc in zip(self.stores, split(data, len(self.stores))):
+            store.save(doc, sections)
+        routing = dict(self.routing, users=user_shards(data, len(self.stores)),
+                       bonus_habits=[habit["name"] for habit in data.get("bonus_habits", [])])
+        if routing != self.routing or not os.path.exists(self.routing_path):
+            atomic_write(self.routing_path, json.dumps(routing, indent=4))
+            self.routing = routing
+
+    def append(self, data, events):
+        """Appends each event to the journal of the user's shard; events without a user go to every shard.
+
+        Users are looked up in routing.json, so an event costs no more than the
+        journal write; the document is only split when a shard's journal is
+        about to be folded into its snapshot.
+        """
+        shards = len(self.stores)
+        per_shard = {}
+        for event in events:
+            targets = [self._user_shard(data, event["username"])] if "username" in event else range(shards)
+            for shard in targets:
+                per_shard.setdefault(shard, []).append(event)
+        docs = None
+        for shard, shard_events in sorted(per_shard.items()):
+            store = self.stores[shard]
+            if docs is None and store.pending + len(shard_events) >= store.COMPACT_AFTER:
+                docs = split(data, shards)
+            store.append(docs[shard] if docs else None, shard_events)
+
+    def _user_shard(self, data, username):
+        shard = self.routing["users"].get(username)
+        if shard is not None:
+            return shard
+        # a member added since routing.json was written
+        household = next((name for name, details in data.get("households", {}).items() if username in details["members"]), None)
+        return 0 if household is None else shard_of(household, len(self.stores))
+
+    def clear(self):
+        os.makedirs(self.path, exist_ok=True)
+        with self.lock():
+            for store in self.stores:
+                store.clear()
+            self.routing = dict(self.routing, users={}, bonus_habits=[])
+            atomic_write(self.routing_path, json.dumps(self.routing, indent=4))
+
+    def compact(self):
+        return sum(store.compact() for store in self.stores if hasattr(store, "compact"))
+
+    def lock(self):
+        os.makedirs(self.path, exist_ok=True)
+        return _AllShardsLock([store.lock() for store in self.stores])
+
+    def version(self):
+        return tuple(store.version() for store in self.stores) + (file_version(self.routing_path),)
+
+    def fan_out(self, fn, *args):
+        """Returns [fn(shard_path, *args) for every shard], computed in worker processes when the shards are big enough."""
+        paths = [self.shard_path(shard) for shard in range(len(self.stores))]
+        size = sum(os.path.getsize(path) for path in paths if os.path.exists(path))
+        if WORKERS < 2 or len(paths) < 2 or size < PARALLEL_BYTES:
+            return [fn(path, *args) for path in paths]
+        with ProcessPoolExecutor(max_workers=min(WORKERS, len(paths))) as pool:
+            return list(pool.map(fn, paths, *([arg] * len(paths) for arg in args)))
+
+    def read_section(self, name, default=None):
+        if name in REPLICATED:
+            return self.stores[0].read_section(name, default)
+        value = merge_section(name, self.fan_out(_read_section, name))
+        return default if value is None else value
+
+    def iter_section(self, name):
+        """Entries of each shard in turn; a completed_habits period can appear once per shard."""
+        if name in REPLICATED:
+            return self.stores[0].iter_section(name)
+        if name in ("leaderboard", "schedule"):
+            return super().iter_section(name)
+        return chain.from_iterable(store.iter_section(name) for store in self.stores)
+
+    def global_rankings(self, k=None):
+        """(username, household, points) across all shards, best first, merged from each shard's top k."""
+        merged = heapq.merge(*self.fan_out(_global_rankings, k), key=lambda entry: (-entry[2], entry[0], entry[1]))
+        return list(merged if k is None else islice(merged, k))
+
+    def history_between(self, username, start=None, end=None, habit_name=None):
+        shard = self.routing["users"].get(username)
+        if shard is None:
+            return super().history_between(username, start, end, habit_name)
+        return self.stores[shard].history_between(username, start, end, habit_name)
+
+    def find_habit(self, habit_name):
+        return self.stores[0].find_habit(habit_name)
+
+    def find_household(self, username):
+        shard = self.routing["users"].get(username)
+        return None if shard is None else self.stores[shard].find_household(username)
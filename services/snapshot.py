@@ -0,0 +1,238 @@
+import json
+import struct
+import sys
+from array import array
+
+MAGIC = b"HSTK"
+VERSION = 1
+PREAMBLE = struct.Struct("<BI")
+
+
+def is_snapshot(prefix):
+    return prefix[:len(MAGIC)] == MAGIC
+
+
+class StringTable:
+    def __init__(self):
+        self.ids = {}
+        self.strings = []
+
+    def id(self, value):
+        index = self.ids.get(value)
+        if index is None:
+            index = self.ids[value] = len(self.strings)
+            self.strings.append(value)
+        return index
+
+
+def _columns_completed_habits(section, strings):
+    periods, habits, users = array("I"), array("I"), array("I")
+    for period, claims in section.items():
+        period_id = strings.id(period)
+        for habit, username in claims.items():
+            periods.append(period_id)
+            habits.append(strings.id(habit))
+            users.append(strings.id(username))
+    return [periods, habits, users]
+
+
+def _rows_completed_habits(columns, strings):
+    section = {}
+    for period, habit, username in zip(*columns):
+        claims = section.get(strings[period])
+        if claims is None:
+            claims = section[strings[period]] = {}
+        claims[strings[habit]] = strings[username]
+    return section
+
+
+def _columns_households(section, strings):
+    names, households, users, points, members = array("I"), array("I"), array("I"), array("q"), array("B")
+    for name, details in section.items():
+        household_id = strings.id(name)
+        names.append(household_id)
+        usernames = list(details["members"]) + [u for u in details["points"] if u not in details["members"]]
+        member_set = set(details["members"])
+        for username in usernames:
+            households.append(household_id)
+            users.append(strings.id(username))
+            points.append(details["points"].get(username, 0))
+            members.append(username in member_set)
+    return [names, households, users, points, members]
+
+
+def _rows_households(columns, strings):
+    names, households, users, points, members = columns
+    section = {strings[name]: {"members": [], "points": {}} for name in names}
+    for household, username, score, is_member in zip(households, users, points, members):
+        details = section[strings[household]]
+        if is_member:
+            details["members"].append(strings[username])
+        details["points"][strings[username]] = score
+    return section
+
+
+def _columns_streaks(section, strings):
+    users, habits, streaks = array("I"), array("I"), array("q")
+    for username, per_habit in section.items():
+        for habit, streak in per_habit.items():
+            users.append(strings.id(username))
+            habits.append(strings.id(habit))
+            streaks.append(streak)
+    return [users, habits, streaks]
+
+
+def _rows_streaks(columns, strings):
+    section = {}
+    for username, habit, streak in zip(*columns):
+        section.setdefault(strings[username], {})[strings[habit]] = streak
+    return section
+
+
+def _columns_history(section, strings):
+    users, habits, counts, timestamps = array("I"), array("I"), array("I"), array("q")
+    for username, per_habit in section.items():
+        for habit, times in per_habit.items():
+            users.append(strings.id(username))
+            habits.append(strings.id(habit))
+            counts.append(len(times))
+            timestamps.extend(times)
+    return [users, habits, counts, timestamps]
+
+
+def _rows_history(columns, strings):
+    users, habits, counts, timestamps = columns
+    section, offset = {}, 0
+    for username, habit, count in zip(users, habits, counts):
+        section.setdefault(strings[username], {})[strings[habit]] = timestamps[offset:offset + count].tolist()
+        offset += count
+    return section
+
+
+COLUMNAR = {
+    "completed_habits": (_columns_completed_habits, _rows_completed_habits),
+    "households": (_columns_households, _rows_households),
+    "streaks": (_columns_streaks, _rows_streaks),
+    "history": (_columns_history, _rows_history),
+}
+
+
+def encode(data):
+    """Packs the data document into a binary snapshot.
+
+    Layout: MAGIC, a struct-packed (version, header length) pair, a compact
+    JSON header, the string table, then raw column buffers. The large tabular
+    sections (bonus claims, household points, streaks, completion history)
+    are stored as parallel typed arrays, with every repeated name replaced by
+    an index into the string table, so most of the work is
+    array.tobytes()/frombytes().
+    Anything else is kept in the header as plain JSON.
+    """
+    strings = StringTable()
+    rest = {}
+    sections = []
+    buffers = []
+    for name, value in data.items():
+        if name not in COLUMNAR:
+            rest[name] = value
+            continue
+        try:
+            columns = COLUMNAR[name][0](value, strings)
+        except (TypeError, OverflowError, KeyError, AttributeError):
+            # unexpected shapes (e.g. non-integer points) stay as JSON
+            rest[name] = value
+            continue
+        sections.append([name, [[column.typecode, column.itemsize, len(column)] for column in columns]])
+        buffers.extend(column.tobytes() for column in columns)
+
+    encoded = [s.encode("utf-8") for s in strings.strings]
+    lengths = array("I", (len(s) for s in encoded))
+    header = json.dumps({
+        "byteorder": sys.byteorder,
+        "order": list(data),
+        "strings": [lengths.itemsize, len(lengths)],
+        "sections": sections,
+        "rest": rest,
+    }, separators=(",", ":")).encode("utf-8")
+    return b"".join([MAGIC, PREAMBLE.pack(VERSION, len(header)), header, lengths.tobytes(), b"".join(encoded)] + buffers)
+
+
+def _read_array(buffer, offset, typecode, itemsize, length, swap):
+    column = array(typecode)
+    if column.itemsize != itemsize:
+        raise ValueError(f"Snapshot was written on a platform with {itemsize}-byte '{typecode}' arrays.")
+    end = offset + itemsize * length
+    column.frombytes(buffer[offset:end])
+    if swap:
+        column.byteswap()
+    return column, end
+
+
+def decode(buffer):
+    buffer = memoryview(buffer)
+    if not is_snapshot(bytes(buffer[:len(MAGIC)])):
+        raise ValueError("Not a binary snapshot.")
+    offset = len(MAGIC)
+    version, header_length = PREAMBLE.unpack_from(buffer, offset)
+    if version != VERSION:
+        raise ValueError(f"Unsupported snapshot version {version}.")
+    offset += PREAMBLE.size
+    header = json.loads(bytes(buffer[offset:offset + header_length]))
+    offset += header_length
+    swap = header["byteorder"] != sys.byteorder
+
+    lengths, offset = _read_array(buffer, offset, "I", *header["strings"], swap)
+    strings = []
+    for length in lengths:
+        strings.append(str(buffer[offset:offset + length], "utf-8"))
+        offset += length
+
+    sections = {}
+    for name, layout in header["sections"]:
+        columns = []
+        for typecode, itemsize, length in layout:
+            column, offset = _read_array(buffer, offset, typecode, itemsize, length, swap)
+            columns.append(column)
+        sections[name] = COLUMNAR[name][1](columns, strings)
+
+    rest = header["rest"]
+    return {name: sections[name] if name in sections else rest[name] for name in header["order"]}
+
+
+def read_section(file, name):
+    """Decodes one section from an open snapshot file, seeking past the other sections' columns.
+
+    Returns (found, value).
+    """
+    prefix = file.read(len(MAGIC) + PREAMBLE.size)
+    if not is_snapshot(prefix):
+        raise ValueError("Not a binary snapshot.")
+    version, header_length = PREAMBLE.unpack_from(prefix, len(MAGIC))
+    if version != VERSION:
+        raise ValueError(f"Unsupported snapshot version {version}.")
+    header = json.loads(file.read(header_length))
+    if name in header["rest"]:
+        return True, header["rest"][name]
+    layouts = dict(header["sections"])
+    if name not in layouts:
+        return False, None
+    swap = header["byteorder"] != sys.byteorder
+
+    itemsize, count = header["strings"]
+    lengths, _ = _read_array(file.read(itemsize * count), 0, "I", itemsize, count, swap)
+    buffer = memoryview(file.read(sum(lengths)))
+    strings, offset = [], 0
+    for length in lengths:
+        strings.append(str(buffer[offset:offset + length], "utf-8"))
+        offset += length
+
+    for section, layout in header["sections"]:
+        size = sum(itemsize * length for _, itemsize, length in layout)
+        if section != name:
+            file.seek(size, 1)
+            continue
+        buffer, offset, columns = file.read(size), 0, []
+        for typecode, itemsize, length in layout:
+            column, offset = _read_array(buffer, offset, typecode, itemsize, length, swap)
+            columns.append(column)
+        return True, COLUMNAR[name][1](columns, strings)
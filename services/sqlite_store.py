@@ -0,0 +1,342 @@
+import json
+import sqlite3
+from collections import Counter
+from services.history import bounds, from_timestamp
+from services.metrics import timed
+from services.storage import Store
+
+# table -> (key columns, value columns)
+TABLES = {
+    "households": (("name",), ("position",)),
+    "members": (("household", "username"), ("position", "points", "is_member")),
+    "habits": (("section", "position"), ("name", "periodicity", "points", "created_at", "is_bonus", "extra")),
+    "streaks": (("username", "habit"), ("streak",)),
+    "streak_state": (("username", "habit"), ("current", "last_period", "longest", "bonus")),
+    "completions": (("period", "habit"), ("username",)),
+    "rankings": (("household", "username"), ("position", "points")),
+    "past_rankings": (("position",), ("entry",)),
+    "documents": (("section",), ("body",)),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS households (name TEXT PRIMARY KEY, position INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS members (
+    household TEXT NOT NULL, username TEXT NOT NULL, position INTEGER NOT NULL,
+    points INTEGER NOT NULL DEFAULT 0, is_member INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (household, username)
+);
+CREATE INDEX IF NOT EXISTS idx_members_username ON members (username);
+CREATE TABLE IF NOT EXISTS habits (
+    section TEXT NOT NULL, position INTEGER NOT NULL, name TEXT NOT NULL, periodicity TEXT,
+    points INTEGER, created_at TEXT, is_bonus INTEGER NOT NULL DEFAULT 0, extra TEXT,
+    PRIMARY KEY (section, position)
+);
+CREATE INDEX IF NOT EXISTS idx_habits_name ON habits (name);
+CREATE TABLE IF NOT EXISTS streaks (
+    username TEXT NOT NULL, habit TEXT NOT NULL, streak INTEGER NOT NULL,
+    PRIMARY KEY (username, habit)
+);
+CREATE TABLE IF NOT EXISTS streak_state (
+    username TEXT NOT NULL, habit TEXT NOT NULL, current INTEGER NOT NULL, last_period INTEGER,
+    longest INTEGER NOT NULL, bonus INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (username, habit)
+);
+CREATE TABLE IF NOT EXISTS completions (
+    period TEXT NOT NULL, habit TEXT NOT NULL, username TEXT NOT NULL,
+    PRIMARY KEY (period, habit)
+);
+CREATE INDEX IF NOT EXISTS idx_completions_username ON completions (username);
+CREATE TABLE IF NOT EXISTS rankings (
+    household TEXT NOT NULL, username TEXT NOT NULL, position INTEGER NOT NULL, points INTEGER NOT NULL,
+    PRIMARY KEY (household, username)
+);
+CREATE TABLE IF NOT EXISTS past_rankings (position INTEGER PRIMARY KEY, entry TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS documents (section TEXT PRIMARY KEY, body TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS history (username TEXT NOT NULL, habit TEXT NOT NULL, completed_at INTEGER NOT NULL);
+CREATE INDEX IF NOT EXISTS idx_history_user_time ON history (username, completed_at);
+"""
+
+# data section -> tables holding it; anything else is kept as a JSON document
+SECTION_TABLES = {
+    "households": ("households", "members"),
+    "habits": ("habits",),
+    "bonus_habits": ("habits",),
+    "streaks": ("streaks",),
+    "streak_state": ("streak_state",),
+    "completed_habits": ("completions",),
+    "leaderboard": ("rankings", "past_rankings"),
+    # one row per completion, synced by _sync_history rather than _sync
+    "history": ("history",),
+}
+
+HABIT_COLUMNS = ("name", "periodicity", "points", "created_at", "is_bonus")
+
+
+class SQLiteStore(Store):
+    """Keeps each section of the data in its own indexed SQLite table.
+
+    save() diffs the rows of the changed sections against what was last read
+    and only inserts, replaces or deletes the rows that differ. The completion
+    history has one row per completion, so recording one is a single insert
+    and history_between() is an indexed range scan.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+        self._rows = {}
+        self._history = None  # {(username, habit): tuple of timestamps} as last read or written
+
+    def close(self):
+        self.conn.close()
+
+    def _select(self, table):
+        keys, values = TABLES[table]
+        cursor = self.conn.execute(f"SELECT {', '.join(keys + values)} FROM {table}")
+        rows = {row[:len(keys)]: row[len(keys):] for row in cursor}
+        self._rows[table] = rows
+        return rows
+
+    @timed("store.load")
+    def load(self):
+        data = {}
+
+        households = sorted(self._select("households").items(), key=lambda item: item[1][0])
+        members = sorted(self._select("members").items(), key=lambda item: item[1][0])
+        data["households"] = {name: {"members": [], "points": {}} for (name,), _ in households}
+        for (household, username), (_, points, is_member) in members:
+            details = data["households"].setdefault(household, {"members": [], "points": {}})
+            if is_member:
+                details["members"].append(username)
+            details["points"][username] = points
+
+        data["habits"] = []
+        data["bonus_habits"] = []
+        for (section, _), values in sorted(self._select("habits").items()):
+            habit = dict(zip(HABIT_COLUMNS, values[:5]))
+            habit["is_bonus"] = bool(habit["is_bonus"])
+            habit.update(json.loads(values[5]) if values[5] else {})
+            data[section].append(habit)
+
+        rankings = {}
+        for (household, username), (_, points) in sorted(self._select("rankings").items(), key=lambda item: (item[0][0], item[1][0])):
+            rankings.setdefault(household, {})[username] = points
+        past_rankings = [json.loads(entry) for _, (entry,) in sorted(self._select("past_rankings").items())]
+        data["leaderboard"] = {"rankings": rankings, "past_rankings": past_rankings}
+
+        data["streaks"] = {}
+        for (username, habit), (streak,) in self._select("streaks").items():
+            data["streaks"].setdefault(username, {})[habit] = streak
+
+        streak_state = self._select("streak_state")
+        if streak_state:
+            data["streak_state"] = {}
+            for (username, habit), values in streak_state.items():
+                data["streak_state"].setdefault(username, {})[habit] = dict(zip(TABLES["streak_state"][1], values))
+
+        completions = self._select("completions")
+        if completions:
+            data["completed_habits"] = {}
+            for (period, habit), (username,) in completions.items():
+                data["completed_habits"].setdefault(period, {})[habit] = username
+
+        history = self._select_history()
+        if history:
+            data["history"] = {}
+            for (username, habit), timestamps in history.items():
+                data["history"].setdefault(username, {})[habit] = list(timestamps)
+
+        # stores written before the history table keep it as a document until the next save
+        for (section,), (body,) in self._select("documents").items():
+            data[section] = json.loads(body)
+        return data
+
+    def _select_history(self):
+        history = {}
+        for username, habit, completed_at in self.conn.execute(
+                "SELECT username, habit, completed_at FROM history ORDER BY username, completed_at"):
+            history.setdefault((username, habit), []).append(completed_at)
+        self._history = {key: tuple(timestamps) for key, timestamps in history.items()}
+        return self._history
+
+    def history_between(self, username, start=None, end=None, habit_name=None):
+        """{habit: [datetime]} of a user's completions from start to end, read with one range query."""
+        if not self.conn.execute("SELECT 1 FROM history LIMIT 1").fetchone():
+            return super().history_between(username, start, end, habit_name)
+        low, high = bounds(start, end)
+        query, args = "SELECT habit, completed_at FROM history WHERE username = ?", [username]
+        if low is not None:
+            query, args = query + " AND completed_at >= ?", args + [low]
+        if high is not None:
+            query, args = query + " AND completed_at <= ?", args + [high]
+        if habit_name is not None:
+            query, args = query + " AND habit = ?", args + [habit_name]
+        history = {}
+        for habit, completed_at in self.conn.execute(query + " ORDER BY completed_at", args):
+            history.setdefault(habit, []).append(from_timestamp(completed_at))
+        return history
+
+    @timed("store.read_section")
+    def read_section(self, name, default=None):
+        if name in ("habits", "bonus_habits"):
+            habits = []
+            for values in self.conn.execute(
+                    f"SELECT {', '.join(HABIT_COLUMNS)}, extra FROM habits WHERE section = ? ORDER BY position", (name,)):
+                habit = dict(zip(HABIT_COLUMNS, values[:5]))
+                habit["is_bonus"] = bool(habit["is_bonus"])
+                habit.update(json.loads(values[5]) if values[5] else {})
+                habits.append(habit)
+            return habits
+        if name == "completed_habits":
+            section = dict(self.iter_section(name))
+            return section if section else default
+        if name == "history" and self.conn.execute("SELECT 1 FROM history LIMIT 1").fetchone():
+            history = {}
+            for (username, habit), timestamps in self._select_history().items():
+                history.setdefault(username, {})[habit] = list(timestamps)
+            return history
+        return super().read_section(name, default)
+
+    def iter_section(self, name):
+        if name != "completed_habits":
+            yield from super().iter_section(name)
+            return
+        period, claims = None, None
+        for row_period, habit, username in self.conn.execute("SELECT period, habit, username FROM completions ORDER BY period"):
+            if row_period != period:
+                if claims is not None:
+                    yield period, claims
+                period, claims = row_period, {}
+            claims[habit] = username
+        if claims is not None:
+            yield period, claims
+
+    @timed("store.save")
+    def save(self, data, sections=None):
+        sections = set(SECTION_TABLES) | set(data) if sections is None else set(sections)
+        tables = {table for section in sections for table in SECTION_TABLES.get(section, ())}
+        if sections - set(SECTION_TABLES):
+            tables.add("documents")
+            if "history" in data and self.conn.execute("SELECT 1 FROM documents WHERE section = 'history'").fetchone():
+                # a store written before the history table: rewriting the documents drops that row, so move it now
+                tables.add("history")
+        rows = {table: self._section_rows(table, data) for table in tables if table != "history"}
+        with self.conn:
+            for table, new_rows in rows.items():
+                self._sync(table, new_rows)
+            if "history" in tables:
+                self._sync_history(data.get("history", {}))
+
+    def _sync(self, table, new_rows):
+        """Writes only the rows of a table that differ from the last known state."""
+        keys, values = TABLES[table]
+        old_rows = self._rows[table] if table in self._rows else self._select(table)
+        columns = keys + values
+        changed = [key + value for key, value in new_rows.items() if old_rows.get(key) != value]
+        removed = [key for key in old_rows if key not in new_rows]
+        if changed:
+            placeholders = ", ".join("?" for _ in columns)
+            self.conn.executemany(f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", changed)
+        if removed:
+            where = " AND ".join(f"{key} = ?" for key in keys)
+            self.conn.executemany(f"DELETE FROM {table} WHERE {where}", removed)
+        self._rows[table] = new_rows
+
+    def _sync_history(self, history):
+        """Inserts and deletes only the completions that differ from the last known state."""
+        old = self._history if self._history is not None else self._select_history()
+        new, added, removed = {}, [], []
+        for username, per_habit in history.items():
+            for habit, timestamps in per_habit.items():
+                timestamps = new[(username, habit)] = tuple(timestamps)
+                before = old.get((username, habit), ())
+                if timestamps == before:
+                    continue
+                if timestamps[:len(before)] == before:
+                    # the usual case: completions appended at the end
+                    added.extend((username, habit, timestamp) for timestamp in timestamps[len(before):])
+                    continue
+                difference = Counter(timestamps)
+                difference.subtract(before)
+                for timestamp, count in difference.items():
+                    if count > 0:
+                        added.extend([(username, habit, timestamp)] * count)
+                    elif count < 0:
+                        removed.append((username, habit, timestamp, -count))
+        for (username, habit), before in old.items():
+            if (username, habit) not in new:
+                removed.extend((username, habit, timestamp, count) for timestamp, count in Counter(before).items())
+        if added:
+            self.conn.executemany("INSERT INTO history (username, habit, completed_at) VALUES (?, ?, ?)", added)
+        if removed:
+            self.conn.executemany(
+                "DELETE FROM history WHERE rowid IN (SELECT rowid FROM history"
+                " WHERE username = ? AND habit = ? AND completed_at = ? LIMIT ?)", removed)
+        self._history = new
+
+    def _section_rows(self, table, data):
+        rows = {}
+        if table == "households":
+            for position, name in enumerate(data.get("households", {})):
+                rows[(name,)] = (position,)
+        elif table == "members":
+            for household, details in data.get("households", {}).items():
+                usernames = list(details["members"]) + [u for u in details["points"] if u not in details["members"]]
+                for position, username in enumerate(usernames):
+                    rows[(household, username)] = (position, details["points"].get(username, 0), int(username in details["members"]))
+        elif table == "habits":
+            for section in ("habits", "bonus_habits"):
+                for position, habit in enumerate(data.get(section, [])):
+                    extra = {k: v for k, v in habit.items() if k not in HABIT_COLUMNS}
+                    rows[(section, position)] = tuple(habit.get(c) for c in HABIT_COLUMNS[:4]) + (
+                        int(bool(habit.get("is_bonus"))), json.dumps(extra) if extra else None)
+        elif table == "streaks":
+            for username, streaks in data.get("streaks", {}).items():
+                for habit, streak in streaks.items():
+                    rows[(username, habit)] = (streak,)
+        elif table == "streak_state":
+            for username, states in data.get("streak_state", {}).items():
+                for habit, state in states.items():
+                    rows[(username, habit)] = tuple(state[column] for column in TABLES["streak_state"][1])
+        elif table == "completions":
+            for period, claims in data.get("completed_habits", {}).items():
+                for habit, username in claims.items():
+                    rows[(period, habit)] = (username,)
+        elif table == "rankings":
+            for household, ranking in data.get("leaderboard", {}).get("rankings", {}).items():
+                for position, (username, points) in enumerate(ranking.items()):
+                    rows[(household, username)] = (position, points)
+        elif table == "past_rankings":
+            for position, entry in enumerate(data.get("leaderboard", {}).get("past_rankings", [])):
+                rows[(position,)] = (json.dumps(entry),)
+        elif table == "documents":
+            for section, body in data.items():
+                if section not in SECTION_TABLES:
+                    rows[(section,)] = (json.dumps(body),)
+        return rows
+
+    def clear(self):
+        with self.conn:
+            for table in list(TABLES) + ["history"]:
+                self.conn.execute(f"DELETE FROM {table}")
+        self._rows.clear()
+        self._history = None
+
+    def find_habit(self, habit_name):
+        row = self.conn.execute(
+            "SELECT section, position FROM habits WHERE name = ? ORDER BY section = 'bonus_habits', position LIMIT 1",
+            (habit_name,)).fetchone()
+        if row is None:
+            return None
+        values = self.conn.execute(
+            f"SELECT {', '.join(HABIT_COLUMNS)}, extra FROM habits WHERE section = ? AND position = ?", row).fetchone()
+        habit = dict(zip(HABIT_COLUMNS, values[:5]))
+        habit["is_bonus"] = bool(habit["is_bonus"])
+        habit.update(json.loads(values[5]) if values[5] else {})
+        return habit
+
+    def find_household(self, username):
+        row = self.conn.execute(
+            "SELECT household FROM members WHERE username = ? AND is_member = 1 LIMIT 1", (username,)).fetchone()
+        return row[0] if row else None
@@ -0,0 +1,305 @@
+import io
+import json
+import logging
+import os
+import struct
+from services import snapshot
+from services.locking import FileLock, atomic_write
+from services.history import CompletionHistory
+from services.metrics import metrics, timed
+from services.streaming import SectionReader
+
+
+class StorageError(Exception):
+    """Raised when a store exists but cannot be read, e.g. a corrupt data file."""
+
+
+def file_version(path):
+    """Identifies the current contents of a file; changes whenever the file is rewritten or replaced."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return (os.path.abspath(path), None)
+    return (os.path.abspath(path), stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def entries(section):
+    """(key, value) pairs of a dict section, the items of a list section, or nothing."""
+    if isinstance(section, dict):
+        return iter(section.items())
+    if isinstance(section, list):
+        return iter(section)
+    return iter(())
+
+
+def default_data():
+    """Returns the empty data structure used when no store exists yet."""
+    return {
+        "households": {},
+        "habits": [],
+        "bonus_habits": [],
+        "leaderboard": {"rankings": {}, "past_rankings": []},
+        "streaks": {}
+    }
+
+
+class Store:
+    """Interface every storage backend implements.
+
+    load() returns the whole data document as a dict. save() receives the
+    document plus the names of the top-level sections that changed (None means
+    everything), so backends that can write sections independently only touch
+    what was modified.
+    """
+
+    def load(self):
+        raise NotImplementedError
+
+    def save(self, data, sections=None):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def read_section(self, name, default=None):
+        """Loads a single top-level section, touching as little of the store as the backend allows."""
+        return self.load().get(name, default)
+
+    def iter_section(self, name):
+        """Yields the entries of a section ((key, value) pairs or list items), streamed where possible."""
+        return entries(self.read_section(name))
+
+    def history_between(self, username, start=None, end=None, habit_name=None):
+        """{habit: [datetime]} of a user's completions from start to end, or None if the store has no history yet."""
+        history = self.read_section("history")
+        if history is None:
+            return None
+        return CompletionHistory({"history": history}).between(username, start, end, habit_name)
+
+    def lock(self):
+        """Inter-process lock held for a read-modify-write cycle on this store."""
+        return FileLock(f"{self.path}.lock")
+
+    def version(self):
+        """Changes whenever the stored data does; used to key cached results."""
+        return file_version(self.path)
+
+    def find_habit(self, habit_name):
+        """Returns the habit dict with this name (regular first, then bonus)."""
+        data = self.load()
+        habit = next((h for h in data.get("habits", []) if h["name"] == habit_name), None)
+        if habit:
+            return habit
+        return next((h for h in data.get("bonus_habits", []) if h["name"] == habit_name), None)
+
+    def find_household(self, username):
+        """Returns the name of the household the user belongs to, or None."""
+        metrics.count("lookup.household_scan")
+        for household, details in self.load().get("households", {}).items():
+            if username in details["members"]:
+                return household
+        return None
+
+
+class FileStore(Store):
+    """Keeps the whole document in a single file.
+
+    Supported formats are indented JSON ("json"), JSON without whitespace
+    ("compact") and the binary snapshot from services/snapshot.py ("binary").
+    The format of an existing file is detected when it is read and kept on
+    save unless fmt is given explicitly.
+    """
+
+    FORMATS = ("json", "compact", "binary")
+    DEFAULT_FORMAT = os.environ.get("HOMESTREAK_FORMAT", "json")
+
+    def __init__(self, path, fmt=None):
+        self.path = path
+        self.fmt = fmt
+        self._detected = None
+
+    @timed("store.load")
+    def load(self):
+        try:
+            with open(self.path, "rb") as file:
+                content = file.read()
+        except FileNotFoundError:
+            return default_data()
+        metrics.count("store.bytes_read", len(content))
+        self._detected = self._detect(content)
+        if self._detected == "binary":
+            try:
+                with metrics.timer("store.parse"):
+                    return snapshot.decode(content)
+            except (ValueError, struct.error, UnicodeDecodeError) as e:
+                raise StorageError(f"'{self.path}' is corrupt ({e}). Restore it from a backup or run clear-data.") from e
+        if not content.strip():
+            return default_data()
+        try:
+            with metrics.timer("store.parse"):
+                return json.loads(content)
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            # never fall back to an empty structure here: the next save would
+            # overwrite whatever is left of the user's data
+            raise StorageError(f"'{self.path}' is corrupt ({e}). Restore it from a backup or run clear-data.") from e
+
+    @timed("store.save")
+    def save(self, data, sections=None):
+        fmt = self.format()
+        with metrics.timer("store.dump"):
+            if fmt == "binary":
+                content = snapshot.encode(data)
+            elif fmt == "compact":
+                content = json.dumps(data, separators=(",", ":"))
+            else:
+                content = json.dumps(data, indent=4)
+        metrics.count("store.bytes_written", len(content))
+        atomic_write(self.path, content, mode="wb" if fmt == "binary" else "w")
+
+    @timed("store.read_section")
+    def read_section(self, name, default=None):
+        try:
+            with open(self.path, "rb") as file:
+                fmt = self._detect(file.read(16))
+                file.seek(0)
+                if fmt == "binary":
+                    found, value = snapshot.read_section(file, name)
+                    return value if found else default
+                if fmt is not None:
+                    found, value = SectionReader(io.TextIOWrapper(file, encoding="utf-8")).value(name)
+                    return value if found else default
+        except FileNotFoundError:
+            pass
+        except (ValueError, struct.error, UnicodeDecodeError) as e:
+            raise StorageError(f"'{self.path}' is corrupt ({e}). Restore it from a backup or run clear-data.") from e
+        return default_data().get(name, default)
+
+    def iter_section(self, name):
+        try:
+            with open(self.path, "rb") as file:
+                fmt = self._detect(file.read(16))
+                if fmt not in (None, "binary"):
+                    file.seek(0)
+                    yield from SectionReader(io.TextIOWrapper(file, encoding="utf-8")).section(name)
+                    return
+        except FileNotFoundError:
+            pass
+        except (ValueError, UnicodeDecodeError) as e:
+            raise StorageError(f"'{self.path}' is corrupt ({e}). Restore it from a backup or run clear-data.") from e
+        yield from entries(self.read_section(name))
+
+    def format(self):
+        """The format the next save will use."""
+        if self.fmt:
+            return self.fmt
+        if self._detected is None:
+            try:
+                with open(self.path, "rb") as file:
+                    self._detected = self._detect(file.read(16))
+            except FileNotFoundError:
+                pass
+        return self._detected or self.DEFAULT_FORMAT
+
+    @staticmethod
+    def _detect(content):
+        if snapshot.is_snapshot(content):
+            return "binary"
+        if not content.strip():
+            return None
+        return "json" if content.lstrip(b"{")[:1] in (b"\n", b"\r", b" ") else "compact"
+
+    def clear(self):
+        self.save({
+            "households": {},
+            "habits": [],
+            "bonus_habits": [],
+            "leaderboard": {"rankings": {}, "past_rankings": []}
+        })
+
+
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+SHARD_SUFFIX = ".shards"
+
+
+class LazyDocument:
+    """Read-only stand-in for a loaded data document that reads each section on first access.
+
+    Lets read-only queries touch only the sections they use; sections they
+    only scan can be streamed with iter_section() instead.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.sections = {}
+
+    def get(self, name, default=None):
+        if name not in self.sections:
+            self.sections[name] = self.store.read_section(name)
+        value = self.sections[name]
+        return default if value is None else value
+
+    def __getitem__(self, name):
+        value = self.get(name)
+        if value is None:
+            raise KeyError(name)
+        return value
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+
+def iter_section(data, name):
+    """Entries of one section of a loaded document, streamed from the store for a LazyDocument."""
+    if isinstance(data, LazyDocument) and name not in data.sections:
+        return data.store.iter_section(name)
+    return entries(data.get(name))
+
+
+def open_store(path, journal=True):
+    """Picks the storage backend from the file extension.
+
+    With journal=True the store is wrapped so completions are appended to
+    <path>.log instead of rewriting the whole snapshot. A path ending in
+    .shards is a directory of such stores (see services/sharding.py).
+    """
+    if str(path).endswith(SHARD_SUFFIX):
+        from services.sharding import ShardedStore
+        return ShardedStore(path, journal)
+    if str(path).endswith(SQLITE_SUFFIXES):
+        from services.sqlite_store import SQLiteStore
+        store = SQLiteStore(path)
+    else:
+        store = FileStore(path)
+    if journal:
+        from services.journal import JournaledStore
+        store = JournaledStore(store, f"{path}.log")
+    return store
+
+
+def migrate(source_path, target_path):
+    """Copies everything from one store into another, e.g. data.json into data.db."""
+    if not os.path.exists(source_path):
+        raise FileNotFoundError(source_path)
+    data = open_store(source_path).load()
+    target = open_store(target_path)
+    with target.lock():
+        target.save(data)
+    logging.info(f"Migrated '{source_path}' to '{target_path}'.")
+    return data
+
+
+def convert(path, fmt):
+    """Rewrites a file store in another format ("json", "compact" or "binary")."""
+    if fmt not in FileStore.FORMATS:
+        raise ValueError(f"Unknown format '{fmt}'.")
+    store = open_store(path)
+    file_store = getattr(store, "base", store)
+    if not isinstance(file_store, FileStore):
+        raise StorageError(f"'{path}' is not a file store; only data files can change format.")
+    with store.lock():
+        data = store.load()
+        previous = file_store.format()
+        file_store.fmt = fmt
+        store.save(data)
+    logging.info(f"Converted '{path}' from {previous} to {fmt}.")
+    return previous
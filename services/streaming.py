@@ -0,0 +1,115 @@
+import json
+import re
+
+
+class SectionReader:
+    """Reads one top-level section of a JSON document without parsing the rest.
+
+    The file is consumed in chunks. Entries of the wanted section (key/value
+    pairs of an object, items of an array) are decoded one at a time with
+    json's C scanner and yielded, so memory stays proportional to the largest
+    single entry instead of the whole document. Sections before it are walked
+    entry by entry and discarded; reading stops as soon as the section ends.
+    """
+
+    CHUNK = 1 << 16
+    WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+    def __init__(self, file):
+        self.file = file
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self, size):
+        chunk = self.file.read(size)
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        self.eof = not chunk
+
+    def _peek(self):
+        while True:
+            self.pos = self.WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer) or self.eof:
+                return self.buffer[self.pos:self.pos + 1]
+            self._fill(self.CHUNK)
+
+    def _expect(self, char):
+        if self._peek() != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", self.buffer, self.pos)
+        self.pos += 1
+
+    def _value(self):
+        self._peek()
+        size = self.CHUNK
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # a value ending exactly at the buffer's end may be a truncated number
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill(size)
+            size *= 2
+
+    def _entries(self):
+        """Yields (key, value) pairs of an object, items of an array, or a lone scalar."""
+        opening = self._peek()
+        if opening not in ("{", "["):
+            yield self._value()
+            return
+        closing = "}" if opening == "{" else "]"
+        self.pos += 1
+        if self._peek() == closing:
+            self.pos += 1
+            return
+        while True:
+            if opening == "{":
+                key = self._value()
+                self._expect(":")
+                yield key, self._value()
+            else:
+                yield self._value()
+            if self._peek() == ",":
+                self.pos += 1
+            else:
+                self._expect(closing)
+                return
+
+    def sections(self):
+        """Yields (name, entries) for each top-level section; entries must be consumed before moving on."""
+        if self._peek() == "":
+            return
+        self._expect("{")
+        if self._peek() == "}":
+            return
+        while True:
+            name = self._value()
+            self._expect(":")
+            entries = self._entries()
+            yield name, entries
+            for _ in entries:
+                pass
+            if self._peek() == ",":
+                self.pos += 1
+            else:
+                self._expect("}")
+                return
+
+    def value(self, name):
+        """Returns (found, value) for the named section, decoding only that section."""
+        for section_name, entries in self.sections():
+            if section_name == name:
+                return True, self._value()
+        return False, None
+
+    def section(self, name):
+        """Yields the entries of the named section, or nothing if it is absent."""
+        for section_name, entries in self.sections():
+            if section_name == name:
+                yield from entries
+                return
@@ -1,5 +1,6 @@
-import json
 import logging
+import os
+from services.storage import open_store
 
 class Tracker:
     def __init__(self, filename='data.json'):
@@ -7,25 +8,30 @@ class Tracker:
         self.data = self.get_data()
 
     def get_data(self):
-        try:
-            with open(self.filename, 'r', encoding='utf-8') as file:
-                return json.load(file)
-        except (FileNotFoundError, json.JSONDecodeError):
-            logging.warning(f"Data file '{self.filename}' not found or corrupt.")
+        if not os.path.exists(self.filename):
+            logging.warning(f"Data file '{self.filename}' not found.")
             return {"users": [], "habits": [], "households": []}
+        return open_store(self.filename).load()
 
     def save_data(self):
-        with open(self.filename, 'w', encoding='utf-8') as file:
-            json.dump(self.data, file, indent=4)
+        """Writes self.data back under the store lock."""
+        store = open_store(self.filename)
+        with store.lock():
+            store.save(self.data)
+
+    def update(self, change):
+        """Reloads the data under the store lock, applies change(data) and saves it, so concurrent updates are kept."""
+        store = open_store(self.filename)
+        with store.lock():
+            self.data = self.get_data()
+            change(self.data)
+            store.save(self.data)
 
     def add_user(self, user):
-        self.data['users'].append(user.to_dict())
-        self.save_data()
+        self.update(lambda data: data.setdefault('users', []).append(user.to_dict()))
 
     def add_habit(self, habit):
-        self.data['habits'].append(habit.to_dict())
-        self.save_data()
+        self.update(lambda data: data.setdefault('habits', []).append(habit.to_dict()))
 
     def add_household(self, household):
-        self.data['households'].append(household.to_dict())
-        self.save_data()
+        self.update(lambda data: data.setdefault('households', []).append(household.to_dict()))
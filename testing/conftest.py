@@ -0,0 +1,21 @@
+import pytest
+from services.data_manager import DataManager
+from classes.user import User
+from classes.habit import Habit
+
+@pytest.fixture
+def data_path(tmp_path, monkeypatch):
+    """Points DataManager at a data.json that does not exist yet."""
+    path = tmp_path / "data.json"
+    monkeypatch.setattr(DataManager, "FILE_PATH", str(path))
+    return path
+
+@pytest.fixture
+def data_file(data_path):
+    """Household "Home" with kris and len, the daily "Make bed" (5 points) and the daily bonus "Wash dishes" (10)."""
+    DataManager.create_household("Home")
+    DataManager.save_user(User("kris", "Home"))
+    DataManager.save_user(User("len", "Home"))
+    DataManager.save_habit(Habit("Make bed", "daily", 5))
+    DataManager.save_bonus_habit(Habit("Wash dishes", "daily", 10, is_bonus=True))
+    return data_path
@@ -0,0 +1,78 @@
+import random
+import pytest
+from datetime import datetime, timedelta
+from services import aggregates as aggregates_module
+from services.aggregates import Aggregates, top_k
+from services.data_manager import DataManager, Session
+from services.leaderboard import Leaderboard
+from services.rollover import Rollover
+from services.sharding import merge, split
+from services.storage import open_store
+from classes.user import User
+from classes.habit import Habit
+
+START = datetime(2025, 3, 30, 8)
+USERS = {"kris": "Home", "len": "Home", "mamma": "Flat", "papa": "Flat", "sis": "Flat"}
+
+@pytest.fixture
+def data_file(data_path, monkeypatch):
+    monkeypatch.setattr(aggregates_module, "TOP_K", 3)
+    DataManager.create_household("Home")
+    DataManager.create_household("Flat")
+    for username, household in USERS.items():
+        DataManager.save_user(User(username, household))
+    DataManager.save_habit(Habit("Make bed", "daily", 5))
+    DataManager.save_habit(Habit("Laundry", "weekly", 20))
+    DataManager.save_bonus_habit(Habit("Wash dishes", "daily", 10, is_bonus=True))
+    Rollover.run(now=START)
+    return data_path
+
+def recomputed(data):
+    """The aggregates as seeding would compute them from scratch."""
+    fresh = dict(data)
+    del fresh["aggregates"]
+    return Aggregates(fresh).values
+
+def test_maintained_on_write_match_recomputation(data_file):
+    rng = random.Random(0)
+    with DataManager.session() as session:
+        for i in range(60):
+            DataManager.record_completion(rng.choice(list(USERS)), rng.choice(["Make bed", "Laundry", "Wash dishes"]),
+                                          session=session, now=START + timedelta(hours=5 * i))
+    data = open_store(str(data_file)).load()
+    assert data["aggregates"] == recomputed(data)
+    assert data["aggregates"]["households"] == {household: sum(details["points"].values())
+                                                for household, details in data["households"].items()}
+    assert sum(data["aggregates"]["habits"].values()) == sum(
+        len(times) for per_habit in data["history"].values() for times in per_habit.values())
+    assert set(data["aggregates"]["monthly"]) == {"03-2025", "04-2025"}
+
+def test_global_top_and_top_performers(data_file):
+    with DataManager.session() as session:
+        for username, times in (("kris", 3), ("mamma", 2), ("papa", 1), ("sis", 4)):
+            for day in range(times):
+                DataManager.complete_habit(username, "Make bed", session=session, now=START + timedelta(days=day))
+    expected = [("sis", "Flat", 20), ("kris", "Home", 15), ("mamma", "Flat", 10)]
+    assert Leaderboard.snapshot(3) == expected
+    assert Leaderboard().get_global_rankings(3) == expected
+
+    Rollover.run(now=datetime(2025, 4, 1, 0, 1))
+    assert Leaderboard().get_top_performers() == {"03-2025": ("sis", 20)}
+    assert [entry["month"] for entry in Leaderboard().get_past_rankings()] == ["03-2025", "03-2025"]
+    data = open_store(str(data_file)).load()
+    assert data["aggregates"]["top"] == [] and data["aggregates"]["households"] == {"Home": 0, "Flat": 0}
+
+def test_top_refills_when_a_user_drops_out(data_file):
+    session = Session(data=open_store(str(data_file)).load())
+    for username, points in (("kris", 40), ("len", 30), ("mamma", 20), ("papa", 10)):
+        Leaderboard.update(User(username, USERS[username], points=points), session=session)
+    Leaderboard.update(User("kris", "Home", points=5), session=session)
+    assert session.aggregates.values["top"] == [["len", "Home", 30], ["mamma", "Flat", 20], ["papa", "Flat", 10]]
+    assert session.aggregates.values["top"] == top_k(session.data["leaderboard"]["rankings"], 3)
+
+def test_split_and_merge(data_file):
+    with DataManager.session() as session:
+        for i, username in enumerate(USERS):
+            DataManager.complete_habit(username, "Make bed", session=session, now=START + timedelta(days=i))
+    data = open_store(str(data_file)).load()
+    assert merge(split(data, 4))["aggregates"] == data["aggregates"]
@@ -0,0 +1,68 @@
+import pytest
+from datetime import date, timedelta
+
+np = pytest.importorskip("numpy")
+from services.analytics import AnalyticsEngine
+from classes.user import User
+
+HABITS = [
+    {"name": "Make bed", "periodicity": "daily", "points": 5, "is_bonus": False},
+    {"name": "Laundry", "periodicity": "weekly", "points": 20, "is_bonus": False},
+]
+
+@pytest.fixture
+def engine():
+    start = date(2025, 3, 1)
+    records = [("kris", "Make bed", start + timedelta(days=d)) for d in [0, 1, 2, 3, 5, 6, 30]]
+    records += [("kris", "Make bed", start + timedelta(days=1))]  # same day twice
+    records += [("len", "Laundry", date(2025, 3, 3) + timedelta(weeks=w)) for w in range(4)]
+    records += [("len", "Unknown", start)]
+    return AnalyticsEngine.from_records(records, HABITS)
+
+def test_counts_and_breakdown(engine):
+    assert engine.users == ["kris", "len"]
+    assert engine.completion_counts().tolist() == [[8, 0], [0, 4]]
+    breakdown = engine.periodicity_breakdown()
+    assert breakdown["daily"][1].tolist() == [40, 0]
+    assert breakdown["weekly"][0].tolist() == [0, 4]
+
+def test_streaks(engine):
+    _, longest = engine.streaks()
+    assert longest.tolist() == [[4, 0], [0, 4]]
+    current, _ = engine.between(end=date(2025, 3, 7)).streaks(today=date(2025, 3, 7))
+    assert current.tolist() == [[2, 0], [0, 1]]
+    current, _ = engine.streaks(today=date(2025, 4, 15))
+    assert current.tolist() == [[0, 0], [0, 0]]
+    current, _ = engine.streaks(today=date(2025, 3, 26))
+    assert current[1, 1] == 4
+
+def test_rates_and_points_over_time(engine):
+    rates = engine.completion_rates(date(2025, 3, 1), date(2025, 3, 10))
+    assert rates[0, 0] == pytest.approx(6 / 10)
+    labels, points = engine.points_over_time("month")
+    assert labels == ["2025-03"]
+    assert points.tolist() == [[40], [80]]
+
+def test_report_matches_python(engine):
+    report = engine.report(date(2025, 3, 1), date(2025, 3, 31))
+    assert report["kris"]["completions"] == 8
+    assert report["kris"]["points"] == 40
+    assert report["kris"]["longest_streak"] == 4
+    assert report["len"]["weekly"] == 4
+
+def test_from_data_reads_bonus_claims():
+    data = {"habits": [], "bonus_habits": [{"name": "Wash dishes", "periodicity": "weekly", "points": 10}],
+            "completed_habits": {"2025-10": {"Wash dishes": "kris"}, "2025-11": {"Wash dishes": "kris"}}}
+    engine = AnalyticsEngine.from_data(data)
+    assert engine.days.tolist() == [date(2025, 3, 10).toordinal(), date(2025, 3, 17).toordinal()]
+    assert engine.streaks(today=date(2025, 3, 18))[0].tolist() == [[2]]
+
+def test_engine_from_users(engine):
+    users = {}
+    for username, habit_name, day in [("kris", "Make bed", date(2025, 3, 1) + timedelta(days=d)) for d in [0, 1, 1, 2, 3, 5, 6, 30]] + \
+            [("len", "Laundry", date(2025, 3, 3) + timedelta(weeks=w)) for w in range(4)]:
+        users.setdefault(username, User(username, "Home")).track_completion(habit_name, day, "daily")
+    from_users = AnalyticsEngine.from_users(users.values(), HABITS)
+    assert from_users.users == engine.users
+    assert from_users.completion_counts().tolist() == engine.completion_counts().tolist()
+    assert from_users.streaks()[1].tolist() == engine.streaks()[1].tolist()
@@ -0,0 +1,35 @@
+from benchmarks.suite import SCENARIOS, compare, run
+from benchmarks.synthetic import synthetic_household_data
+from services.data_manager import DataManager
+from classes.user import User
+
+def test_generator_is_deterministic_and_consistent():
+    data, records = synthetic_household_data(households=3, members=2, habits=5, years=1, seed=7)
+    assert (data, records) == synthetic_household_data(households=3, members=2, habits=5, years=1, seed=7)
+    assert records == sorted(records, key=lambda record: record[2])
+    habits = {habit["name"]: habit for habit in data["habits"] + data["bonus_habits"]}
+    users, earned = {}, {}
+    for username, habit_name, when in records:
+        habit = habits[habit_name]
+        earned[username] = earned.get(username, 0) + habit["points"]
+        if not habit["is_bonus"]:
+            user = users.setdefault(username, User(username, None))
+            user.advance_streak(habit_name, when.toordinal(), habit["periodicity"])
+            earned[username] += user.get_bonus_points(habit_name)
+    assert any(earned[username] > sum(habits[h]["points"] for u, h, _ in records if u == username) for username in earned)
+    for household, details in data["households"].items():
+        assert all(details["points"][user] == earned.get(user, 0) for user in details["members"])
+        assert data["leaderboard"]["rankings"][household] == details["points"]
+
+def test_every_scenario_runs():
+    file_path = DataManager.FILE_PATH
+    results = run(list(SCENARIOS), repeats=1, ops=20, households=2, members=2, habits=5, years=1)
+    assert DataManager.FILE_PATH == file_path
+    assert set(results) >= set(SCENARIOS) - {"analytics.report"}
+    assert all(result["per_op_s"] > 0 for result in results.values())
+
+def test_compare_flags_regressions():
+    baseline = {"store.load": {"per_op_s": 0.010}, "complete_habit": {"per_op_s": 0.001}}
+    current = {"store.load": {"per_op_s": 0.020}, "complete_habit": {"per_op_s": 0.0005}, "user_stats": {"per_op_s": 0.1}}
+    verdicts = {row[0]: row[-1] for row in compare(baseline, current, threshold=0.25)}
+    assert verdicts == {"store.load": "REGRESSION", "complete_habit": "faster", "user_stats": "new"}
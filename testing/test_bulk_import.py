@@ -0,0 +1,62 @@
+import io
+import json
+from datetime import datetime, timedelta, timezone
+from services.data_manager import DataManager
+from services.importer import read_records
+
+CSV = """username,habit,timestamp
+len,Make bed,2025-03-14T08:00:00
+kris,Make bed,2025-03-13T07:00:00
+kris,Wash dishes,2025-03-13
+len,Wash dishes,2025-03-13T21:00:00
+kris,Unknown,2025-03-13
+nobody,Make bed,not-a-date
+"""
+
+def test_read_records_skips_malformed_rows():
+    records = list(read_records(io.StringIO(CSV), "csv"))
+    assert len(records) == 5
+    assert records[0][0] == "len" and records[0][2].day == 14
+
+def test_read_jsonl_records():
+    stream = io.StringIO('{"username": "kris", "habit": "Make bed", "timestamp": "2025-03-13"}\n\n{broken\n')
+    assert [r[:2] for r in read_records(stream, "jsonl")] == [("kris", "Make bed")]
+
+def test_timestamps_with_an_offset_become_local_time(data_file):
+    stream = io.StringIO("username,habit,timestamp\nkris,Make bed,2025-03-13T07:00:00Z\n"
+                         "len,Make bed,2025-03-14T08:00:00+02:00\nkris,Make bed,2025-03-15T07:00:00\n")
+    records = list(read_records(stream, "csv"))
+    assert all(timestamp.tzinfo is None for _, _, timestamp in records)
+    assert records[0][2] == datetime(2025, 3, 13, 7, tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+
+    assert DataManager.complete_many(records)["applied"] == 3
+
+def test_complete_many_applies_in_order_and_writes_once(data_file, monkeypatch):
+    saves = []
+    original = DataManager.save_data
+    monkeypatch.setattr(DataManager, "save_data", staticmethod(lambda data, *args, **kwargs: saves.append(1) or original(data, *args, **kwargs)))
+
+    stats = DataManager.complete_many(read_records(io.StringIO(CSV), "csv"))
+
+    assert stats["records"] == 5 and stats["applied"] == 3 and stats["rejected"] == 2
+    assert len(saves) == 1
+    data = json.loads(data_file.read_text())
+    # kris claimed the dishes first, so len's later claim for the same day is rejected
+    assert data["completed_habits"]["2025-03-13"] == {"Wash dishes": "kris"}
+    assert data["households"]["Home"]["points"] == {"kris": 15, "len": 5}
+    assert data["leaderboard"]["rankings"]["Home"] == {"kris": 15, "len": 5}
+
+def test_backfill_keeps_the_active_streak(data_file):
+    today = datetime(2025, 3, 13, 8)
+    for day in range(3):
+        DataManager.complete_habit("kris", "Make bed", now=today - timedelta(days=2 - day))
+
+    DataManager.complete_many([("kris", "Make bed", today - timedelta(days=400)), ("kris", "Make bed", today - timedelta(days=399))])
+    DataManager.complete_habit("kris", "Make bed", now=today - timedelta(days=500))
+
+    data = DataManager.load_data()
+    assert data["streaks"]["kris"]["Make bed"] == 3
+    assert data["streak_state"]["kris"]["Make bed"]["longest"] == 3
+    assert data["households"]["Home"]["points"]["kris"] == 6 * 5
+    assert DataManager.complete_habit("kris", "Make bed", now=today + timedelta(days=1))
+    assert DataManager.load_data()["streaks"]["kris"]["Make bed"] == 4
@@ -0,0 +1,70 @@
+import pytest
+from services.cache import AnalyticsCache
+from services.data_manager import DataManager
+from services.leaderboard import Leaderboard
+from services.storage import open_store
+from classes.habit import Habit
+
+@pytest.fixture
+def data_file(data_file, monkeypatch):
+    DataManager.save_habit(Habit("Read", "daily", 5))
+    monkeypatch.setattr(DataManager, "cache", AnalyticsCache())
+    return data_file
+
+def test_lru_eviction_respects_memory_cap():
+    cache = AnalyticsCache(max_bytes=3000)
+    for key in range(10):
+        cache.get(key, lambda: "x" * 1000, version=1)
+    assert cache.bytes <= 3000
+    assert 0 not in cache.entries and 9 in cache.entries
+    assert cache.evictions > 0
+
+def test_invalidate_only_affected_entries():
+    cache = AnalyticsCache()
+    cache.get("kris", lambda: 1, version=1, users=["kris"])
+    cache.get("len", lambda: 2, version=1, users=["len"])
+    cache.get("read", lambda: 3, version=1, habits=["Read"])
+    cache.get("global", lambda: 4, version=1)
+    cache.invalidate(users=["kris"], habits=["Make bed"])
+    assert set(cache.entries) == {"len", "read"}
+    assert cache.get("len", lambda: 5, version=2) == 5
+    assert set(cache.entries) == {"len"}
+
+def test_result_computed_across_an_invalidation_is_not_stored():
+    cache = AnalyticsCache()
+
+    def compute():
+        # e.g. a commit on another thread invalidating the user meanwhile
+        cache.invalidate(users=["kris"])
+        return 1
+    assert cache.get("kris", compute, version=1, users=["kris"]) == 1
+    assert "kris" not in cache.entries
+    assert cache.get("kris", lambda: 2, version=1, users=["kris"]) == 2
+
+def test_stats_are_served_from_cache(data_file):
+    assert DataManager.user_stats("kris")["points"] == 0
+    DataManager.user_stats("kris")
+    Leaderboard.snapshot()
+    Leaderboard.snapshot()
+    assert DataManager.cache.hits == 2
+
+def test_completion_invalidates_affected_users_and_habits(data_file):
+    with DataManager.session() as session:
+        DataManager.user_stats("kris", session=session)
+        DataManager.user_stats("len", session=session)
+        DataManager.habit_stats("Read", session=session)
+        DataManager.complete_habit("kris", "Make bed", session=session)
+        assert set(DataManager.cache.entries) == {("user_stats", "len"), ("habit_stats", "Read")}
+        assert DataManager.user_stats("kris", session=session)["points"] == 5
+    # the session's own write keeps the remaining entries valid
+    misses = DataManager.cache.misses
+    assert DataManager.user_stats("len")["points"] == 0
+    assert DataManager.cache.misses == misses
+
+def test_write_by_another_process_clears_cache(data_file):
+    assert DataManager.user_stats("kris")["points"] == 0
+    store = open_store(str(data_file))
+    data = store.load()
+    data["households"]["Home"]["points"]["kris"] = 42
+    store.save(data)
+    assert DataManager.user_stats("kris")["points"] == 42
@@ -0,0 +1,24 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run(code_or_args, tmp_path, script=False):
+    env = dict(os.environ, HOMESTREAK_DATA=str(tmp_path / "data.json"))
+    command = [sys.executable, os.path.join(ROOT, "cli.py")] + code_or_args if script else [sys.executable, "-c", code_or_args]
+    return subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True)
+
+
+def test_importing_cli_loads_no_services(tmp_path):
+    result = run("import sys, cli; print(sorted(m for m in sys.modules if m.startswith(('services', 'classes'))))", tmp_path)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[]"
+
+
+def test_help_does_not_read_the_store(tmp_path):
+    (tmp_path / "data.json").write_text("{ not json", encoding="utf-8")
+    result = run(["--help"], tmp_path, script=True)
+    assert result.returncode == 0, result.stderr
+    assert "complete-habit" in result.stdout
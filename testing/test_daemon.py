@@ -0,0 +1,62 @@
+import threading
+import pytest
+from click.testing import CliRunner
+import cli
+from services.daemon import Client, Daemon, DaemonUnavailable
+from services.data_manager import DataManager
+from services.storage import open_store
+from classes.user import User
+from classes.habit import Habit
+
+@pytest.fixture
+def daemon(tmp_path, monkeypatch):
+    monkeypatch.setattr(DataManager, "FILE_PATH", str(tmp_path / "data.json"))
+    DataManager.create_household("Home")
+    DataManager.save_user(User("kris", "Home"))
+    DataManager.save_habit(Habit("Make bed", "daily", 5))
+    daemon = Daemon(str(tmp_path / "d.sock"), flush_interval=60)
+    thread = threading.Thread(target=daemon.serve_forever)
+    thread.start()
+    client = Client(daemon.socket_path)
+    for _ in range(100):
+        try:
+            client.call("ping")
+            break
+        except DaemonUnavailable:
+            threading.Event().wait(0.01)
+    yield daemon
+    daemon.shutdown()
+    thread.join()
+
+def test_commands_are_served_from_memory(daemon):
+    client = Client(daemon.socket_path)
+    assert client.call("complete_habit", username="kris", habit_name="Make bed") == {"found": True, "is_bonus": False, "success": True}
+    assert client.call("complete_habit", username="kris", habit_name="Nope")["found"] is False
+    assert client.call("view_leaderboard", household_name="Home") == [["kris", 5]]
+    # write-behind: nothing reaches the store until a flush
+    assert open_store(DataManager.FILE_PATH).load()["households"]["Home"]["points"]["kris"] == 0
+    assert client.call("flush") is True
+    assert open_store(DataManager.FILE_PATH).load()["households"]["Home"]["points"]["kris"] == 5
+
+def test_shutdown_flushes_and_removes_socket(daemon):
+    Client(daemon.socket_path).call("complete_habit", username="kris", habit_name="Make bed")
+    daemon.shutdown()
+    with pytest.raises(DaemonUnavailable):
+        Client(daemon.socket_path).call("ping")
+    assert open_store(DataManager.FILE_PATH).load()["households"]["Home"]["points"]["kris"] == 5
+
+def test_cli_commands_go_through_the_daemon(daemon, monkeypatch):
+    monkeypatch.setenv("HOMESTREAK_SOCKET", daemon.socket_path)
+    runner = CliRunner()
+    # run locally, each of these would wait for the store lock the daemon holds
+    for args in (["add-user", "len", "Home"], ["add-habit", "Read", "daily", "5"], ["complete-habit", "len", "Read"]):
+        assert runner.invoke(cli.cli, args).exit_code == 0
+    assert "- Read: 1 completions" in runner.invoke(cli.cli, ["history", "len"]).output
+    assert runner.invoke(cli.cli, ["view-open-habits", "len"]).output.splitlines()[1:] == ["- Make bed"]
+
+    result = runner.invoke(cli.cli, ["clear-data"])
+    assert result.exit_code == 1 and "stop it before running 'clear-data'" in result.output
+
+def test_client_without_daemon(tmp_path):
+    with pytest.raises(DaemonUnavailable):
+        Client(str(tmp_path / "missing.sock")).call("ping")
@@ -0,0 +1,59 @@
+import pytest
+from datetime import datetime, timedelta
+from services.data_manager import DataManager
+from classes.user import User
+
+def test_complete_habit_appends_without_rewriting(data_file, monkeypatch):
+    monkeypatch.setattr(DataManager, "save_data", staticmethod(lambda data, *args, **kwargs: pytest.fail("unexpected write")))
+    snapshot = data_file.read_text()
+
+    assert DataManager.complete_habit("kris", "Make bed")
+    assert data_file.read_text() == snapshot
+    assert len((data_file.parent / "data.json.log").read_text().splitlines()) == 1
+
+    data = DataManager.load_data()
+    assert data["households"]["Home"]["points"]["kris"] == 5
+    assert data["leaderboard"]["rankings"]["Home"] == {"kris": 5}
+
+def test_session_batches_operations(data_file, monkeypatch):
+    saves = []
+    original = DataManager.save_data
+    monkeypatch.setattr(DataManager, "save_data", staticmethod(lambda data, *args, **kwargs: saves.append(1) or original(data, *args, **kwargs)))
+
+    with DataManager.session() as session:
+        DataManager.save_user(User("sis", "Home"), session=session)
+        DataManager.complete_habit("kris", "Make bed", session=session)
+        DataManager.complete_habit("len", "Make bed", session=session)
+        assert session.dirty == {"households", "streaks", "streak_state", "leaderboard", "periods", "history", "aggregates"}
+    assert len(saves) == 1
+    assert not session.dirty
+
+def test_session_without_changes_does_not_write(data_file, monkeypatch):
+    monkeypatch.setattr(DataManager, "save_data", staticmethod(lambda data, *args, **kwargs: pytest.fail("unexpected write")))
+    with DataManager.session() as session:
+        assert DataManager.get_habit("Make bed", session=session)["points"] == 5
+
+def test_streak_state_is_kept_in_the_document(data_file):
+    start = datetime(2025, 3, 1, 8)
+    for day in [0, 1, 2, 4, 5]:
+        DataManager.complete_habit("kris", "Make bed", now=start + timedelta(days=day))
+    data = DataManager.load_data()
+    assert data["streaks"]["kris"]["Make bed"] == 2
+    assert data["streak_state"]["kris"]["Make bed"]["longest"] == 3
+
+    with DataManager.session() as session:
+        session.data["streak_state"]["kris"]["Make bed"]["longest"] = 0
+        session.data["streaks"]["kris"]["Make bed"] = 9
+        session.mark_dirty("streaks", "streak_state")
+    assert DataManager.rebuild_streaks() == 1
+    assert DataManager.user_stats("kris")["longest_streaks"] == {"Make bed": 3}
+    assert DataManager.load_data()["streaks"]["kris"]["Make bed"] == 2
+
+def test_seventh_day_in_a_row_earns_the_streak_bonus(data_file):
+    start = datetime(2025, 3, 1, 8)
+    with DataManager.session() as session:
+        for day in range(8):
+            DataManager.complete_habit("kris", "Make bed", session=session, now=start + timedelta(days=day))
+    data = DataManager.load_data()
+    assert data["households"]["Home"]["points"]["kris"] == 8 * 5 + 5
+    assert data["aggregates"]["monthly"]["03-2025"]["kris"] == 8 * 5 + 5
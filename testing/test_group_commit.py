@@ -0,0 +1,87 @@
+import threading
+import pytest
+from services.daemon import Client, Daemon, DaemonUnavailable
+from services.data_manager import DataManager
+from services.group_commit import GroupCommit
+from services.storage import open_store
+from classes.user import User
+from classes.habit import Habit
+
+USERS = [f"user{i}" for i in range(8)]
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(DataManager, "FILE_PATH", str(tmp_path / "data.json"))
+    DataManager.create_household("Home")
+    for username in USERS:
+        DataManager.save_user(User(username, "Home"))
+    DataManager.save_habit(Habit("Make bed", "daily", 5))
+    return DataManager.FILE_PATH
+
+def points(path):
+    return open_store(path).load()["households"]["Home"]["points"]
+
+def test_burst_shares_one_flush(store):
+    session = DataManager.session()
+    barrier = threading.Barrier(len(USERS))
+    results = []
+
+    def complete(username):
+        barrier.wait()
+        _, success = group.apply(DataManager.record_completion, username, "Make bed", session=session)
+        # acknowledged means durable: another reader already sees it
+        results.append(success and points(store)[username] == 5)
+
+    with GroupCommit(session, window=0.2) as group:
+        threads = [threading.Thread(target=complete, args=(username,)) for username in USERS]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    session.close()
+    assert results == [True] * len(USERS)
+    assert group.stats["writes"] == len(USERS)
+    assert group.stats["flushes"] < len(USERS)
+
+def test_max_pending_flushes_before_the_window(store):
+    session = DataManager.session()
+    with GroupCommit(session, window=60, max_pending=1) as group:
+        assert group.apply(DataManager.record_completion, "user0", "Make bed", session=session)[1]
+        assert points(store)["user0"] == 5
+    session.close()
+
+def test_reads_do_not_wait(store):
+    session = DataManager.session()
+    with GroupCommit(session, window=60) as group:
+        assert group.apply(DataManager.load_habits, session=session)[0]["name"] == "Make bed"
+        assert group.stats["flushes"] == 0
+    session.close()
+
+def test_failed_flush_is_reported_to_every_caller(store, monkeypatch):
+    session = DataManager.session()
+
+    def fail():
+        raise OSError("disk full")
+    monkeypatch.setattr(session, "commit", fail)
+    with GroupCommit(session, window=0) as group:
+        with pytest.raises(OSError, match="disk full"):
+            group.apply(DataManager.record_completion, "user0", "Make bed", session=session)
+    session.close()
+
+def test_daemon_acknowledges_durable_writes(store, tmp_path):
+    daemon = Daemon(str(tmp_path / "d.sock"), flush_interval=60, group_commit=0.01)
+    thread = threading.Thread(target=daemon.serve_forever)
+    thread.start()
+    client = Client(daemon.socket_path)
+    try:
+        for _ in range(100):
+            try:
+                client.call("ping")
+                break
+            except DaemonUnavailable:
+                threading.Event().wait(0.01)
+        assert client.call("complete_habit", username="user0", habit_name="Make bed")["success"] is True
+        assert points(store)["user0"] == 5
+    finally:
+        daemon.shutdown()
+        thread.join()
@@ -0,0 +1,53 @@
+from datetime import date, datetime
+from services.analytics import AnalyticsEngine
+from services.data_manager import DataManager
+from services import snapshot
+from services.history import CompletionHistory, from_timestamp, to_timestamp
+from services.storage import FileStore, open_store
+
+def test_range_scans():
+    history = CompletionHistory({})
+    for day in (3, 1, 5, 4):
+        history.add("kris", "Make bed", datetime(2025, 3, day, 8))
+    assert history.users["kris"]["Make bed"] == sorted(history.users["kris"]["Make bed"])
+    assert [when.day for when in history.between("kris", date(2025, 3, 3), date(2025, 3, 4))["Make bed"]] == [3, 4]
+    assert history.count("kris", "Make bed", start=date(2025, 3, 4)) == 2
+    assert history.count("kris", "Make bed", end=datetime(2025, 3, 3, 7)) == 1
+    assert history.last("kris", "Make bed") == datetime(2025, 3, 5, 8)
+    assert history.between("len") == {} and history.last("len", "Make bed") is None
+    assert from_timestamp(to_timestamp(datetime(1969, 12, 31, 23, 59))) == datetime(1969, 12, 31, 23, 59)
+
+def test_completions_are_recorded_and_replayed(data_file):
+    with DataManager.session() as session:
+        DataManager.complete_habit("kris", "Make bed", session=session, now=datetime(2025, 3, 10, 8))
+        DataManager.complete_habit("kris", "Make bed", session=session, now=datetime(2025, 3, 11, 8))
+        DataManager.claim_bonus_habit("len", "Wash dishes", session=session, now=datetime(2025, 3, 11, 9))
+    # the completions are still in the journal, so the history comes from replaying it
+    assert open_store(str(data_file)).load()["history"]["kris"]["Make bed"] == [
+        to_timestamp(datetime(2025, 3, 10, 8)), to_timestamp(datetime(2025, 3, 11, 8))]
+    assert DataManager.completion_history("kris", start=date(2025, 3, 11)) == {"Make bed": [datetime(2025, 3, 11, 8)]}
+    assert DataManager.last_completed("len", "Wash dishes") == datetime(2025, 3, 11, 9)
+    assert DataManager.completion_counts() == {"Make bed": 2, "Wash dishes": 1}
+    assert DataManager.user_stats("kris")["completions"] == {"Make bed": 2}
+    assert DataManager.habit_stats("Wash dishes")["completions"] == {"len": 1}
+
+def test_existing_claims_seed_the_history(data_file):
+    store = FileStore(str(data_file))
+    data = store.load()
+    data["completed_habits"] = {"2025-10": {"Wash dishes": "len"}}
+    store.save(data)
+    assert DataManager.completion_history("len") == {"Wash dishes": [datetime(2025, 3, 10)]}
+
+def test_analytics_from_history(data_file):
+    with DataManager.session() as session:
+        for day in (10, 11, 12):
+            DataManager.complete_habit("kris", "Make bed", session=session, now=datetime(2025, 3, day, 8))
+        engine = AnalyticsEngine.from_history(session.data)
+    assert engine.report(date(2025, 3, 1), date(2025, 3, 31), date(2025, 3, 12))["kris"]["completions"] == 3
+
+def test_binary_snapshot_keeps_history():
+    history = CompletionHistory({})
+    history.add("kris", "Make bed", datetime(2025, 3, 10, 8))
+    history.add("kris", "Laundry", datetime(1969, 7, 20, 20))
+    data = {"history": history.users}
+    assert snapshot.decode(snapshot.encode(data)) == data
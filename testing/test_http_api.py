@@ -0,0 +1,92 @@
+import asyncio
+import http.client
+import json
+import os
+import threading
+import pytest
+from click.testing import CliRunner
+import cli
+from services.data_manager import DataManager
+from services.http_api import HttpApi
+from services.storage import open_store
+from classes.user import User
+from classes.habit import Habit
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    monkeypatch.setattr(DataManager, "FILE_PATH", str(tmp_path / "data.json"))
+    DataManager.create_household("Home")
+    DataManager.save_user(User("kris", "Home"))
+    DataManager.save_habit(Habit("Make bed", "daily", 5))
+    api = HttpApi(port=0, flush_interval=60)
+    started = threading.Event()
+    thread = threading.Thread(target=asyncio.run, args=(api.serve(started.set),))
+    thread.start()
+    started.wait(5)
+    yield api
+    api.shutdown()
+    thread.join()
+
+def call(api, method, path, body=None):
+    connection = http.client.HTTPConnection(api.host, api.port, timeout=5)
+    try:
+        connection.request(method, path, None if body is None else json.dumps(body))
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+def points(household="Home", user="kris"):
+    return open_store(DataManager.FILE_PATH).load()["households"][household]["points"][user]
+
+def test_completions_are_served_from_memory(api):
+    assert call(api, "POST", "/completions", {"username": "kris", "habit": "Make bed"}) == (201, {"is_bonus": False, "success": True})
+    assert call(api, "GET", "/leaderboard/Home") == (200, [["kris", 5]])
+    assert call(api, "GET", "/leaderboard?top=1") == (200, [["kris", "Home", 5]])
+    assert call(api, "GET", "/users/kris/stats")[1]["points"] == 5
+    # flushes are batched: nothing reaches the store until one is due
+    assert points() == 0
+    assert call(api, "POST", "/flush") == (200, True)
+    assert points() == 5
+
+def test_reads_reuse_the_snapshot_until_the_next_write(api):
+    call(api, "GET", "/leaderboard/Home")
+    call(api, "GET", "/leaderboard/Home")
+    assert api.stats["view_hits"] == 1
+    call(api, "POST", "/completions", {"username": "kris", "habit": "Make bed"})
+    assert call(api, "GET", "/leaderboard/Home") == (200, [["kris", 5]])
+    assert api.stats["view_hits"] == 1
+
+def test_admin_writes_and_errors(api):
+    assert call(api, "POST", "/households", {"name": "Flat"})[0] == 201
+    assert call(api, "POST", "/users", {"username": "len", "household": "Flat"})[0] == 201
+    assert call(api, "POST", "/habits", {"name": "Wash dishes", "periodicity": "daily", "points": 10, "is_bonus": True})[0] == 201
+    assert call(api, "POST", "/completions", {"username": "len", "habit": "Wash dishes"})[1] == {"is_bonus": True, "success": True}
+    assert call(api, "POST", "/completions", {"username": "len", "habit": "Nope"})[0] == 404
+    assert call(api, "POST", "/completions", {"username": "len"}) == (400, {"error": "Missing field 'habit'."})
+    assert call(api, "GET", "/users/nobody/stats")[0] == 404
+    assert call(api, "GET", "/completions?start=tomorrow")[0] == 400
+    assert call(api, "DELETE", "/habits")[0] == 405
+
+def test_shutdown_flushes(api):
+    call(api, "POST", "/completions", {"username": "kris", "habit": "Make bed"})
+    api.shutdown()
+    with pytest.raises(ConnectionError):
+        call(api, "GET", "/ping")
+    assert points() == 5
+
+def test_cli_commands_find_the_api(api):
+    address = f"{DataManager.FILE_PATH}.http"
+    assert open(address).read() == f"127.0.0.1:{api.port}"
+    runner = CliRunner()
+    # run locally, each of these would wait for the store lock the API holds
+    for args in (["add-user", "len", "Home"], ["complete-habit", "len", "Make bed"]):
+        assert runner.invoke(cli.cli, args).exit_code == 0
+    assert "1. len: 5 points" in runner.invoke(cli.cli, ["view-leaderboard", "Home"]).output
+    assert "not found" in runner.invoke(cli.cli, ["view-user-stats", "nobody"]).output
+
+    for args in (["compact"], ["rollover"]):
+        result = runner.invoke(cli.cli, args)
+        assert result.exit_code == 1 and "An HTTP API is serving this data" in result.output
+    api.shutdown()
+    assert not os.path.exists(address)
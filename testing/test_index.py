@@ -0,0 +1,35 @@
+import pytest
+from services.data_manager import DataManager
+from services.index import DataIndex
+from classes.user import User
+from classes.habit import Habit
+
+@pytest.fixture
+def data():
+    return {
+        "households": {"Home": {"members": ["kris", "len"], "points": {}}, "Away": {"members": ["mamma"], "points": {}}},
+        "habits": [{"name": "Make bed", "periodicity": "daily", "points": 5, "is_bonus": False}],
+        "bonus_habits": [{"name": "Wash dishes", "periodicity": "daily", "points": 10, "is_bonus": True}],
+    }
+
+def test_lookups(data):
+    index = DataIndex(data)
+    assert index.find_household("mamma") == "Away"
+    assert index.find_household("nobody") is None
+    assert index.is_member("len", "Home")
+    assert not index.is_member("len", "Away")
+    assert index.find_habit("Wash dishes")["points"] == 10
+
+def test_index_follows_mutations(tmp_path, monkeypatch):
+    monkeypatch.setattr(DataManager, "FILE_PATH", str(tmp_path / "data.json"))
+    with DataManager.session() as session:
+        DataManager.create_household("Home", session=session)
+        DataManager.save_user(User("kris", "Home"), session=session)
+        DataManager.save_habit(Habit("Make bed", "daily", 5), session=session)
+        DataManager.save_bonus_habit(Habit("Wash dishes", "daily", 10, is_bonus=True), session=session)
+
+        assert DataManager.find_household("kris", session=session) == "Home"
+        assert DataManager.is_member("kris", "Home", session=session)
+        assert DataManager.complete_habit("kris", "Make bed", session=session)
+        assert DataManager.claim_bonus_habit("kris", "Wash dishes", session=session)
+    assert DataManager.find_household("kris") == "Home"
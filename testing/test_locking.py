@@ -0,0 +1,60 @@
+import json
+import multiprocessing
+import pytest
+from services.data_manager import DataManager
+from services.journal import JournaledStore
+from services.storage import FileStore, StorageError, open_store
+from services.tracker import Tracker
+from classes.user import User
+from classes.habit import Habit
+
+PROCESSES = 6
+COMPLETIONS = 15
+
+def complete_many_times(path, username):
+    DataManager.FILE_PATH = path
+    # fold the journal often so snapshot writes race as well
+    JournaledStore.COMPACT_AFTER = 7
+    for _ in range(COMPLETIONS):
+        assert DataManager.complete_habit(username, "Make bed")
+
+@pytest.mark.parametrize("filename", ["data.json", "data.db"])
+def test_parallel_completions_are_not_lost(tmp_path, monkeypatch, filename):
+    path = str(tmp_path / filename)
+    monkeypatch.setattr(DataManager, "FILE_PATH", path)
+    DataManager.create_household("Home")
+    usernames = [f"user{i}" for i in range(PROCESSES)]
+    for username in usernames:
+        DataManager.save_user(User(username, "Home"))
+    DataManager.save_habit(Habit("Make bed", "daily", 5))
+
+    workers = [multiprocessing.Process(target=complete_many_times, args=(path, username)) for username in usernames]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+
+    data = open_store(path).load()
+    assert data["households"]["Home"]["points"] == {username: 5 * COMPLETIONS for username in usernames}
+    assert data["leaderboard"]["rankings"]["Home"] == {username: 5 * COMPLETIONS for username in usernames}
+
+def test_corrupt_file_is_not_replaced(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text('{"households": {"Home": ')
+    with pytest.raises(StorageError):
+        FileStore(str(path)).load()
+    assert path.read_text() == '{"households": {"Home": '
+
+def test_save_leaves_no_temp_files(tmp_path):
+    path = tmp_path / "data.json"
+    FileStore(str(path)).save({"households": {}})
+    assert [p.name for p in tmp_path.iterdir()] == ["data.json"]
+    assert json.loads(path.read_text()) == {"households": {}}
+
+def test_tracker_keeps_concurrent_updates(tmp_path):
+    path = str(tmp_path / "data.json")
+    first, second = Tracker(path), Tracker(path)
+    first.add_habit(Habit("Make bed", "daily", 5))
+    second.add_habit(Habit("Read", "daily", 5))
+    assert [habit["name"] for habit in open_store(path).load()["habits"]] == ["Make bed", "Read"]
@@ -0,0 +1,66 @@
+import json
+import os
+import subprocess
+import sys
+import time
+import pytest
+from services.metrics import Metrics, metrics, timed
+from services.data_manager import DataManager
+from classes.user import User
+from classes.habit import Habit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def enabled():
+    metrics.enable()
+    yield metrics
+    metrics.disable()
+    metrics.reset()
+
+def test_disabled_metrics_record_nothing():
+    recorder = Metrics()
+    with recorder.timer("store.load"):
+        recorder.count("lookup.habit")
+    assert recorder.snapshot() == {"timers": {}, "counters": {}}
+
+def test_nested_timers_split_self_time():
+    recorder = Metrics()
+    recorder.enable()
+    with recorder.timer("store.load"):
+        with recorder.timer("store.parse"):
+            time.sleep(0.01)
+    load, parse = recorder.timers["store.load"], recorder.timers["store.parse"]
+    assert load[0] == parse[0] == 1
+    assert load[1] >= parse[1] >= 0.01
+    assert load[2] == pytest.approx(load[1] - parse[1])
+
+def test_hot_paths_are_instrumented(tmp_path, monkeypatch, enabled):
+    monkeypatch.setattr(DataManager, "FILE_PATH", str(tmp_path / "data.json"))
+    DataManager.create_household("Home")
+    DataManager.save_user(User("kris", "Home"))
+    DataManager.save_habit(Habit("Make bed", "daily", 5))
+    DataManager.complete_habit("kris", "Make bed")
+    snapshot = enabled.snapshot()
+    for phase in ("store.load", "store.save", "journal.append", "lock.wait", "streaks.update", "leaderboard.update"):
+        assert snapshot["timers"][phase]["calls"] >= 1, phase
+    assert snapshot["counters"]["lookup.household"] >= 1
+
+def test_decorator_keeps_the_function(enabled):
+    @timed("work")
+    def work(value):
+        return value * 2
+    assert work(21) == 42 and work.__name__ == "work"
+    assert enabled.timers["work"][0] == 1
+
+def test_profile_option_reports_and_logs(tmp_path):
+    env = dict(os.environ, HOMESTREAK_DATA=str(tmp_path / "data.json"))
+    command = [sys.executable, os.path.join(ROOT, "cli.py"), "--profile", "--profile-output", str(tmp_path / "cli.pstats"),
+               "create-household", "Home"]
+    result = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert "Profile of create-household" in result.stderr and "store.save" in result.stderr
+    with open(tmp_path / "data.json.metrics.jsonl", encoding="utf-8") as file:
+        record = json.loads(file.readline())
+    assert record["command"] == "create-household" and "store.save" in record["timers"]
+    assert (tmp_path / "cli.pstats").stat().st_size > 0
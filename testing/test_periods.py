@@ -0,0 +1,82 @@
+import pytest
+from datetime import date, datetime, timedelta
+from services.data_manager import DataManager
+from services.periods import PeriodIndex, claim_period, period_of
+from classes.habit import Habit
+
+@pytest.fixture
+def data_file(data_file):
+    DataManager.save_habit(Habit("Laundry", "weekly", 20))
+    return data_file
+
+def test_period_ordinals():
+    monday, sunday = date(2025, 3, 10), date(2025, 3, 16)
+    assert period_of(sunday, "week") == period_of(monday, "week") == period_of(monday + timedelta(days=7), "week") - 1
+    assert period_of(date(2025, 1, 31), "month") + 1 == period_of(date(2025, 2, 1), "month")
+    assert claim_period("2025-10") == ("week", period_of(monday, "week"))
+    assert claim_period("2025-03-13") == ("day", date(2025, 3, 13).toordinal())
+
+def test_who_and_open_habits(data_file):
+    now = datetime(2025, 3, 12, 9)
+    with DataManager.session() as session:
+        DataManager.complete_habit("kris", "Make bed", session=session, now=now)
+        DataManager.complete_habit("len", "Laundry", session=session, now=now - timedelta(days=1))
+        DataManager.claim_bonus_habit("len", "Wash dishes", session=session, now=now)
+    assert DataManager.who_completed("Make bed", now=now) == {"kris": 1}
+    assert DataManager.who_completed("Make bed", now=now + timedelta(days=1)) == {}
+    assert DataManager.open_habits("kris", now=now) == ["Laundry"]
+    assert DataManager.open_habits("len", now=now) == ["Make bed"]
+
+def test_streak_follows_periods(data_file):
+    start = datetime(2025, 3, 10, 8)
+    with DataManager.session() as session:
+        for days in (0, 0, 1, 2, 4):
+            DataManager.complete_habit("kris", "Make bed", session=session, now=start + timedelta(days=days))
+        assert session.data["streaks"]["kris"]["Make bed"] == 1
+        DataManager.complete_habit("kris", "Make bed", session=session, now=start + timedelta(days=5))
+        assert session.data["streaks"]["kris"]["Make bed"] == 2
+        assert session.data["households"]["Home"]["points"]["kris"] == 30
+
+def test_range_queries_and_rollup():
+    data = {}
+    index = PeriodIndex(data)
+    start = date(2025, 1, 1)
+    for day in range(120):
+        index.add(start + timedelta(days=day), "Make bed", "kris")
+    assert len(data["periods"]["day"]) <= PeriodIndex.RETENTION["day"] + 1
+    assert len(data["periods"]["week"]) <= PeriodIndex.RETENTION["week"] + 1
+    assert index.between(date(2025, 4, 1), date(2025, 4, 10)) == {"Make bed": {"kris": 10}}
+    # January is only kept as a month aggregate now
+    assert index.between(date(2025, 1, 5), date(2025, 1, 6)) == {"Make bed": {"kris": 31}}
+    assert sum(index.between(start, start + timedelta(days=119))["Make bed"].values()) == 120
+
+def test_index_is_seeded_from_bonus_claims():
+    data = {"completed_habits": {"2025-03-13": {"Wash dishes": "kris"}, "2025-10": {"Laundry": "len"}}}
+    index = PeriodIndex(data)
+    assert index.who("Wash dishes", "day", date(2025, 3, 13)) == {"kris": 1}
+    assert index.who("Laundry", "week", date(2025, 3, 14)) == {"len": 1}
+    assert index.between(date(2025, 3, 1), date(2025, 3, 31)) == {"Wash dishes": {"kris": 1}, "Laundry": {"len": 1}}
+
+def test_backfill_older_than_the_window_only_reaches_its_month():
+    data = {}
+    index = PeriodIndex(data)
+    last = date(2026, 8, 9)
+    for day in range(91):
+        index.add(last - timedelta(days=90 - day), "Make bed", "kris")
+    index.add(last - timedelta(days=100), "Make bed", "kris")
+    assert str((last - timedelta(days=100)).toordinal()) not in data["periods"]["day"]
+    assert index.between(date(2026, 7, 30), last) == {"Make bed": {"kris": 11}}
+    assert sum(index.between(last - timedelta(days=100), last)["Make bed"].values()) == 92
+
+def test_first_bonus_claim_counts_once(data_file):
+    now = datetime(2025, 3, 12, 9)
+    assert DataManager.claim_bonus_habit("len", "Wash dishes", now=now)
+    assert DataManager.who_completed("Wash dishes", now=now) == {"len": 1}
+    assert not DataManager.claim_bonus_habit("kris", "Wash dishes", now=now + timedelta(hours=1))
+
+def test_weekly_bonus_claim_holds_across_the_new_year(data_file):
+    DataManager.save_bonus_habit(Habit("Clean gutters", "weekly", 30, is_bonus=True))
+    # Monday 2025-12-29 and Thursday 2026-01-01 are one week, but "%Y-%W" gives 2025-52 and 2026-00
+    assert DataManager.claim_bonus_habit("kris", "Clean gutters", now=datetime(2025, 12, 29, 9))
+    assert not DataManager.claim_bonus_habit("len", "Clean gutters", now=datetime(2026, 1, 1, 9))
+    assert DataManager.claim_bonus_habit("len", "Clean gutters", now=datetime(2026, 1, 5, 9))
@@ -0,0 +1,33 @@
+import pytest
+from services.ranking import Ranking, RankingIndex
+
+@pytest.fixture
+def ranking():
+    return Ranking({"kris": 615, "len": 360, "mamma": 640}.items())
+
+def test_set_moves_entry(ranking):
+    ranking.set("len", 700)
+    assert ranking.top(2) == [("len", 700), ("mamma", 640)]
+    assert ranking.rank_of("kris") == 3
+    assert len(ranking) == 3
+
+def test_ties_share_rank(ranking):
+    ranking.set("len", 615)
+    assert ranking.rank_of("len") == ranking.rank_of("kris") == 2
+    assert ranking.rank_of("nobody") is None
+
+def test_range_queries(ranking):
+    assert ranking.range(2, 3) == [("kris", 615), ("len", 360)]
+    assert ranking.between(600, 640) == [("mamma", 640), ("kris", 615)]
+
+def test_remove(ranking):
+    ranking.remove("mamma")
+    assert ranking.items() == [("kris", 615), ("len", 360)]
+
+def test_index_keeps_rankings_section_in_step():
+    rankings = {"Home": {"kris": 10}, "Away": {"mamma": 20}}
+    index = RankingIndex(rankings)
+    index.set("Home", "len", 30)
+    assert rankings["Home"] == {"kris": 10, "len": 30}
+    assert index.overall.top(2) == [(("len", "Home"), 30), (("mamma", "Away"), 20)]
+    assert index.household("Home").rank_of("kris") == 2
@@ -0,0 +1,60 @@
+import csv
+import json
+import pytest
+from datetime import datetime, timedelta
+from services.data_manager import DataManager
+from services.report import Reports, month_range
+from classes.user import User
+from classes.habit import Habit
+
+START = datetime(2025, 3, 1, 8)
+
+@pytest.fixture
+def data_file(data_path):
+    for household, members in (("Home", ["kris", "len"]), ("Flat", ["mamma", "papa"]), ("<Den>", ["sis"])):
+        DataManager.create_household(household)
+        for username in members:
+            DataManager.save_user(User(username, household))
+    DataManager.save_habit(Habit("Make bed", "daily", 5))
+    DataManager.save_bonus_habit(Habit("Wash dishes", "daily", 10, is_bonus=True))
+    with DataManager.session() as session:
+        for day, username in enumerate(["kris", "kris", "len", "mamma", "papa", "papa", "papa"]):
+            DataManager.complete_habit(username, "Make bed", session=session, now=START + timedelta(days=day))
+        DataManager.claim_bonus_habit("len", "Wash dishes", session=session, now=START)
+        # outside the reported month
+        DataManager.complete_habit("mamma", "Make bed", session=session, now=START + timedelta(days=40))
+    return data_path
+
+def test_month_range():
+    assert month_range("02-2024") == (datetime(2024, 2, 1).date(), datetime(2024, 2, 29).date())
+    assert month_range("12-2025")[1] == datetime(2025, 12, 31).date()
+    with pytest.raises(ValueError):
+        month_range("2025-03")
+
+def test_household_reports(data_file):
+    home, flat, den = Reports.generate("03-2025", workers=1)
+    assert home["rankings"] == [("len", 15), ("kris", 10)]
+    assert home["habits"] == {"Make bed": {"completions": 3, "points": 15, "by_user": {"kris": 2, "len": 1}},
+                              "Wash dishes": {"completions": 1, "points": 10, "by_user": {"len": 1}}}
+    assert home["top_performer"] == ("len", 15) and home["best_streaks"]["kris"] == 2
+    assert flat["habits"]["Make bed"]["by_user"] == {"mamma": 1, "papa": 3}
+    assert den["rankings"] == [("sis", 0)] and den["top_performer"] is None and den["habits"] == {}
+
+def test_workers_build_the_same_reports(data_file):
+    expected = Reports.generate("03-2025", workers=1)
+    assert Reports.generate("03-2025", workers=2) == expected
+    assert [report["household"] for report in Reports.generate("03-2025", households=["Flat", "Home"], workers=2)] == ["Flat", "Home"]
+
+def test_write_outputs(data_file, tmp_path):
+    reports = Reports.generate("03-2025", workers=1)
+    paths = Reports.write(reports, tmp_path / "out")
+    assert [path.rsplit(".", 1)[1] for path in paths] == ["json", "csv", "html"]
+    with open(paths[0], encoding="utf-8") as file:
+        assert [report["household"] for report in json.load(file)] == ["Home", "Flat", "<Den>"]
+    with open(paths[1], newline="", encoding="utf-8") as file:
+        rows = list(csv.DictReader(file))
+    assert rows[0] == {"household": "Home", "rank": "1", "username": "len", "month_points": "15", "points": "15",
+                       "best_streak": "1", "completions": "2"}
+    with open(paths[2], encoding="utf-8") as file:
+        page = file.read()
+    assert "&lt;Den&gt;" in page and "<Den>" not in page
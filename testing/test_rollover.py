@@ -0,0 +1,61 @@
+import pytest
+from datetime import datetime, timedelta
+from services.data_manager import DataManager
+from services.rollover import Rollover, next_boundary
+from classes.habit import Habit
+
+START = datetime(2025, 3, 10, 8)
+
+@pytest.fixture
+def data_file(data_file):
+    DataManager.save_habit(Habit("Laundry", "weekly", 20))
+    with DataManager.session() as session:
+        DataManager.complete_habit("kris", "Make bed", session=session, now=START)
+        DataManager.complete_habit("len", "Laundry", session=session, now=START)
+    Rollover.run(now=START)
+    return data_file
+
+def test_next_boundary():
+    assert next_boundary(datetime(2025, 3, 12, 15), "daily") == datetime(2025, 3, 13)
+    assert next_boundary(datetime(2025, 3, 10), "weekly") == datetime(2025, 3, 17)
+    assert next_boundary(datetime(2025, 3, 16, 23), "weekly") == datetime(2025, 3, 17)
+    assert next_boundary(datetime(2025, 12, 31), "monthly") == datetime(2026, 1, 1)
+
+def test_schedule_is_seeded_and_extended(data_file):
+    schedule = DataManager.store().read_section("schedule")
+    assert sorted(schedule) == [["2025-03-11T00:00:00", "habit", "Make bed"],
+                                ["2025-03-17T00:00:00", "habit", "Laundry"],
+                                ["2025-04-01T00:00:00", "household", "Home"]]
+    DataManager.save_habit(Habit("Water plants", "daily", 5))
+    assert [entry[2] for entry in DataManager.store().read_section("schedule")].count("Water plants") == 1
+
+def test_nothing_due_does_not_write(data_file):
+    version = DataManager.store().version()
+    assert Rollover.run(now=START + timedelta(hours=1)) == {"habits": 0, "households": 0, "expired_streaks": 0}
+    assert DataManager.store().version() == version
+
+def test_rollover_is_idempotent(data_file):
+    now = START + timedelta(days=1)
+    assert Rollover.run(now=now)["habits"] == 1
+    version = DataManager.store().version()
+    for minute in range(3):
+        assert Rollover.run(now=now + timedelta(minutes=minute))["habits"] == 0
+    assert DataManager.store().version() == version
+
+def test_missed_period_expires_streak(data_file):
+    # completed yesterday: the streak can still continue today
+    assert Rollover.run(now=START + timedelta(days=1))["expired_streaks"] == 0
+    assert Rollover.run(now=START + timedelta(days=2))["expired_streaks"] == 1
+    streaks = DataManager.store().read_section("streaks")
+    assert streaks["kris"]["Make bed"] == 0
+    assert streaks["len"]["Laundry"] == 1
+
+def test_month_end_archives_rankings(data_file):
+    stats = Rollover.run(now=datetime(2025, 4, 1, 0, 5))
+    assert stats["households"] == 1
+    leaderboard = DataManager.store().read_section("leaderboard")
+    assert leaderboard["rankings"] == {}
+    assert {"month": "03-2025", "rankings": {"Home": {"kris": 5, "len": 20}}} in leaderboard["past_rankings"]
+    assert {"month": "03-2025", "top_user": "len", "points": 20} in leaderboard["past_rankings"]
+    assert DataManager.store().read_section("households")["Home"]["points"] == {"kris": 0, "len": 0}
+    assert Rollover.run(now=datetime(2025, 4, 1, 0, 6))["households"] == 0
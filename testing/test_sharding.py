@@ -0,0 +1,99 @@
+import threading
+import pytest
+from services import sharding
+from services.data_manager import DataManager
+from services.leaderboard import Leaderboard
+from services.locking import FileLock, StoreLockTimeout
+from services.sharding import ShardedStore, merge, shard_of, split
+from services.storage import open_store
+from classes.user import User
+from classes.habit import Habit
+from testing.test_storage import SAMPLE
+
+# two households that hash to different shards out of four
+HOUSEHOLDS = ("Home", next(name for name in (f"Flat {i}" for i in range(100)) if shard_of(name, 4) != shard_of("Home", 4)))
+
+@pytest.fixture
+def shards(tmp_path, monkeypatch):
+    path = str(tmp_path / "data.shards")
+    monkeypatch.setattr(DataManager, "FILE_PATH", path)
+    monkeypatch.setattr(sharding, "SHARDS", 4)
+    home, flat = HOUSEHOLDS
+    DataManager.create_household(home)
+    DataManager.create_household(flat)
+    DataManager.save_user(User("kris", home))
+    DataManager.save_user(User("len", home))
+    DataManager.save_user(User("mamma", flat))
+    DataManager.save_habit(Habit("Make bed", "daily", 5))
+    DataManager.save_bonus_habit(Habit("Wash dishes", "daily", 10, is_bonus=True))
+    return path
+
+def test_split_and_merge_round_trip():
+    data = dict(SAMPLE, households=dict(SAMPLE["households"], Away={"members": ["mamma"], "points": {"mamma": 1}}))
+    docs = split(data, 4)
+    assert sum(bool(doc["households"]) for doc in docs) == len({shard_of(name, 4) for name in data["households"]})
+    assert all(doc["habits"] == SAMPLE["habits"] for doc in docs)
+    assert merge(docs) == data
+
+def test_households_live_in_their_shard(shards):
+    store = open_store(shards)
+    assert isinstance(store, ShardedStore)
+    home, flat = HOUSEHOLDS
+    assert store.routing["users"] == {"kris": shard_of(home, 4), "len": shard_of(home, 4), "mamma": shard_of(flat, 4)}
+    assert list(store.stores[shard_of(flat, 4)].load()["households"]) == [flat]
+    assert set(store.load()["households"]) == {home, flat}
+    assert store.find_household("mamma") == flat
+
+def test_completion_locks_only_the_users_shard(shards, monkeypatch):
+    store = open_store(shards)
+    other = store.stores[shard_of(HOUSEHOLDS[1], 4)].lock()
+    held, done = threading.Event(), threading.Event()
+
+    def hold():
+        with other:
+            held.set()
+            done.wait()
+    thread = threading.Thread(target=hold)
+    thread.start()
+    held.wait()
+    try:
+        with DataManager.session("kris", "Make bed") as session:
+            assert set(session.data["households"]) == {HOUSEHOLDS[0]}
+            DataManager.record_completion("kris", "Make bed", session=session)
+        # the bonus claim must see every shard, so it waits for the lock
+        monkeypatch.setattr(FileLock, "TIMEOUT", 0.05)
+        with pytest.raises(StoreLockTimeout):
+            DataManager.session("kris", "Wash dishes")
+    finally:
+        done.set()
+        thread.join()
+    assert open_store(shards).load()["households"][HOUSEHOLDS[0]]["points"]["kris"] == 5
+
+def test_global_leaderboard_fans_out(shards, monkeypatch):
+    monkeypatch.setattr(sharding, "WORKERS", 2)
+    monkeypatch.setattr(sharding, "PARALLEL_BYTES", 0)
+    with DataManager.session() as session:
+        DataManager.record_completion("mamma", "Wash dishes", session=session)
+    with DataManager.session("kris", "Make bed") as session:
+        DataManager.record_completion("kris", "Make bed", session=session)
+    expected = [("mamma", HOUSEHOLDS[1], 10), ("kris", HOUSEHOLDS[0], 5)]
+    assert open_store(shards).global_rankings() == expected
+    assert Leaderboard.snapshot(1) == expected[:1]
+    assert Leaderboard().get_global_rankings() == expected
+
+def test_migrate_into_shards(tmp_path):
+    source, target = str(tmp_path / "data.json"), str(tmp_path / "data.shards")
+    open_store(source).save(dict(SAMPLE))
+    DataManager.migrate_store(source, target)
+    assert open_store(target).load() == SAMPLE
+
+def test_append_routes_events_without_splitting(shards, monkeypatch):
+    with monkeypatch.context() as patch:
+        patch.setattr(sharding, "split", lambda data, shards: pytest.fail("split on append"))
+        with DataManager.session() as session:
+            DataManager.record_completion("mamma", "Make bed", session=session)
+            DataManager.record_completion("kris", "Make bed", session=session)
+    store = open_store(shards)
+    assert store.load()["households"][HOUSEHOLDS[1]]["points"]["mamma"] == 5
+    assert store.stores[shard_of(HOUSEHOLDS[0], 4)].pending == 1
+    assert store.stores[shard_of(HOUSEHOLDS[1], 4)].pending == 1
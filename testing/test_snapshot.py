@@ -0,0 +1,41 @@
+import pytest
+from services import snapshot
+from services.storage import FileStore, convert
+
+DATA = {
+    "households": {"Home": {"members": ["kris", "len"], "points": {"kris": 615, "len": 360}}, "Empty": {"members": [], "points": {}}},
+    "habits": [{"name": "Make bed", "periodicity": "daily", "points": 5, "is_bonus": False}],
+    "bonus_habits": [],
+    "leaderboard": {"rankings": {"Home": {"kris": 615, "len": 360}}, "past_rankings": []},
+    "streaks": {"kris": {"Make bed": 20}, "len": {}},
+    "completed_habits": {"2025-03-13": {"Wash dishes": "kris"}, "2025-11": {"Do washing": "len", "Take out trash": "kris"}},
+}
+
+def test_binary_round_trip():
+    encoded = snapshot.encode(DATA)
+    assert snapshot.is_snapshot(encoded)
+    decoded = snapshot.decode(encoded)
+    assert decoded["streaks"] == {"kris": {"Make bed": 20}}
+    decoded["streaks"]["len"] = {}
+    assert decoded == DATA
+    assert list(decoded) == list(DATA)
+
+def test_unexpected_values_fall_back_to_json():
+    data = {"households": {"Home": {"members": ["kris"], "points": {"kris": 2.5}}}}
+    assert snapshot.decode(snapshot.encode(data)) == data
+
+@pytest.mark.parametrize("fmt", FileStore.FORMATS)
+def test_format_is_detected_and_kept(tmp_path, fmt):
+    path = str(tmp_path / "data.json")
+    FileStore(path, fmt).save(DATA)
+    store = FileStore(path)
+    assert store.load()["households"] == DATA["households"]
+    assert store.format() == fmt
+
+def test_convert(tmp_path):
+    path = str(tmp_path / "data.json")
+    FileStore(path).save(DATA)
+    assert convert(path, "binary") == "json"
+    assert FileStore(path).format() == "binary"
+    assert convert(path, "compact") == "binary"
+    assert FileStore(path).load()["completed_habits"] == DATA["completed_habits"]
@@ -0,0 +1,91 @@
+import json
+import pytest
+from datetime import datetime
+from services.data_manager import DataManager
+from services.storage import open_store
+from services.sqlite_store import SQLiteStore
+
+SAMPLE = {
+    "households": {"Home": {"members": ["kris", "len"], "points": {"kris": 10, "len": 5}}},
+    "habits": [{"name": "Make bed", "periodicity": "daily", "created_at": "2025-03-13T15:35:45", "points": 5, "is_bonus": False}],
+    "bonus_habits": [{"name": "Wash dishes", "periodicity": "daily", "created_at": "2025-03-13T15:39:23", "points": 10, "is_bonus": True}],
+    "leaderboard": {"rankings": {"Home": {"kris": 10, "len": 5}}, "past_rankings": [{"month": "02-2025", "top_user": "len", "points": 40}]},
+    "streaks": {"kris": {"Make bed": 3}},
+    "completed_habits": {"2025-03-13": {"Wash dishes": "kris"}},
+}
+
+@pytest.fixture
+def sqlite_path(tmp_path):
+    return str(tmp_path / "data.db")
+
+def test_open_store_picks_backend(tmp_path):
+    assert isinstance(open_store(str(tmp_path / "data.db"), journal=False), SQLiteStore)
+    assert not isinstance(open_store(str(tmp_path / "data.json"), journal=False), SQLiteStore)
+
+def test_sqlite_round_trip(sqlite_path):
+    SQLiteStore(sqlite_path).save(SAMPLE)
+    assert SQLiteStore(sqlite_path).load() == SAMPLE
+
+def test_sqlite_indexed_lookups(sqlite_path):
+    store = SQLiteStore(sqlite_path)
+    store.save(SAMPLE)
+    assert store.find_household("len") == "Home"
+    assert store.find_household("nobody") is None
+    assert store.find_habit("Wash dishes")["is_bonus"] is True
+
+def test_sqlite_saves_only_changed_rows(sqlite_path):
+    store = SQLiteStore(sqlite_path)
+    store.save(SAMPLE)
+    data = store.load()
+    data["households"]["Home"]["points"]["kris"] = 15
+    statements = []
+    store.conn.set_trace_callback(statements.append)
+    store.save(data, {"households"})
+    writes = [s for s in statements if s.startswith(("INSERT", "DELETE"))]
+    assert len(writes) == 1 and "members" in writes[0]
+
+def test_sqlite_history_is_one_row_per_completion(sqlite_path):
+    store = SQLiteStore(sqlite_path)
+    data = dict(SAMPLE, history={"kris": {"Make bed": [100, 200]}, "len": {"Make bed": [150]}})
+    store.save(data)
+    data["history"]["kris"]["Make bed"].append(300)
+    data["history"]["len"]["Make bed"].insert(0, 50)
+    statements = []
+    store.conn.set_trace_callback(statements.append)
+    store.save(data, {"history"})
+    writes = [s for s in statements if s.startswith(("INSERT", "DELETE"))]
+    assert len(writes) == 2 and all("history" in write for write in writes)
+    assert SQLiteStore(sqlite_path).load()["history"] == {"kris": {"Make bed": [100, 200, 300]}, "len": {"Make bed": [50, 150]}}
+
+    del data["history"]["len"]
+    store.save(data, {"history"})
+    assert SQLiteStore(sqlite_path).read_section("history") == {"kris": {"Make bed": [100, 200, 300]}}
+    assert SQLiteStore(sqlite_path).history_between("kris", start=datetime(1970, 1, 1, 0, 3)) == \
+        {"Make bed": [datetime(1970, 1, 1, 0, 3, 20), datetime(1970, 1, 1, 0, 5)]}
+
+def test_sqlite_partial_save_moves_a_history_document(sqlite_path):
+    store = SQLiteStore(sqlite_path)
+    store.save(SAMPLE)
+    # how stores written before the history table kept it
+    with store.conn:
+        store.conn.execute("INSERT INTO documents (section, body) VALUES ('history', ?)",
+                           (json.dumps({"kris": {"Make bed": [100, 200]}}),))
+    store = SQLiteStore(sqlite_path)
+    data = store.load()
+    data["schedule"] = []
+    store.save(data, {"schedule"})
+    assert SQLiteStore(sqlite_path).load()["history"] == {"kris": {"Make bed": [100, 200]}}
+    assert store.conn.execute("SELECT COUNT(*) FROM history").fetchone()[0] == 2
+
+def test_migrate_and_complete_with_sqlite(tmp_path, monkeypatch):
+    source = tmp_path / "data.json"
+    source.write_text(json.dumps(SAMPLE))
+    target = str(tmp_path / "data.db")
+    DataManager.migrate_store(str(source), target)
+
+    monkeypatch.setattr(DataManager, "FILE_PATH", target)
+    assert DataManager.complete_habit("kris", "Make bed")
+    data = open_store(target).load()
+    assert data["households"]["Home"]["points"]["kris"] == 15
+    assert data["leaderboard"]["rankings"]["Home"] == {"kris": 15, "len": 5}
+    assert list(DataManager.completion_history("kris")) == ["Wash dishes", "Make bed"]
@@ -0,0 +1,62 @@
+import io
+import json
+import pytest
+from services.data_manager import DataManager
+from services.storage import FileStore, LazyDocument, StorageError, open_store
+from services.sqlite_store import SQLiteStore
+from services.streaming import SectionReader
+from testing.test_storage import SAMPLE
+
+@pytest.fixture(params=["json", "compact", "binary"])
+def file_store(request, tmp_path):
+    store = FileStore(str(tmp_path / "data.json"), request.param)
+    store.save(SAMPLE)
+    return FileStore(store.path)
+
+def test_reader_handles_chunk_boundaries(monkeypatch):
+    monkeypatch.setattr(SectionReader, "CHUNK", 3)
+    text = json.dumps(dict(SAMPLE, journal_seq=12345), indent=4)
+    for name, value in SAMPLE.items():
+        assert SectionReader(io.StringIO(text)).value(name) == (True, value)
+    assert list(SectionReader(io.StringIO(text)).section("habits")) == SAMPLE["habits"]
+    assert list(SectionReader(io.StringIO(text)).section("journal_seq")) == [12345]
+    assert SectionReader(io.StringIO(text)).value("missing") == (False, None)
+
+def test_file_store_reads_single_sections(file_store):
+    for name, value in SAMPLE.items():
+        assert file_store.read_section(name) == value
+    assert dict(file_store.iter_section("completed_habits")) == SAMPLE["completed_habits"]
+    assert file_store.read_section("missing", []) == []
+
+def test_missing_and_corrupt_files(tmp_path):
+    store = FileStore(str(tmp_path / "data.json"))
+    assert store.read_section("habits") == []
+    (tmp_path / "data.json").write_text('{"households": {"Home": ', encoding="utf-8")
+    with pytest.raises(StorageError):
+        store.read_section("habits")
+    with pytest.raises(StorageError):
+        list(store.iter_section("habits"))
+
+def test_sqlite_sections(tmp_path):
+    SQLiteStore(str(tmp_path / "data.db")).save(SAMPLE)
+    store = SQLiteStore(str(tmp_path / "data.db"))
+    assert store.read_section("bonus_habits") == SAMPLE["bonus_habits"]
+    assert dict(store.iter_section("completed_habits")) == SAMPLE["completed_habits"]
+    assert store.read_section("leaderboard") == SAMPLE["leaderboard"]
+
+def test_journal_tail_is_replayed(tmp_path, monkeypatch):
+    monkeypatch.setattr(DataManager, "FILE_PATH", str(tmp_path / "data.json"))
+    open_store(DataManager.FILE_PATH).save(json.loads(json.dumps(SAMPLE)))
+    DataManager.claim_bonus_habit("len", "Wash dishes")
+    store = open_store(DataManager.FILE_PATH)
+    assert len(dict(store.iter_section("completed_habits"))) == 2
+    assert LazyDocument(store)["households"]["Home"]["points"]["len"] == 15
+
+def test_read_only_commands_skip_history(tmp_path, monkeypatch):
+    monkeypatch.setattr(DataManager, "FILE_PATH", str(tmp_path / "data.json"))
+    # completed_habits is unreadable, so touching it would raise
+    text = json.dumps(SAMPLE, indent=4).replace('"completed_habits": {', '"completed_habits": {!!')
+    (tmp_path / "data.json").write_text(text, encoding="utf-8")
+    assert [h["name"] for h in DataManager.load_habits()] == ["Make bed", "Wash dishes"]
+    from services.leaderboard import Leaderboard
+    assert Leaderboard().get_top("Home", 1) == [("kris", 10)]
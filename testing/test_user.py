@@ -1,7 +1,7 @@
 import pytest
+from datetime import date, timedelta
 from classes.user import User
 from classes.household import Household
-from classes.habit import Habit
 
 @pytest.fixture
 def household():
@@ -14,3 +14,50 @@ def user(household):
 def test_add_points(user):
     user.add_points(10)
     assert user.points == 10
+
+def test_streak_counts_consecutive_days(user):
+    start = date(2025, 1, 1)
+    for day in [0, 1, 2, 4, 5]:
+        user.track_completion("Exercise", start + timedelta(days=day), "daily")
+    assert user.streaks["Exercise"] == 2
+    assert user.streak_state["Exercise"]["longest"] == 3
+
+def test_same_period_keeps_streak(user):
+    monday = date(2025, 1, 6)
+    user.track_completion("Laundry", monday, "weekly")
+    user.track_completion("Laundry", monday + timedelta(days=3), "weekly")
+    user.track_completion("Laundry", monday + timedelta(days=8), "weekly")
+    assert user.streaks["Laundry"] == 2
+
+def test_streak_bonus_awarded_once_per_milestone(user):
+    start = date(2025, 1, 1)
+    bonuses = []
+    for day in range(15):
+        user.track_completion("Exercise", start + timedelta(days=day), "daily")
+        bonuses.append(user.get_bonus_points("Exercise"))
+    assert sum(bonuses) == 10
+    assert user.points == 0
+
+def test_incremental_streak_matches_rebuild(user):
+    start = date(2025, 1, 1)
+    for day in [3, 4, 5, 9, 10, 1, 2, 11]:
+        user.track_completion("Exercise", start + timedelta(days=day), "daily")
+    incremental = dict(user.streak_state["Exercise"])
+    assert user.rebuild_streak("Exercise", "daily") == incremental
+    assert incremental["current"] == 3 and incremental["longest"] == 5
+
+def test_history_is_stored_as_day_ordinals(user):
+    start = date(2025, 1, 1)
+    for day in [2, 0, 1]:
+        user.track_completion("Exercise", start + timedelta(days=day), "daily")
+    assert user.habits_completed["Exercise"].typecode == "i"
+    assert user.completion_dates("Exercise") == [start, start + timedelta(days=1), start + timedelta(days=2)]
+    assert not hasattr(user, "__dict__")
+
+def test_serialization_round_trip(user):
+    user.track_completion("Exercise", date(2025, 1, 1), "daily")
+    data = user.to_dict()
+    assert data["habits_completed"] == {"Exercise": [date(2025, 1, 1).toordinal()]}
+    assert User.from_dict(data).to_dict() == data
+    legacy = dict(data, habits_completed={"Exercise": ["2025-01-01"]})
+    assert User.from_dict(legacy).completion_dates("Exercise") == [date(2025, 1, 1)]